@@ -1,13 +1,63 @@
+import datetime
 from pathlib import Path
 import sys
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 
 import click
 from click.core import Context
 from loguru import logger
 import pkg_resources
 
-from updater import components, config_yaml
+from updater import (
+    breaker,
+    cache,
+    components,
+    config_yaml,
+    engine,
+    ratelimit,
+    remote,
+    server,
+    session,
+    snapshot,
+)
+
+
+def parse_duration(
+    ctx: Context, param: click.Parameter, value: Optional[str]
+) -> Optional[datetime.timedelta]:
+    try:
+        return cache.parse_duration(value) if value is not None else None
+    except ValueError as e:
+        raise click.BadParameter(str(e))
+
+
+def parse_registry_ttls(
+    ctx: Context, param: click.Parameter, values: Tuple[str, ...]
+) -> Dict[str, datetime.timedelta]:
+    ret: Dict[str, datetime.timedelta] = {}
+    for value in values:
+        host, sep, duration = value.partition("=")
+        if not sep or not host:
+            raise click.BadParameter(f"{value} should be given as HOST=DURATION")
+        ret[host] = parse_duration(ctx, param, duration)  # type: ignore[assignment]
+    return ret
+
+
+def parse_size(
+    ctx: Context, param: click.Parameter, value: Optional[str]
+) -> Optional[int]:
+    try:
+        return cache.parse_size(value) if value is not None else None
+    except ValueError as e:
+        raise click.BadParameter(str(e))
+
+
+def format_size(size: int) -> str:
+    for unit in ["B", "KiB", "MiB"]:
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024  # type: ignore[assignment]
+    return f"{size:.1f} GiB"
 
 
 @click.group()
@@ -39,6 +89,103 @@ from updater import components, config_yaml
     is_flag=True,
     help="Config is printed to stdout at the end.",
 )  # type: ignore
+@click.option(
+    "--jobs",
+    type=int,
+    default=engine.DEFAULT_JOBS,
+    show_default=True,
+    help="How many components are checked at once. Use 1 to check them one by one.",
+)  # type: ignore
+@click.option(
+    "--per-host",
+    "per_host",
+    type=int,
+    default=engine.DEFAULT_PER_HOST,
+    show_default=True,
+    help="How many components are checked at once against the same registry.",
+)  # type: ignore
+@click.option(
+    "--rate-limit",
+    "rate_limit",
+    type=float,
+    default=ratelimit.DEFAULT_RATE,
+    show_default=True,
+    help="Max requests per second sent to one registry, lowered when registry throttles.",
+)  # type: ignore
+@click.option(
+    "--connect-timeout",
+    "connect_timeout",
+    type=float,
+    default=session.CONNECT_TIMEOUT,
+    show_default=True,
+    help="Seconds to wait for connection to a registry.",
+)  # type: ignore
+@click.option(
+    "--read-timeout",
+    "read_timeout",
+    type=float,
+    default=session.READ_TIMEOUT,
+    show_default=True,
+    help="Seconds to wait for data from a registry.",
+)  # type: ignore
+@click.option(
+    "--hedge-after",
+    "hedge_after",
+    type=float,
+    help="If set, request not answered in that many seconds is sent again and the first response is used.",
+)  # type: ignore
+@click.option(
+    "--failure-threshold",
+    "failure_threshold",
+    type=int,
+    default=breaker.FAILURE_THRESHOLD,
+    show_default=True,
+    help="Consecutive failures after which requests to a registry fail fast.",
+)  # type: ignore
+@click.option(
+    "--failure-cooldown",
+    "failure_cooldown",
+    type=float,
+    default=breaker.COOLDOWN,
+    show_default=True,
+    help="Seconds before a failing registry is tried again.",
+)  # type: ignore
+@click.option(
+    "--cache-ttl",
+    "cache_ttl",
+    callback=parse_duration,
+    help="How long fetched versions are cached eg. 30m, 12h, 3d.  [default: 3d]",
+)  # type: ignore
+@click.option(
+    "--registry-ttl",
+    "registry_ttls",
+    multiple=True,
+    callback=parse_registry_ttls,
+    help="Cache TTL for one registry host as HOST=DURATION eg. pypi.org=7d, can be repeated.",
+)  # type: ignore
+@click.option(
+    "--negative-ttl",
+    "negative_ttl",
+    callback=parse_duration,
+    help="How long not found components are cached.  [default: 10m]",
+)  # type: ignore
+@click.option(
+    "--stale-while-revalidate",
+    "stale_while_revalidate",
+    callback=parse_duration,
+    help="How long after TTL cached versions are used while they are refreshed in background, 0 to always wait for fresh ones.  [default: 1d]",
+)  # type: ignore
+@click.option(
+    "--cache-max-size",
+    "cache_max_size",
+    callback=parse_size,
+    help="Least recently used cache entries are removed after a run to keep the cache under this size eg. 50M.",
+)  # type: ignore
+@click.option(
+    "--deadline",
+    type=float,
+    help="Seconds for checking all components, components not checked in time are reported as unknown.",
+)  # type: ignore
 @click.pass_context
 def cli(
     ctx: Context,
@@ -46,6 +193,20 @@ def cli(
     destination_file: Optional[Path],
     dry_run: bool,
     print_yaml: bool,
+    jobs: int,
+    per_host: int,
+    rate_limit: float,
+    connect_timeout: float,
+    read_timeout: float,
+    hedge_after: Optional[float],
+    failure_threshold: int,
+    failure_cooldown: float,
+    cache_ttl: Optional[datetime.timedelta],
+    registry_ttls: Dict[str, datetime.timedelta],
+    negative_ttl: Optional[datetime.timedelta],
+    stale_while_revalidate: Optional[datetime.timedelta],
+    cache_max_size: Optional[int],
+    deadline: Optional[float],
 ) -> None:
     config_file: Optional[Path] = None
     if file is not None:
@@ -57,6 +218,15 @@ def cli(
         ctx.obj = {}
 
     ctx.obj["config"] = config_yaml.Config(components_yaml_file=config_file)
+    ctx.obj["config"].jobs = jobs
+    ctx.obj["config"].per_host_jobs = per_host
+    ctx.obj["config"].deadline = deadline
+    ratelimit.scheduler.configure(rate_limit)
+    session.configure(connect_timeout, read_timeout, hedge_after)
+    breaker.breakers.configure(failure_threshold, failure_cooldown)
+    cache.configure(
+        cache_ttl, registry_ttls, negative_ttl, stale_while_revalidate, cache_max_size
+    )
     ctx.obj["config_file"] = config_file
     ctx.obj["destination_file"] = destination_file
     ctx.obj["dry_run"] = dry_run
@@ -67,8 +237,8 @@ def cli(
 @click.option(
     "--type",
     "component_type",
-    help="Component type: docker-image or pypi package.",
-    type=click.Choice(["docker-image", "pypi"]),
+    help="Component type: docker-image, pypi, npm package, helm-chart, github-release or go-module.",
+    type=click.Choice([t.value for t in components.ComponentType]),
 )  # type: ignore
 @click.option(
     "--component", help="A component name for which the version should be verified."
@@ -76,6 +246,11 @@ def cli(
 @click.option(
     "--repo_name", help="A repository name if component is a docker image."
 )  # type: ignore
+@click.option(
+    "--registry-url",
+    "registry_url",
+    help="Registry the component versions are taken from, required for helm-chart.",
+)  # type: ignore
 @click.option(
     "--version_tag",
     help="Version tag eg. v2.3.0 against which new version check will be run.",
@@ -97,16 +272,23 @@ def cli(
     is_flag=True,
     help="Ignore components.yaml file in local directory if exists.",
 )  # type: ignore
+@click.option(
+    "--server",
+    envvar=remote.ENV,
+    help="Url of the updater serve process versions are resolved through.",
+)  # type: ignore
 @click.pass_context
 def check(
     ctx: Context,
     component_type: Optional[str],
     component: Optional[str],
     repo_name: Optional[str],
+    registry_url: Optional[str],
     version_tag: Optional[str],
     verbose: bool,
     clear_cache: bool,
     ignore_default_file: bool,
+    server: Optional[str],
 ) -> None:
     """Check if new versions of ddefined components are available.
     """
@@ -121,11 +303,12 @@ def check(
 
     if ignore_default_file:
         config.config_file = None
+    remote.configure(server)
 
     config.read_from_yaml()
 
     if component is not None:
-        config.add(
+        last_index = config.add(
             components.factory.get(
                 component_type=str(component_type),
                 repo_name=repo_name,
@@ -133,11 +316,16 @@ def check(
                 current_version_tag=version_tag,
             )
         )
+        if registry_url is not None:
+            config.components[last_index].registry_url = registry_url
 
     ret_mess: List[str] = []
     ret_mess.append(f"{len(config.components)} components to check")
     ret_mess.append(f"{config.count_components_to_update()} components to update")
+    if config.unchecked:
+        ret_mess.append(f"{len(config.unchecked)} components not checked")
     config.save_config(destination_file, dry_run, print_yaml)
+    cache.finish_run()
     if verbose:
         ret_mess.extend(config.get_versions_info())
     click.echo("\n".join(ret_mess))
@@ -179,6 +367,11 @@ def check(
     is_flag=True,
     help="Print at the end detailed info for each component about update process.",
 )  # type: ignore
+@click.option(
+    "--server",
+    envvar=remote.ENV,
+    help="Url of the updater serve process versions are resolved through.",
+)  # type: ignore
 @click.pass_context
 def update(
     ctx: Context,
@@ -188,6 +381,7 @@ def update(
     project_dir: Optional[Path],
     verbose: bool,
     very_verbose: bool,
+    server: Optional[str],
 ) -> None:
     """Update files, run test and commit changes."""
     config: config_yaml.Config = ctx.obj["config"]
@@ -199,9 +393,11 @@ def update(
     config.test_dir = test_dir
     config.git_commit = git_commit
     config.project_dir = Path(project_dir) if project_dir else config.project_dir
+    remote.configure(server)
     config.read_from_yaml()
     config.check()
     config.save_config(destination_file, dry_run, print_yaml)
+    cache.finish_run()
 
     try:
         components_updated, files_updated = config.update_files(dry_run)
@@ -251,5 +447,204 @@ def import_req(ctx: Context, source: str, requirements_file: Path) -> None:
     config.save_config(destination_file, dry_run, print_yaml)
 
 
+@cli.command()
+@click.argument("files", nargs=-1, type=click.Path(exists=True, dir_okay=False))
+@click.option(
+    "--refresh-ahead",
+    "refresh_ahead",
+    default="1h",
+    show_default=True,
+    callback=parse_duration,
+    help="Cached versions expiring within this time are fetched again.",
+)  # type: ignore
+@click.pass_context
+def warm(
+    ctx: Context, files: Tuple[str, ...], refresh_ahead: datetime.timedelta
+) -> None:
+    """Fetch versions of components from FILES into the cache, before
+    cached ones expire. Can be run from cron also while checks are running."""
+    config: config_yaml.Config = ctx.obj["config"]
+    config_files = [Path(f).absolute() for f in files] or (
+        [config.config_file] if config.config_file else []
+    )
+    warmed: List[components.Component] = []
+    for config_file in config_files:
+        config.read_from_yaml(config_file)
+        warmed.extend(config.components)
+    config.components = warmed
+    with cache.policy.refreshing_ahead(refresh_ahead):
+        config.warm()
+        cache.wait_for_refresh()
+    cache.finish_run(record_lookups=False)
+
+    ret_mess: List[str] = []
+    ret_mess.append(
+        f"{len(config.components) - len(config.unchecked)} components warmed"
+        f" from {len(config_files)} files"
+    )
+    if config.unchecked:
+        ret_mess.append(f"{len(config.unchecked)} components not warmed")
+    click.echo("\n".join(ret_mess))
+
+
+@cli.command()
+@click.option(
+    "--host",
+    default=server.DEFAULT_HOST,
+    show_default=True,
+    help="Address to listen on.",
+)  # type: ignore
+@click.option(
+    "--port",
+    type=int,
+    default=server.DEFAULT_PORT,
+    show_default=True,
+    help="Port to listen on.",
+)  # type: ignore
+@click.option(
+    "--memory-ttl",
+    "memory_ttl",
+    type=float,
+    default=server.MEMORY_TTL,
+    show_default=True,
+    help="Seconds versions are kept in memory before the cache is asked again.",
+)  # type: ignore
+@click.option(
+    "--local-mirror",
+    "local_mirrors",
+    multiple=True,
+    help="file:// registry-url clients may use, other local paths are refused, can be repeated.",
+)  # type: ignore
+def serve(
+    host: str, port: int, memory_ttl: float, local_mirrors: Tuple[str, ...]
+) -> None:
+    """Resolve versions for check and update run with --server, sharing
+    fetches and the cache between all of them."""
+    server.serve(host, port, memory_ttl, local_mirrors)
+
+
+@cli.group("snapshot")
+def snapshots() -> None:
+    """Versions snapshot for checks run without access to registries."""
+
+
+@snapshots.command("export")
+@click.argument("snapshot_file", type=click.Path(dir_okay=False))
+@click.pass_context
+def snapshot_export(ctx: Context, snapshot_file: Path) -> None:
+    """Fetch versions of all components into a snapshot file."""
+    config: config_yaml.Config = ctx.obj["config"]
+    config.read_from_yaml()
+    with snapshot.recording() as versions:
+        config.check()
+    versions.save(Path(snapshot_file))
+    cache.finish_run()
+
+    ret_mess: List[str] = []
+    ret_mess.append(f"{len(versions)} versions lists exported to {snapshot_file}")
+    if config.unchecked:
+        ret_mess.append(f"{len(config.unchecked)} components not exported")
+    click.echo("\n".join(ret_mess))
+
+
+@snapshots.command("import")
+@click.argument("snapshot_file", type=click.Path(exists=True, dir_okay=False))
+def snapshot_import(snapshot_file: Path) -> None:
+    """Use versions from the snapshot file instead of registries."""
+    try:
+        versions = snapshot.install(Path(snapshot_file))
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    click.echo(f"{len(versions)} versions lists imported from {snapshot_file}")
+
+
+@snapshots.command("clear")
+def snapshot_clear() -> None:
+    """Stop using imported snapshot, versions are fetched from registries."""
+    snapshot.clear()
+
+
+@cli.group("cache")
+def caches() -> None:
+    """Versions cache kept between runs."""
+
+
+@caches.command("clear")
+@click.option(
+    "--type",
+    "component_type",
+    help="Remove only versions of components of this type.",
+    type=click.Choice([t.value for t in components.ComponentType]),
+)  # type: ignore
+@click.option(
+    "--component", help="Remove only versions of the component with this name."
+)  # type: ignore
+@click.option(
+    "--registry",
+    help="Remove only versions taken from this registry, host or url can be given.",
+)  # type: ignore
+def cache_clear(
+    component_type: Optional[str], component: Optional[str], registry: Optional[str]
+) -> None:
+    """Remove cached versions, all of them if no option is given."""
+    if component_type is None and component is None and registry is None:
+        components.clear_versions_cache()
+        click.echo("Cache cleared")
+        return
+    count = components.invalidate_versions_cache(component_type, component, registry)
+    click.echo(f"{count} entries removed from cache")
+
+
+@caches.command("prune")
+@click.option(
+    "--max-size",
+    "max_size",
+    callback=parse_size,
+    required=True,
+    help="Remove least recently used entries until cache is under this size eg. 50M.",
+)  # type: ignore
+def cache_prune(max_size: int) -> None:
+    """Shrink the cache removing least recently used entries."""
+    count = cache.store.prune(max_size)
+    click.echo(f"{count} entries removed from cache")
+
+
+@caches.command("stats")
+@click.option(
+    "--runs",
+    type=int,
+    default=10,
+    show_default=True,
+    help="How many recent runs are used for hit ratio.",
+)  # type: ignore
+def cache_stats(runs: int) -> None:
+    """Show size, age of entries and hit ratio of recent runs."""
+    stats = cache.store.stats(runs)
+    ret_mess: List[str] = []
+    ret_mess.append(f"Cache file: {cache.store.path}")
+    ret_mess.append(f"Size: {format_size(stats.size)}")
+    ret_mess.append("Entries:")
+    for n in stats.namespaces:
+        ret_mess.append(
+            f"  {n.namespace}: {n.entries} ({n.not_found} not found,"
+            f" {n.errors} errors), {format_size(n.size)}"
+        )
+    ret_mess.append(
+        f"  http responses: {stats.responses}, {format_size(stats.responses_size)}"
+    )
+    ret_mess.append("Age:")
+    for label, count in stats.ages:
+        ret_mess.append(f"  {label}: {count}")
+    if stats.hit_ratio is None:
+        ret_mess.append("No runs recorded yet")
+    else:
+        ret_mess.append(
+            f"Last {stats.runs} runs: {stats.hit_ratio:.0%} hit ratio,"
+            f" {stats.hits} hits, {stats.stale} stale, {stats.negative} negative,"
+            f" {stats.misses} misses"
+        )
+    click.echo("\n".join(ret_mess))
+
+
 if __name__ == "__main__":
     cli(obj={})  # pragma: no cover
@@ -21,7 +21,6 @@ setup(
         "Programming Language :: Python :: 3.9",
         "Programming Language :: Python :: 3.8",
         "Programming Language :: Python :: 3.7",
-        "Programming Language :: Python :: 3.6",
         "Topic :: Software Development :: Build Tools",
         "Operating System :: POSIX :: Linux",
     ],
@@ -33,16 +32,17 @@ setup(
         "requests==2.26.0",
         "packaging==21.3",
         "plumbum==1.7.1",
-        "cachier==1.5.3",
-        "python-rex==0.4",
-        "pymongo==3.12.1",
         "click==7.1",
         "PyYAML==5.4.1",
     ],
+    extras_require={
+        # versions sorted with NumPy, much faster for long tags lists
+        "numpy": ["numpy"],
+    },
     entry_points="""
         [console_scripts]
         updater=check_version:cli
     """,
     include_package_data=True,
-    python_requires=">=3.6.9",
+    python_requires=">=3.7",
 )
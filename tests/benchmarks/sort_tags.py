@@ -0,0 +1,62 @@
+"""Time of sorting tags by version with packaging and with NumPy,
+run with: python tests/benchmarks/sort_tags.py"""
+
+import random
+import sys
+import timeit
+import warnings
+from pathlib import Path
+from typing import List
+
+sys.path.insert(0, str(Path(__file__).absolute().parents[2]))
+
+from updater import version_array, version_index  # noqa: E402
+
+REPEAT: int = 5
+
+
+RELEASES: List[str] = [""]
+# about a quarter of them are not PEP 440 versions
+DOCKER_LIKE: List[str] = ["", "", "", "rc1", "-alpine", "-slim", ".post1", "b2"]
+
+
+def random_tags(count: int, suffixes: List[str]) -> List[str]:
+    rnd = random.Random(0)
+    tags = [
+        f"{rnd.randint(0, 20)}.{rnd.randint(0, 40)}.{rnd.randint(0, 60)}"
+        f"{rnd.choice(suffixes)}"
+        for _ in range(count)
+    ]
+    return tags + ["latest", "master"]
+
+
+def main() -> None:
+    warnings.simplefilter("ignore")
+    if not version_array.available():
+        sys.exit("numpy is not installed")
+    for name, suffixes, count in [
+        ("releases", RELEASES, 1000),
+        ("releases", RELEASES, 50000),
+        ("docker-like", DOCKER_LIKE, 1000),
+        ("docker-like", DOCKER_LIKE, 50000),
+    ]:
+        tags = random_tags(count, suffixes)
+        assert version_array.sort_tags(tags) == version_index.sort_parsed_tags(tags)
+        parsed = min(
+            timeit.repeat(
+                lambda: version_index.sort_parsed_tags(tags), number=1, repeat=REPEAT
+            )
+        )
+        vectorised = min(
+            timeit.repeat(
+                lambda: version_array.sort_tags(tags), number=1, repeat=REPEAT
+            )
+        )
+        print(
+            f"{len(tags):>6} {name + ' tags:':<18}packaging {parsed * 1000:8.1f} ms,"
+            f" numpy {vectorised * 1000:8.1f} ms, {parsed / vectorised:4.1f}x faster"
+        )
+
+
+if __name__ == "__main__":
+    main()
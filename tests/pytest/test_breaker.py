@@ -0,0 +1,99 @@
+from unittest.mock import Mock, patch
+
+import pytest
+import requests
+
+from updater import breaker, cache, components, config_yaml, http_cache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def failing_send():
+    raise requests.ConnectionError("registry down")
+
+
+def test_circuit_opens_after_threshold():
+    breakers = breaker.Breakers(threshold=2, cooldown=10, clock=FakeClock())
+    for _ in range(2):
+        with pytest.raises(requests.ConnectionError):
+            breakers.request("pypi.org", failing_send)
+    send = Mock(return_value=Mock(status_code=200))
+    with pytest.raises(breaker.CircuitOpenError):
+        breakers.request("pypi.org", send)
+    send.assert_not_called()
+    # other hosts are not affected
+    assert breakers.request("index.docker.io", send).status_code == 200
+
+
+def test_server_errors_are_failures_client_errors_are_not():
+    breakers = breaker.Breakers(threshold=2, cooldown=10, clock=FakeClock())
+    breakers.request("pypi.org", Mock(return_value=Mock(status_code=404)))
+    breakers.request("pypi.org", Mock(return_value=Mock(status_code=502)))
+    assert not breakers.breaker("pypi.org").is_open
+    breakers.request("pypi.org", Mock(return_value=Mock(status_code=500)))
+    assert breakers.breaker("pypi.org").is_open
+
+
+def test_probe_after_cooldown():
+    clock = FakeClock()
+    breakers = breaker.Breakers(threshold=1, cooldown=10, clock=clock)
+    with pytest.raises(requests.ConnectionError):
+        breakers.request("pypi.org", failing_send)
+
+    clock.now = 11
+    # failed probe opens the circuit for another cooldown
+    with pytest.raises(requests.ConnectionError):
+        breakers.request("pypi.org", failing_send)
+    with pytest.raises(breaker.CircuitOpenError):
+        breakers.request("pypi.org", failing_send)
+
+    clock.now = 22
+    ok = Mock(return_value=Mock(status_code=200))
+    breakers.request("pypi.org", ok)
+    breakers.request("pypi.org", ok)
+    assert ok.call_count == 2
+    assert not breakers.breaker("pypi.org").is_open
+
+
+def test_stored_response_used_when_circuit_open(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, "store", cache.Store(tmp_path / "cache.sqlite"))
+    url = "https://pypi.org/pypi/Django/json"
+    response = Mock(status_code=200, headers={"ETag": '"v1"'})
+    with patch("updater.session.get", return_value=response):
+        assert http_cache.conditional_get(url, lambda r: ["1.0"]) == ["1.0"]
+
+    with patch("updater.session.get", side_effect=breaker.CircuitOpenError("pypi.org")):
+        assert http_cache.conditional_get(url, lambda r: ["2.0"]) == ["1.0"]
+        with pytest.raises(breaker.CircuitOpenError):
+            http_cache.conditional_get(url + "?other", lambda r: [])
+
+
+def test_components_of_unavailable_registry_are_unknown():
+    config = config_yaml.Config()
+    for name in ("Django", "requests", "click"):
+        config.add(
+            components.factory.get(
+                component_type="pypi",
+                component_name=name,
+                current_version_tag="1.0",
+            )
+        )
+    config.components[2].registry_url = "https://pypi.example.com"
+
+    def fake_pypi(name, registry_url=None):
+        if registry_url == "https://pypi.org":
+            raise breaker.CircuitOpenError("pypi.org")
+        return ["1.0", "2.0"]
+
+    with patch("updater.components.fetch_pypi_versions", side_effect=fake_pypi):
+        result = dict(config.check())
+        assert config.count_components_to_update() == 1
+
+    assert result == {"Django": None, "requests": None, "click": True}
+    assert [comp.component_name for comp in config.unchecked] == ["Django", "requests"]
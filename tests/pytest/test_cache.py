@@ -0,0 +1,370 @@
+import datetime
+import multiprocessing
+import sqlite3
+import threading
+from collections import Counter
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+import pytest
+import requests
+from click.testing import CliRunner
+
+from updater import cache
+
+
+@pytest.fixture(autouse=True)
+def store(tmp_path: Path, monkeypatch):
+    store = cache.Store(tmp_path / "cache.sqlite")
+    monkeypatch.setattr(cache, "store", store)
+    monkeypatch.setattr(cache, "_lookups", Counter())
+    return store
+
+
+def test_entries_are_compressed_rows(store):
+    store.put("pypi-json", '["Django"]', ["1.0"] * 1000, "https://pypi.org", "Django")
+    assert store.get("pypi-json", '["Django"]').data == ["1.0"] * 1000
+    assert store.get("pypi-json", '["other"]') is None
+
+    conn = sqlite3.connect(str(store.path))
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    registry, component, size = conn.execute(
+        "SELECT registry, component, size FROM entries"
+    ).fetchone()
+    assert (registry, component) == ("https://pypi.org", "Django")
+    assert size < 100
+
+
+def test_cached_function():
+    fetch = Mock(side_effect=lambda component_name, registry_url=None: [component_name])
+
+    @cache.cached("test", "registry_url", default_registry="https://pypi.org")
+    def fetch_versions(component_name, registry_url=None):
+        return fetch(component_name, registry_url)
+
+    assert fetch_versions("Django") == ["Django"]
+    assert fetch_versions(component_name="Django") == ["Django"]
+    assert fetch_versions("Django", "https://pypi.example.com") == ["Django"]
+    assert fetch.call_count == 2
+    assert fetch_versions.__wrapped__("Django") == ["Django"]
+
+    fetch_versions.clear_cache()
+    fetch_versions("Django")
+    assert fetch.call_count == 4
+
+
+@pytest.fixture
+def policy():
+    yield cache.policy
+    cache.configure()
+
+
+def age_entries(store, seconds):
+    conn = sqlite3.connect(str(store.path))
+    conn.execute("UPDATE entries SET fetched_at = fetched_at - ?", (seconds,))
+    conn.commit()
+    conn.close()
+
+
+def test_parse_duration():
+    assert cache.parse_duration("90") == datetime.timedelta(seconds=90)
+    assert cache.parse_duration("15m") == datetime.timedelta(minutes=15)
+    assert cache.parse_duration("1.5h") == datetime.timedelta(minutes=90)
+    assert cache.parse_duration("2w") == datetime.timedelta(days=14)
+    with pytest.raises(ValueError):
+        cache.parse_duration("1 hour")
+
+
+def test_ttl_of_command_line_then_component_then_config(policy):
+    day = datetime.timedelta(days=1)
+    policy.config_registry_ttls = {"registry.internal": day}
+    assert policy.ttl_for("https://pypi.org") == datetime.timedelta(days=3)
+    assert policy.ttl_for("https://registry.internal") == day
+    with policy.component_ttl(datetime.timedelta(minutes=5)):
+        assert policy.ttl_for("https://registry.internal") == datetime.timedelta(
+            minutes=5
+        )
+        cache.configure(
+            ttl=datetime.timedelta(days=3),
+            registry_ttls={"registry.internal": datetime.timedelta(hours=1)},
+        )
+        assert policy.ttl_for("https://registry.internal") == datetime.timedelta(
+            hours=1
+        )
+        assert policy.ttl_for("https://pypi.org") == datetime.timedelta(days=3)
+    assert policy.ttl_for(None) == datetime.timedelta(days=3)
+
+
+def test_expired_entry_is_refetched(store, policy):
+    cache.configure(stale_while_revalidate=datetime.timedelta(0))
+    fetch = Mock(return_value=["1.0"])
+
+    @cache.cached("test", "registry_url")
+    def fetch_versions(component_name, registry_url):
+        return fetch(component_name)
+
+    fetch_versions("Django", "https://pypi.org")
+    age_entries(store, 3600)
+    fetch_versions("Django", "https://pypi.org")
+    assert fetch.call_count == 1
+    cache.configure(
+        registry_ttls={"pypi.org": datetime.timedelta(minutes=30)},
+        stale_while_revalidate=datetime.timedelta(0),
+    )
+    fetch_versions("Django", "https://pypi.org")
+    assert fetch.call_count == 2
+
+
+def test_stale_entry_is_returned_and_refreshed_in_background(store, policy):
+    cache.configure(ttl=datetime.timedelta(minutes=1))
+    versions = iter([["1.0"], ["1.0", "2.0"]])
+
+    @cache.cached("test")
+    def fetch_versions(component_name):
+        return next(versions)
+
+    assert fetch_versions("Django") == ["1.0"]
+    age_entries(store, 120)
+    assert fetch_versions("Django") == ["1.0"]
+    cache.wait_for_refresh()
+    assert fetch_versions("Django") == ["1.0", "2.0"]
+
+
+def test_only_not_found_is_cached_for_negative_ttl(store, policy):
+    not_found = requests.HTTPError("404 Not Found", response=Mock(status_code=404))
+    fetch = Mock(
+        side_effect=[
+            [],
+            requests.ConnectionError("Could not get auth token"),
+            not_found,
+            ["1.0"],
+        ]
+    )
+
+    @cache.cached("test")
+    def fetch_versions(component_name):
+        return fetch(component_name)
+
+    assert fetch_versions("missing") == []
+    assert fetch_versions("missing") == []
+    assert fetch.call_count == 1
+
+    age_entries(store, cache.NEGATIVE_TTL.total_seconds())
+    # transient errors are not cached, the next check tries again
+    with pytest.raises(requests.ConnectionError, match="auth token"):
+        fetch_versions("missing")
+    with pytest.raises(requests.HTTPError, match="404"):
+        fetch_versions("missing")
+    with pytest.raises(cache.CachedFetchError, match="404"):
+        fetch_versions("missing")
+    assert fetch.call_count == 3
+
+    age_entries(store, cache.NEGATIVE_TTL.total_seconds())
+    assert fetch_versions("missing") == ["1.0"]
+
+
+def test_expired_entry_is_used_when_fetch_fails(store, policy):
+    cache.configure(stale_while_revalidate=datetime.timedelta(0))
+    fetch = Mock(side_effect=[["1.0"], Exception("timeout")])
+
+    @cache.cached("test")
+    def fetch_versions(component_name):
+        return fetch(component_name)
+
+    fetch_versions("Django")
+    age_entries(store, cache.DEFAULT_TTL.total_seconds())
+    assert fetch_versions("Django") == ["1.0"]
+    assert fetch.call_count == 2
+
+
+def test_parse_size():
+    assert cache.parse_size("1000") == 1000
+    assert cache.parse_size("512K") == 512 * 1024
+    assert cache.parse_size("1.5MiB") == 3 * 2**19
+    with pytest.raises(ValueError):
+        cache.parse_size("lots")
+
+
+def test_delete_by_component_registry_and_namespace(store):
+    store.put("pypi-json", "1", ["1.0"], "https://pypi.org", "Django")
+    store.put("pypi-json", "2", ["1.0"], "https://pypi.example.com", "Django")
+    store.put("pypi-simple", "3", ["1.0"], "https://pypi.org", "Flask")
+    store.put("npm", "4", ["1.0"], "https://registry.npmjs.org", "lodash")
+    store.put_response("https://pypi.org/simple/flask/", '"a"', None, ["1.0"])
+    store.put_response("https://registry.npmjs.org/lodash", '"b"', None, ["1.0"])
+
+    assert store.delete(component="Django", registry="pypi.example.com") == 1
+    assert store.delete(registry="https://pypi.org", namespaces=["pypi-simple"]) == 1
+    assert store.delete_responses("pypi.org") == 1
+    assert store.get("pypi-json", "1") is not None
+    assert store.get("npm", "4") is not None
+    assert store.get_response("https://registry.npmjs.org/lodash") is not None
+
+
+def test_prune_removes_least_recently_used(store):
+    for name in ["a", "b", "c"]:
+        store.put("test", name, [name * 200])
+    conn = sqlite3.connect(str(store.path))
+    conn.execute(
+        "UPDATE entries SET accessed_at = accessed_at - ?", (cache.ACCESS_INTERVAL,)
+    )
+    conn.commit()
+    store.get("test", "a")
+    accessed = conn.execute("SELECT accessed_at FROM entries WHERE key = 'a'")
+    accessed_at = accessed.fetchone()[0]
+    # recent reads do not write the access time again
+    store.get("test", "a")
+    accessed = conn.execute("SELECT accessed_at FROM entries WHERE key = 'a'")
+    assert accessed.fetchone()[0] == accessed_at
+    conn.close()
+    size = store.stats().size
+
+    assert store.prune(size) == 0
+    assert store.prune(size - 1) == 1
+    assert store.get("test", "a") is not None
+    assert store.prune(0) == 2
+    assert store.stats().size == 0
+
+
+def test_stats_of_entries_and_runs(store, policy):
+    fetch = Mock(side_effect=[["1.0"], []])
+
+    @cache.cached("test")
+    def fetch_versions(component_name):
+        return fetch(component_name)
+
+    fetch_versions("Django")
+    fetch_versions("Django")
+    fetch_versions("missing")
+    fetch_versions("missing")
+    cache.finish_run()
+    age_entries(store, datetime.timedelta(days=2).total_seconds())
+    fetch_versions("Django")
+    cache.finish_run()
+
+    stats = store.stats()
+    assert stats.namespaces == [cache.NamespaceStats("test", 2, 1, 0, stats.size)]
+    assert stats.ages == [
+        ("< 1h", 0),
+        ("1h - 1d", 0),
+        ("1d - 3d", 2),
+        ("3d - 1w", 0),
+        (">= 1w", 0),
+    ]
+    assert (stats.runs, stats.hits, stats.negative, stats.misses) == (2, 2, 1, 2)
+    assert stats.hit_ratio == 0.6
+    assert store.stats(runs=1).hits == 1
+
+
+def test_finish_run_prunes_to_max_size(store, policy):
+    store.put("test", "a", ["1.0"])
+    cache.configure(max_size=0)
+    cache.finish_run()
+    assert store.get("test", "a") is None
+
+
+def test_cache_commands(store):
+    from check_version import cli
+
+    store.put("pypi-json", "1", ["1.0"], "https://pypi.org", "Django")
+    store.put("npm", "2", ["1.0"], "https://registry.npmjs.org", "lodash")
+    store.put("npm", "3", ["1.0"], "https://registry.npmjs.org", "react")
+    runner = CliRunner()
+
+    result = runner.invoke(cli, ["cache", "stats"])
+    assert result.exit_code == 0
+    assert "npm: 2 (0 not found, 0 errors)" in result.output
+    result = runner.invoke(cli, ["cache", "clear", "--component", "lodash"])
+    assert result.output == "1 entries removed from cache\n"
+    result = runner.invoke(cli, ["cache", "clear", "--type", "pypi"])
+    assert result.output == "1 entries removed from cache\n"
+    result = runner.invoke(cli, ["cache", "prune", "--max-size", "0"])
+    assert result.output == "1 entries removed from cache\n"
+    result = runner.invoke(cli, ["cache", "prune", "--max-size", "1 hour"])
+    assert result.exit_code == 2
+
+
+def test_refreshing_ahead_fetches_entries_close_to_expiry(store, policy):
+    fetch = Mock(side_effect=lambda component_name: [component_name])
+
+    @cache.cached("test")
+    def fetch_versions(component_name):
+        return fetch(component_name)
+
+    fetch_versions("Django")
+    fetch_versions("Flask")
+    age_entries(
+        store, (cache.DEFAULT_TTL - datetime.timedelta(minutes=30)).total_seconds()
+    )
+    with policy.refreshing_ahead(datetime.timedelta(hours=1)):
+        fetch_versions("Django")
+    fetch_versions("Django")
+    assert fetch.call_count == 3
+    with policy.refreshing_ahead(datetime.timedelta(minutes=10)):
+        fetch_versions("Flask")
+    assert fetch.call_count == 3
+
+
+def test_warm_command(store, tmp_path):
+    from check_version import cli
+
+    (tmp_path / "a.yaml").write_text(
+        "Django:\n  component-type: pypi\n  current-version: 2.2.24\n"
+    )
+    (tmp_path / "b.yaml").write_text(
+        "Django:\n  component-type: pypi\n  current-version: 3.2.9\n"
+        "Flask:\n  component-type: pypi\n  current-version: '1.0'\n"
+    )
+    response = Mock(
+        status_code=200,
+        headers={},
+        json=Mock(return_value={"releases": {"2.2.24": [], "3.2.9": [], "1.0": []}}),
+    )
+    runner = CliRunner()
+    with patch("updater.session.get", return_value=response) as get:
+        result = runner.invoke(
+            cli, ["warm", str(tmp_path / "a.yaml"), str(tmp_path / "b.yaml")]
+        )
+        assert result.output == "3 components warmed from 2 files\n"
+        assert get.call_count == 2
+        result = runner.invoke(cli, ["warm", str(tmp_path / "b.yaml")])
+        assert get.call_count == 2
+    assert store.stats().runs == 0
+    # versions are stored sorted, so checks do not parse them
+    assert [ns.namespace for ns in store.stats().namespaces] == ["pypi-json"]
+    key = '["Django","https://pypi.org"]'
+    assert store.get("pypi-json", key).data == ["1.0", "2.2.24", "3.2.9"]
+
+
+def test_concurrent_threads(store):
+    def worker(i):
+        for j in range(20):
+            store.put("test", f"{i}-{j}", [str(j)])
+            assert store.get("test", f"{i}-{j}").data == [str(j)]
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert store.delete("test") == 160
+
+
+def _process_worker(path, i):
+    store = cache.Store(Path(path))
+    for j in range(20):
+        store.put("test", f"{i}-{j}", [str(j)])
+
+
+def test_concurrent_processes(store):
+    store.put("test", "first", [])
+    processes = [
+        multiprocessing.Process(target=_process_worker, args=(str(store.path), i))
+        for i in range(4)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    assert all(process.exitcode == 0 for process in processes)
+    assert store.delete("test") == 81
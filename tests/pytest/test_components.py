@@ -1,11 +1,13 @@
+from unittest.mock import Mock, patch
+
 from packaging.version import parse
 import yaml
-from updater import components
+from updater import cache, components
 from updater.components import Component
 import pytest
+import requests
 from pathlib import Path
 
-
 FIXTURE_DIR = Path(".").absolute() / "tests/test_files"
 
 COMP = {
@@ -261,3 +263,219 @@ def test_files_version_pattern_to_yaml(tmpdir: Path):
     yaml.dump(Component.components_to_dict(components_list), open(file_to_save, "w"))
     assert "pattern: version {version}" in file_to_save.read_text()
 
+
+def test_docker_tags_pages_follow_link_header():
+    first_page = Mock(
+        status_code=200,
+        headers={},
+        links={"next": {"url": "/v2/library/python/tags/list?last=3.7&n=2"}},
+        json=Mock(return_value={"tags": ["3.6", "3.7"]}),
+    )
+    last_page = Mock(
+        status_code=200, headers={}, links={}, json=Mock(return_value={"tags": ["3.8"]})
+    )
+    with patch("updater.docker_auth.get_token", return_value="token"), patch(
+        "updater.session.get", side_effect=[first_page, last_page]
+    ) as get:
+        pages = list(
+            components.iter_docker_images_tags_pages("library", "python", page_size=2)
+        )
+    assert pages == [["3.6", "3.7"], ["3.8"]]
+    assert get.call_args_list[0][0][0].endswith("/tags/list?n=2")
+    assert get.call_args_list[1][0][0] == (
+        "https://index.docker.io/v2/library/python/tags/list?last=3.7&n=2"
+    )
+
+
+def test_docker_tags_and_digest_from_other_registry():
+    tags_page = Mock(
+        status_code=200, headers={}, links={}, json=Mock(return_value={"tags": ["2.9"]})
+    )
+    manifest = Mock(status_code=200, headers={"Docker-Content-Digest": "sha256:aaa"})
+    with patch(
+        "updater.docker_auth.auth_headers", return_value={"Authorization": "Bearer t"}
+    ) as auth_headers, patch(
+        "updater.session.get", return_value=tags_page
+    ) as get, patch(
+        "updater.session.head", return_value=manifest
+    ) as head:
+        tags = components._join_pages(
+            components.fetch_docker_images_tags_pages.__wrapped__(
+                "grafana", "loki", registry_url="https://ghcr.io"
+            )
+        )
+        digest = components.fetch_docker_image_digest(
+            "grafana", "loki", "2.9", "https://ghcr.io"
+        )
+    assert tags == ["2.9"] and digest == "sha256:aaa"
+    assert get.call_args[0][0] == "https://ghcr.io/v2/grafana/loki/tags/list?n=1000"
+    assert head.call_args[0][0] == "https://ghcr.io/v2/grafana/loki/manifests/2.9"
+    assert [c[0][0] for c in auth_headers.call_args_list] == ["https://ghcr.io"] * 2
+
+
+def test_select_next_version_keeps_only_candidates():
+    comp = components.factory.get(**COMP["logspout"])
+    comp.filter = r"/^v\d+\.\d+\.\d+$/"
+    comp.exclude_versions = ["v3.2.6"]
+    comp.prefix = "v"
+    comp.select_next_version([["v3.1.0", "latest", "v3.2.6"], ["v3.2.5", "master"]])
+    assert comp.version_tags == ["v3.1.0", "v3.2.5"]
+    assert comp.next_version_tag == "v3.2.5"
+
+
+def test_docker_check_selects_from_pages_as_they_come(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, "store", cache.Store(tmp_path / "cache.sqlite"))
+    comp = components.factory.get(**COMP["logspout"])
+    comp.filter = r"/^v\d+\.\d+\.\d+$/"
+    pages = [["v3.10.0", "master"], ["latest", "v3.2.0"]]
+    selected = []
+
+    def select(tags):
+        selected.append(list(tags))
+        return [tag for tag in tags if tag.startswith("v")]
+
+    with patch(
+        "updater.components.iter_docker_images_tags_pages", return_value=iter(pages)
+    ), patch("updater.filters.TagFilter.select", side_effect=select):
+        assert comp.check()
+    assert selected == pages
+    assert comp.version_tags == ["v3.2.0", "v3.10.0"]
+    # the cached list is sorted, so it is neither fetched nor parsed again
+    with patch(
+        "updater.components.iter_docker_images_tags_pages", side_effect=AssertionError
+    ), patch("updater.version_index.sort_tags", side_effect=AssertionError):
+        assert comp.check()
+    assert comp.next_version_tag == "3.10.0"
+
+
+def test_docker_hub_recent_tags_stop_at_current_tag():
+    def hub_page(names, next_url):
+        return Mock(
+            status_code=200,
+            json=Mock(
+                return_value={"results": [{"name": n} for n in names], "next": next_url}
+            ),
+        )
+
+    with patch(
+        "updater.session.get",
+        side_effect=[
+            hub_page(["v3.3", "v3.2"], "https://hub.docker.com/page2"),
+            hub_page(["v3.1", "v3.0"], "https://hub.docker.com/page3"),
+        ],
+    ) as get:
+        tags = components.fetch_docker_hub_recent_tags.__wrapped__(
+            "gliderlabs", "logspout", "v3.1"
+        )
+    assert tags == ["v3.3", "v3.2", "v3.1", "v3.0"]
+    assert get.call_count == 2
+    assert get.call_args_list[0][1]["params"]["ordering"] == "last_updated"
+
+
+def test_docker_fetch_mode():
+    comp = components.factory.get(**COMP["logspout"])
+    comp.fetch_mode = "hub-recent"
+    with patch(
+        "updater.components.fetch_docker_hub_recent_tags", return_value=["v3.2"]
+    ) as recent:
+        assert comp.fetch_versions_tags() == ["v3.2"]
+    recent.assert_called_once_with("gliderlabs", "logspout", "v3.1")
+    # other registries have no Hub API, their tags are listed from them
+    comp.registry_url = "https://ghcr.io"
+    with patch("updater.components.fetch_docker_hub_recent_tags") as recent, patch(
+        "updater.components.fetch_docker_images_versions", return_value=["v3.2"]
+    ) as tags_list:
+        assert comp.fetch_versions_tags() == ["v3.2"]
+    recent.assert_not_called()
+    tags_list.assert_called_once_with(
+        "gliderlabs", "logspout", registry_url="https://ghcr.io"
+    )
+    comp.fetch_mode = "not_exists"
+    with pytest.raises(ValueError) as excinfo:
+        comp.fetch_versions_tags()
+    assert "not implemented" in str(excinfo.value)
+
+
+def test_docker_digest_mode():
+    comp = components.factory.get(
+        **{**COMP["glances"], "current_version_tag": "latest"}
+    )
+    comp.fetch_mode = "digest"
+    with patch(
+        "updater.components.fetch_docker_image_digest", return_value="sha256:aaa"
+    ):
+        assert comp.check() is False
+    assert comp.digest == "sha256:aaa"
+    with patch(
+        "updater.components.fetch_docker_image_digest", return_value="sha256:bbb"
+    ):
+        assert comp.check() is True
+    assert comp.to_dict()["next-digest"] == "sha256:bbb"
+
+
+def test_docker_image_digest_from_manifest_headers():
+    response = Mock(status_code=200, headers={"Docker-Content-Digest": "sha256:aaa"})
+    with patch("updater.docker_auth.get_token", return_value="token"), patch(
+        "updater.session.head", return_value=response
+    ) as head:
+        digest = components.fetch_docker_image_digest("nicolargo", "glances", "latest")
+    assert digest == "sha256:aaa"
+    assert head.call_args[0][0].endswith("/v2/nicolargo/glances/manifests/latest")
+
+
+def test_npm_versions_from_abbreviated_metadata():
+    response = Mock(
+        status_code=200,
+        headers={},
+        json=Mock(return_value={"name": "@types/node", "versions": {"16.0.0": {}}}),
+    )
+    with patch("updater.session.get", return_value=response) as get:
+        versions = components.fetch_npm_versions.__wrapped__("@types/node")
+    assert versions == ["16.0.0"]
+    assert get.call_args[0][0] == "https://registry.npmjs.org/@types%2Fnode"
+    assert components.NpmComponent.ABBREVIATED_MEDIA_TYPE in (
+        get.call_args[1]["headers"]["Accept"]
+    )
+
+
+def test_only_not_found_statuses_are_empty_versions(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, "store", cache.Store(tmp_path / "cache.sqlite"))
+
+    def response(status_code):
+        r = requests.Response()
+        r.status_code = status_code
+        r._content = b"<html>error</html>"
+        r.url = "https://pypi.org/pypi/missing/json"
+        return r
+
+    fetch_go = components.fetch_go_module_versions
+    with patch("updater.session.get", return_value=response(502)):
+        with pytest.raises(requests.HTTPError, match="502"):
+            components.fetch_pypi_versions("missing")
+        with pytest.raises(requests.HTTPError, match="502"):
+            fetch_go("example.com/missing", "https://proxy")
+    with patch("updater.session.get", return_value=response(404)):
+        assert components.fetch_pypi_versions("missing") == []
+    with patch("updater.session.get", return_value=response(410)):
+        assert fetch_go("example.com/missing", "https://proxy") == []
+    # server errors were not cached, not found answers are
+    with patch("updater.session.get", side_effect=AssertionError):
+        assert components.fetch_pypi_versions("missing") == []
+        assert fetch_go("example.com/missing", "https://proxy") == []
+
+
+def test_npm_component_update_file(tmpdir: Path):
+    package_json = Path(tmpdir) / "package.json"
+    package_json.write_text('{"dependencies": {"lodash": "4.17.20"}}')
+    comp = components.factory.get(
+        component_type="npm", component_name="lodash", current_version_tag="4.17.20"
+    )
+    comp.files = [str(package_json)]
+    with patch(
+        "updater.components.fetch_npm_versions",
+        side_effect=lambda *args, **kwargs: ["4.17.20", "4.17.21", "5.0.0-beta"],
+    ):
+        comp.filter = r"/^\d+\.\d+\.\d+$/"
+        assert comp.check()
+    comp.update_files(Path("/"))
+    assert '"lodash": "4.17.21"' in package_json.read_text()
@@ -1,12 +1,16 @@
+import datetime
 from typing import List
 from unittest.mock import Mock, patch
-from updater import components, config_yaml, plumbum_msg, git_check
+from updater import cache, components, config_yaml, filters, plumbum_msg, git_check
+from updater import session
 from pathlib import Path
-from rex import rex  # type: ignore
 import tempfile
+import threading
+import time
 import shutil
 import pytest
 import os
+import requests
 from plumbum import local  # type: ignore
 import pprint
 
@@ -57,10 +61,10 @@ def return_mock_list_versions(component_name: str, *args, **kwargs) -> List[str]
     return mock_versions[component_name]
 
 
-def return_mock_list_docker_images_versions(
+def return_mock_docker_images_tags_pages(
     repo_name: str, component_name: str, *args, **kwargs
-) -> List[str]:
-    return mock_versions[component_name]
+) -> List[List[str]]:
+    return [mock_versions[component_name]]
 
 
 def config_from_copy_of_test_dir() -> config_yaml.Config:
@@ -87,8 +91,8 @@ def config_from_copy_of_test_dir_with_dir_param() -> config_yaml.Config:
 
 
 @patch(
-    "updater.components.fetch_docker_images_versions",
-    new=Mock(side_effect=return_mock_list_docker_images_versions),
+    "updater.components.fetch_docker_images_tags_pages",
+    new=Mock(side_effect=return_mock_docker_images_tags_pages),
 )
 @patch(
     "updater.components.fetch_pypi_versions",
@@ -105,8 +109,8 @@ def test_get_status_all_to_update():
 
 
 @patch(
-    "updater.components.fetch_docker_images_versions",
-    new=Mock(side_effect=return_mock_list_docker_images_versions),
+    "updater.components.fetch_docker_images_tags_pages",
+    new=Mock(side_effect=return_mock_docker_images_tags_pages),
 )
 @patch(
     "updater.components.fetch_pypi_versions",
@@ -122,8 +126,8 @@ def test_get_status_skip_update():
 
 
 @patch(
-    "updater.components.fetch_docker_images_versions",
-    new=Mock(side_effect=return_mock_list_docker_images_versions),
+    "updater.components.fetch_docker_images_tags_pages",
+    new=Mock(side_effect=return_mock_docker_images_tags_pages),
 )
 @patch(
     "updater.components.fetch_pypi_versions",
@@ -136,8 +140,8 @@ def test_load_config_without_yaml_file():
 
 
 @patch(
-    "updater.components.fetch_docker_images_versions",
-    new=Mock(side_effect=return_mock_list_docker_images_versions),
+    "updater.components.fetch_docker_images_tags_pages",
+    new=Mock(side_effect=return_mock_docker_images_tags_pages),
 )
 @patch(
     "updater.components.fetch_pypi_versions",
@@ -190,6 +194,28 @@ def test_exlude_versions_to_yaml(tmp_path: Path):
     assert "v3.2.6" in file_content
 
 
+def test_registry_ttl_from_yaml_for_all_components_of_registry(tmp_path: Path):
+    config_file = tmp_path / "components.yaml"
+    config_file.write_text(
+        "Django:\n  component-type: pypi\n  current-version: '2.2.24'\n"
+        "  registry-ttl: 12h\n"
+        "requests:\n  component-type: pypi\n  current-version: '2.20.0'\n"
+    )
+    config = config_yaml.Config(components_yaml_file=config_file)
+    config.read_from_yaml()
+    try:
+        config.prepare_check()
+        assert cache.policy.ttl_for("https://pypi.org") == datetime.timedelta(hours=12)
+        # command line TTL takes precedence over components.yaml
+        cache.configure(ttl=datetime.timedelta(hours=1))
+        config.prepare_check()
+        assert cache.policy.ttl_for("https://pypi.org") == datetime.timedelta(hours=1)
+    finally:
+        cache.configure()
+    config.save_to_yaml()
+    assert config_file.read_text().count("registry-ttl: 12h") == 1
+
+
 def test_save_files_to_yaml_wrong_file_path(tmp_path: Path):
     config = config_yaml.Config()
     config.add(components.factory.get(**comp["logspout"]))
@@ -211,8 +237,8 @@ def test_save_files_to_yaml(tmp_path: Path):
 
 
 @patch(
-    "updater.components.fetch_docker_images_versions",
-    new=Mock(side_effect=return_mock_list_docker_images_versions),
+    "updater.components.fetch_docker_images_tags_pages",
+    new=Mock(side_effect=return_mock_docker_images_tags_pages),
 )
 @patch(
     "updater.components.fetch_pypi_versions",
@@ -225,7 +251,9 @@ def test_use_filter_for_component_to_yaml(tmp_path: Path):
     config.components[0].prefix = "v"
     config.components[0].filter = r"/^v\d+\.\d+\.\d+$/"
     config.components[0].check()
-    assert config.components[0].next_version_tag == rex(config.components[0].filter)
+    assert filters.get(config.components[0].filter).matches(
+        config.components[0].next_version_tag
+    )
 
 
 def test_components_list_write_read_yaml_file(tmp_path: Path):
@@ -241,8 +269,8 @@ def test_components_list_write_read_yaml_file(tmp_path: Path):
 
 
 @patch(
-    "updater.components.fetch_docker_images_versions",
-    new=Mock(side_effect=return_mock_list_docker_images_versions),
+    "updater.components.fetch_docker_images_tags_pages",
+    new=Mock(side_effect=return_mock_docker_images_tags_pages),
 )
 @patch(
     "updater.components.fetch_pypi_versions",
@@ -289,8 +317,8 @@ def test_save_config_print_yaml(capfd):
 
 
 @patch(
-    "updater.components.fetch_docker_images_versions",
-    new=Mock(side_effect=return_mock_list_docker_images_versions),
+    "updater.components.fetch_docker_images_tags_pages",
+    new=Mock(side_effect=return_mock_docker_images_tags_pages),
 )
 @patch(
     "updater.components.fetch_pypi_versions",
@@ -325,8 +353,8 @@ def test_dry_run_update_file():
 
 
 @patch(
-    "updater.components.fetch_docker_images_versions",
-    new=Mock(side_effect=return_mock_list_docker_images_versions),
+    "updater.components.fetch_docker_images_tags_pages",
+    new=Mock(side_effect=return_mock_docker_images_tags_pages),
 )
 @patch(
     "updater.components.fetch_pypi_versions",
@@ -344,8 +372,158 @@ def test_exclude_versions_param():
 
 
 @patch(
-    "updater.components.fetch_docker_images_versions",
-    new=Mock(side_effect=return_mock_list_docker_images_versions),
+    "updater.components.fetch_docker_images_tags_pages",
+    new=Mock(side_effect=return_mock_docker_images_tags_pages),
+)
+@patch(
+    "updater.components.fetch_pypi_versions",
+    new=Mock(side_effect=return_mock_list_versions),
+)
+def test_check_concurrently_same_as_sequential():
+    config = config_from_copy_of_test_dir()
+    sequential = config.check()
+    config = config_from_copy_of_test_dir()
+    config.jobs = 4
+    config.per_host_jobs = 2
+    assert config.check() == sequential
+    assert [c.next_version_tag for c in config.components] == [
+        "v2.11.3",
+        "v3.3.0",
+        "2.3.4",
+        "2.20.2",
+        "3.6.8-alpine3.8",
+    ]
+
+
+def return_mock_list_versions_slowly(component_name: str, *args, **kwargs):
+    time.sleep(0.2)
+    return mock_versions[component_name]
+
+
+@patch(
+    "updater.components.fetch_pypi_versions",
+    new=Mock(side_effect=return_mock_list_versions_slowly),
+)
+@pytest.mark.parametrize("jobs,deadline", [(1, 0.1), (2, 0.3)])
+def test_check_deadline_returns_partial_results(jobs, deadline):
+    config = config_yaml.Config(components_yaml_file=None)
+    config.add(components.factory.get(**comp["Django"]))
+    config.add(components.factory.get(**comp["requests"]))
+    config.add(components.factory.get(**comp["wily"]))
+    config.jobs = jobs
+    config.per_host_jobs = 1
+    config.deadline = deadline
+    assert config.check() == [("Django", True), ("requests", None), ("wily", None)]
+    assert config.count_components_to_update() == 1
+    assert "CHECK_UNKNOWN" in config.get_status()
+
+
+def test_check_deadline_stays_with_checks_running_after_it():
+    left_after_check: List[float] = []
+    finished = threading.Event()
+
+    def fetch(component_name: str, *args, **kwargs) -> List[str]:
+        time.sleep(0.3)
+        # the check has returned, requests of this one are still cut short
+        left_after_check.append(session.remaining())
+        finished.set()
+        return mock_versions[component_name]
+
+    config = config_yaml.Config(components_yaml_file=None)
+    config.add(components.factory.get(**comp["Django"]))
+    config.add(components.factory.get(**comp["requests"]))
+    config.jobs = 2
+    config.deadline = 0.1
+    with patch("updater.components.fetch_pypi_versions", side_effect=fetch):
+        assert config.check() == [("Django", None), ("requests", None)]
+        assert session.remaining() is None
+        assert finished.wait(5)
+    assert left_after_check[0] is not None and left_after_check[0] <= 0
+
+
+@patch(
+    "updater.components.fetch_docker_images_tags_pages",
+    new=Mock(side_effect=requests.ConnectionError("index.docker.io is down")),
+)
+@patch(
+    "updater.components.fetch_pypi_versions",
+    new=Mock(side_effect=return_mock_list_versions),
+)
+@pytest.mark.parametrize("jobs", [1, 8])
+def test_check_other_components_when_registry_fails(jobs):
+    config = config_from_copy_of_test_dir()
+    config.jobs = jobs
+    assert config.check() == [
+        ("glances", None),
+        ("logspout", None),
+        ("Django", True),
+        ("requests", True),
+        ("python", None),
+    ]
+    assert [c.component_name for c in config.unchecked] == [
+        "glances",
+        "logspout",
+        "python",
+    ]
+    assert config.count_components_to_update() == 2
+
+
+def pypi_response(url: str, *args, **kwargs) -> requests.Response:
+    r = requests.Response()
+    r.url = url
+    if "/Django/" in url:
+        r.status_code = 502
+        r._content = b"<html>Bad Gateway</html>"
+    elif "/requests/" in url:
+        r.status_code = 200
+        r._content = b'{"releases": {"2.20.0": [], "2.20.2": []}}'
+    else:
+        r.status_code = 404
+        r._content = b'{"message": "Not Found"}'
+    return r
+
+
+@pytest.mark.parametrize("jobs", [1, 8])
+def test_check_other_components_when_registry_returns_errors(
+    jobs, tmp_path: Path, monkeypatch
+):
+    monkeypatch.setattr(cache, "store", cache.Store(tmp_path / "cache.sqlite"))
+    config = config_yaml.Config(components_yaml_file=None)
+    config.add(components.factory.get(**comp["Django"]))
+    config.add(components.factory.get(**comp["requests"]))
+    config.add(components.factory.get(**comp["wily"]))
+    config.jobs = jobs
+    with patch("updater.session.get", side_effect=pypi_response):
+        # not found wily has no versions, it is left unchecked too
+        assert config.check() == [("Django", None), ("requests", True), ("wily", None)]
+    assert [c.component_name for c in config.unchecked] == ["Django", "wily"]
+
+
+@patch(
+    "updater.components.fetch_docker_image_digest",
+    new=Mock(return_value="sha256:bbb"),
+)
+def test_update_digest_only(tmp_path: Path):
+    config_file = tmp_path / "components.yaml"
+    (tmp_path / "Dockerfile").write_text("FROM nicolargo/glances:latest")
+    config = config_yaml.Config(components_yaml_file=config_file)
+    config.git_commit = False
+    config.add(
+        components.factory.get(**{**comp["glances"], "current_version_tag": "latest"})
+    )
+    glances = config.components[0]
+    glances.fetch_mode = "digest"
+    glances.digest = "sha256:aaa"
+    glances.files = ["Dockerfile"]
+    assert config.check() == [("glances", True)]
+    assert config.update_files() == (0, 0)
+    assert "digest: sha256:bbb" in config_file.read_text()
+    assert (tmp_path / "Dockerfile").read_text() == "FROM nicolargo/glances:latest"
+
+
+@patch(
+    "updater.components.fetch_docker_images_tags_pages",
+    new=Mock(side_effect=return_mock_docker_images_tags_pages),
 )
 @patch(
     "updater.components.fetch_pypi_versions",
@@ -367,8 +545,8 @@ def test_update_components_files_with_testing_positive(capfd):
 
 
 @patch(
-    "updater.components.fetch_docker_images_versions",
-    new=Mock(side_effect=return_mock_list_docker_images_versions),
+    "updater.components.fetch_docker_images_tags_pages",
+    new=Mock(side_effect=return_mock_docker_images_tags_pages),
 )
 @patch(
     "updater.components.fetch_pypi_versions",
@@ -390,8 +568,8 @@ def test_update_components_files_with_project_dir_param(capfd):
 
 
 @patch(
-    "updater.components.fetch_docker_images_versions",
-    new=Mock(side_effect=return_mock_list_docker_images_versions),
+    "updater.components.fetch_docker_images_tags_pages",
+    new=Mock(side_effect=return_mock_docker_images_tags_pages),
 )
 @patch(
     "updater.components.fetch_pypi_versions",
@@ -439,8 +617,8 @@ def test_commit_changes():
 
 
 @patch(
-    "updater.components.fetch_docker_images_versions",
-    new=Mock(side_effect=return_mock_list_docker_images_versions),
+    "updater.components.fetch_docker_images_tags_pages",
+    new=Mock(side_effect=return_mock_docker_images_tags_pages),
 )
 @patch(
     "updater.components.fetch_pypi_versions",
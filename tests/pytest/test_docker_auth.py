@@ -0,0 +1,101 @@
+from unittest.mock import Mock, patch
+
+import pytest
+
+from updater import docker_auth
+from updater.docker_auth import TokenCache
+
+TOKEN_URL = "https://auth.example.com/token"
+
+
+def token_response(token: str = "abc", expires_in: int = 300) -> Mock:
+    return Mock(
+        status_code=200,
+        json=Mock(return_value={"token": token, "expires_in": expires_in}),
+    )
+
+
+def test_token_is_cached_per_scope():
+    cache = TokenCache(TOKEN_URL)
+    with patch("updater.session.get", return_value=token_response()) as get:
+        assert cache.token("repository:library/python:pull") == "abc"
+        assert cache.token("repository:library/python:pull") == "abc"
+    assert get.call_count == 1
+
+
+def test_wanted_scopes_requested_in_one_batch():
+    cache = TokenCache(TOKEN_URL)
+    scopes = [
+        docker_auth.pull_scope("library", name) for name in ("python", "node", "redis")
+    ]
+    cache.want(scopes)
+    with patch("updater.session.get", return_value=token_response()) as get:
+        for scope in scopes:
+            cache.token(scope)
+    assert get.call_count == 1
+    params = get.call_args[1]["params"]
+    assert [value for key, value in params if key == "scope"] == scopes
+
+
+def test_expired_token_is_requested_again():
+    cache = TokenCache(TOKEN_URL)
+    with patch("updater.session.get", return_value=token_response(expires_in=0)) as get:
+        cache.token("repository:library/python:pull")
+        cache.token("repository:library/python:pull")
+    assert get.call_count == 2
+
+
+def test_token_request_error():
+    cache = TokenCache(TOKEN_URL)
+    with patch("updater.session.get", return_value=Mock(status_code=400)):
+        with pytest.raises(Exception) as excinfo:
+            cache.token("repository:library/python:pull")
+    assert "Could not get auth token" in str(excinfo.value)
+
+
+@pytest.fixture
+def clear_realms():
+    yield
+    docker_auth.clear_tokens()
+
+
+def test_parse_challenge():
+    assert docker_auth.parse_challenge(
+        'Bearer realm="https://ghcr.io/token",service="ghcr.io",scope="x"'
+    ) == ("https://ghcr.io/token", "ghcr.io")
+    assert docker_auth.parse_challenge('Basic realm="Registry"') is None
+
+
+def test_realm_is_taken_from_registry_challenge(clear_realms):
+    challenge = Mock(
+        status_code=401,
+        headers={
+            "WWW-Authenticate": 'Bearer realm="https://ghcr.io/token",service="ghcr.io"'
+        },
+    )
+    scopes = [docker_auth.pull_scope("grafana", name) for name in ("loki", "tempo")]
+    docker_auth.want("https://ghcr.io", scopes)
+    with patch("updater.session.get", side_effect=[challenge, token_response()]) as get:
+        headers = docker_auth.auth_headers("https://ghcr.io", scopes[0])
+        assert docker_auth.auth_headers("https://ghcr.io", scopes[1]) == headers
+    assert headers == {"Authorization": "Bearer abc"}
+    assert get.call_args_list[0][0][0] == "https://ghcr.io/v2/"
+    assert get.call_args_list[1][0][0] == "https://ghcr.io/token"
+    assert get.call_args_list[1][1]["params"] == [
+        ("service", "ghcr.io"),
+        ("scope", scopes[0]),
+        ("scope", scopes[1]),
+    ]
+
+
+def test_registry_without_token_auth(clear_realms):
+    with patch("updater.session.get", return_value=Mock(status_code=200)) as get:
+        assert docker_auth.auth_headers("http://localhost:5000", "scope") == {}
+        assert docker_auth.auth_headers("http://localhost:5000", "scope") == {}
+    assert get.call_count == 1
+
+
+def test_docker_hub_realm_is_known(clear_realms):
+    with patch("updater.session.get", return_value=token_response()) as get:
+        docker_auth.auth_headers("https://index.docker.io", "scope")
+    assert get.call_args[0][0] == docker_auth.HUB_TOKEN_URL
@@ -0,0 +1,32 @@
+import re
+
+import pytest
+
+from updater import filters
+
+
+def test_compile_filter():
+    assert filters.compile_filter(r"/^v\d+$/").pattern == r"^v\d+$"
+    assert filters.compile_filter(r"m#^release/\d+#i").flags & re.IGNORECASE
+    for wrong in ["", "/^v", r"/^v\d+$/q", "s/a/b/"]:
+        with pytest.raises(ValueError):
+            filters.compile_filter(wrong)
+
+
+def test_select_keeps_order_and_skips_excluded():
+    tag_filter = filters.get(r"/^v\d+\.\d+\.\d+$/", ("v3.2.6",))
+    tags = ["v3.1.0", "latest", "v3.2.6", "v3.2.5", "master", "v3.2.5-rc1"]
+    assert tag_filter.select(tags) == ["v3.1.0", "v3.2.5"]
+    assert tag_filter.matches("v3.1.0")
+    assert not tag_filter.matches("v3.2.6")
+
+
+def test_filter_searches_like_rex():
+    assert filters.get("/alpine/").select(["3.9-alpine3.14", "3.9"]) == [
+        "3.9-alpine3.14"
+    ]
+    assert filters.get(r"/^V\d+$/i").select(["v1", "V2", "x3"]) == ["v1", "V2"]
+
+
+def test_filters_are_compiled_once():
+    assert filters.get("/.*/", ("a",)) is filters.get("/.*/", ("a",))
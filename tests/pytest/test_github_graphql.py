@@ -0,0 +1,145 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+
+from updater import cache, components, config_yaml, github_graphql
+
+RELEASES = {
+    ("psf", "black"): ["22.1.0", "21.12b0"],
+    ("hadolint", "hadolint"): ["v2.8.0", "v2.7.0"],
+    ("golangci", "golangci-lint"): ["v1.44.0"],
+}
+
+
+class StubGraphQL(BaseHTTPRequestHandler):
+    queries = []
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.queries.append(body)
+        variables = body["variables"]
+        data = {}
+        for i in range(len(variables) // 2):
+            tags = RELEASES.get((variables[f"o{i}"], variables[f"n{i}"]))
+            data[f"r{i}"] = (
+                {
+                    "releases": {
+                        "nodes": [{"tagName": t, "isDraft": False} for t in tags]
+                    }
+                }
+                if tags is not None
+                else None
+            )
+        payload = json.dumps({"data": data}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(autouse=True)
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, "store", cache.Store(tmp_path / "cache.sqlite"))
+
+
+@pytest.fixture
+def stub_api():
+    StubGraphQL.queries = []
+    server = HTTPServer(("127.0.0.1", 0), StubGraphQL)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    github_graphql.clear_batches()
+
+
+def release(repo, version, url):
+    comp = components.factory.get(
+        component_type="github-release",
+        component_name=repo,
+        current_version_tag=version,
+    )
+    comp.registry_url = url
+    return comp
+
+
+def test_build_query_aliases_repositories():
+    query, variables = github_graphql.build_query(
+        ["psf/black", "hadolint/hadolint"], github_graphql.RELEASES
+    )
+    assert "r0: repository(owner: $o0, name: $n0)" in query
+    assert "r1: repository(owner: $o1, name: $n1)" in query
+    assert variables == {"o0": "psf", "n0": "black", "o1": "hadolint", "n1": "hadolint"}
+    with pytest.raises(ValueError):
+        github_graphql.split_repo("black")
+
+
+def test_versions_from_repository_skips_drafts():
+    node = {
+        "releases": {
+            "nodes": [
+                {"tagName": "v2.0.0", "isDraft": True},
+                {"tagName": "v1.0.0", "isDraft": False},
+            ]
+        }
+    }
+    assert github_graphql.versions_from_repository(node, github_graphql.RELEASES) == [
+        "v1.0.0"
+    ]
+    assert github_graphql.versions_from_repository(None, github_graphql.RELEASES) == []
+
+
+def test_all_repositories_fetched_in_one_query(stub_api):
+    config = config_yaml.Config()
+    config.jobs = 4
+    config.add(release("psf/black", "21.12b0", stub_api))
+    config.add(release("hadolint/hadolint", "v2.8.0", stub_api))
+    config.add(release("golangci/golangci-lint", "v1.43.0", stub_api))
+
+    assert dict(config.check()) == {
+        "psf/black": True,
+        "hadolint/hadolint": False,
+        "golangci/golangci-lint": True,
+    }
+    assert len(StubGraphQL.queries) == 1
+    assert len(StubGraphQL.queries[0]["variables"]) == 6
+    assert config.components[2].next_version_tag == "1.44.0"
+
+
+def test_missing_repository_has_no_versions(stub_api):
+    batch = github_graphql.get_batch(stub_api)
+    batch.want(["psf/black", "nobody/missing", "wrong-name"])
+    assert batch.versions("nobody/missing") == []
+    assert batch.versions("psf/black") == ["22.1.0", "21.12b0"]
+    assert batch.requests_count == 1
+
+
+def test_only_repositories_not_cached_are_announced(stub_api):
+    config = config_yaml.Config()
+    config.add(release("psf/black", "21.12b0", stub_api))
+    config.check()
+    config = config_yaml.Config()
+    config.add(release("hadolint/hadolint", "v2.8.0", stub_api))
+    config.add(release("psf/black", "21.12b0", stub_api))
+    assert dict(config.check()) == {"hadolint/hadolint": False, "psf/black": True}
+    # black was found in the cache, it is not queried again with hadolint
+    assert [len(query["variables"]) for query in StubGraphQL.queries] == [2, 2]
+    batch = github_graphql.get_batch(stub_api)
+    assert batch._versions == {} and batch._wanted == {}
+
+
+def test_check_forgets_only_its_own_repositories(stub_api):
+    batch = github_graphql.get_batch(stub_api)
+    batch.want(["psf/black", "hadolint/hadolint"])
+    comp = release("hadolint/hadolint", "v2.8.0", stub_api)
+    assert comp.check() is False
+    comp.finish_check([comp])
+    # black, wanted by a concurrent check, has its versions from the same query
+    assert batch.versions("psf/black") == ["22.1.0", "21.12b0"]
+    assert batch.requests_count == 1
@@ -0,0 +1,63 @@
+from unittest.mock import Mock, patch
+
+from updater import components, go_proxy
+
+
+def go_module(name, version="v1.43.0", url=None):
+    comp = components.factory.get(
+        component_type="go-module", component_name=name, current_version_tag=version
+    )
+    comp.registry_url = url
+    return comp
+
+
+def test_escape_path():
+    assert go_proxy.escape_path("github.com/BurntSushi/toml") == (
+        "github.com/!burnt!sushi/toml"
+    )
+
+
+def test_proxy_from_env(monkeypatch):
+    monkeypatch.delenv("GOPROXY", raising=False)
+    assert go_proxy.proxy_from_env() == go_proxy.DEFAULT_PROXY
+    monkeypatch.setenv("GOPROXY", "direct")
+    assert go_proxy.proxy_from_env() == go_proxy.DEFAULT_PROXY
+    monkeypatch.setenv("GOPROXY", "off,https://goproxy.example.com/|direct")
+    assert go_proxy.proxy_from_env() == "https://goproxy.example.com"
+    assert go_module("golang.org/x/tools").proxy_url == "https://goproxy.example.com"
+    assert go_module("golang.org/x/tools").registry_host == "goproxy.example.com"
+
+
+def test_versions_from_list_endpoint(monkeypatch):
+    monkeypatch.delenv("GOPROXY", raising=False)
+    response = Mock(status_code=200, headers={}, text="v1.43.0\nv1.44.0\n\n")
+    with patch("updater.session.get", return_value=response) as get:
+        versions = components.fetch_go_module_versions.__wrapped__(
+            "github.com/golangci/golangci-lint", go_proxy.DEFAULT_PROXY
+        )
+    assert versions == ["v1.43.0", "v1.44.0"]
+    assert get.call_args[0][0] == (
+        "https://proxy.golang.org/github.com/golangci/golangci-lint/@v/list"
+    )
+
+
+def test_check_with_file_proxy(tmp_path):
+    module_dir = tmp_path / "github.com" / "!burnt!sushi" / "toml" / "@v"
+    module_dir.mkdir(parents=True)
+    (module_dir / "list").write_text("v0.3.1\nv0.4.1\nv1.0.0\n")
+
+    comp = go_module("github.com/BurntSushi/toml", "v0.4.1", tmp_path.as_uri())
+    with patch(
+        "updater.components.fetch_go_module_versions",
+        side_effect=components.fetch_go_module_versions.__wrapped__,
+    ), patch("updater.session.request") as request:
+        assert comp.check()
+        assert (
+            go_module(
+                "example.com/missing", "v1.0.0", tmp_path.as_uri()
+            ).fetch_versions_tags()
+            == []
+        )
+    request.assert_not_called()
+    assert comp.next_version_tag == "v1.0.0"
+    assert comp.name_version_tag(comp.next_version_tag) == "v1.0.0"
@@ -0,0 +1,87 @@
+import io
+from unittest.mock import Mock, patch
+
+import pytest
+
+from updater import components, config_yaml, helm_index
+
+INDEX_YAML = """apiVersion: v1
+entries:
+  nginx:
+  - apiVersion: v2
+    name: nginx
+    version: 9.5.0
+    appVersion: 1.21.0
+    urls:
+    - https://charts.example.com/nginx-9.5.0.tgz
+    maintainers:
+    - name: Bitnami
+  - name: nginx
+    version: 9.4.1
+  redis:
+  - name: redis
+    version: 15.0.0
+generated: "2021-08-01T00:00:00Z"
+"""
+
+
+def chart(name, version="9.4.1", url="https://charts.example.com"):
+    comp = components.factory.get(
+        component_type="helm-chart", component_name=name, current_version_tag=version
+    )
+    comp.registry_url = url
+    return comp
+
+
+def test_versions_from_index():
+    assert helm_index.versions_from_index(INDEX_YAML) == {
+        "nginx": ["9.5.0", "9.4.1"],
+        "redis": ["15.0.0"],
+    }
+    assert helm_index.versions_from_index(io.BytesIO(INDEX_YAML.encode()))["redis"] == [
+        "15.0.0"
+    ]
+    assert helm_index.versions_from_index("apiVersion: v1\n") == {}
+
+
+def test_index_fetched_once_for_all_charts_of_repository():
+    config = config_yaml.Config()
+    config.jobs = 4
+    config.add(chart("nginx"))
+    config.add(chart("redis", "14.0.0"))
+    config.add(chart("redis", "13.0.0", "https://other.example.com"))
+
+    def fake_index(registry_url):
+        return helm_index.versions_from_index(INDEX_YAML)
+
+    with patch(
+        "updater.components.fetch_helm_index_versions", side_effect=fake_index
+    ) as fetch:
+        assert [result for _, result in config.check()] == [True, True, True]
+    assert sorted(call[0][0] for call in fetch.call_args_list) == [
+        "https://charts.example.com",
+        "https://other.example.com",
+    ]
+    assert config.components[0].next_version_tag == "9.5.0"
+
+
+def test_index_parsed_from_response_stream():
+    response = Mock(status_code=200, headers={}, raw=io.BytesIO(INDEX_YAML.encode()))
+    with patch("updater.session.get", return_value=response) as get:
+        index = components.fetch_helm_index_versions.__wrapped__(
+            "https://charts.example.com/"
+        )
+    assert index["nginx"] == ["9.5.0", "9.4.1"]
+    assert get.call_args[0][0] == "https://charts.example.com/index.yaml"
+    assert get.call_args[1]["stream"]
+
+
+def test_index_from_local_directory(tmp_path):
+    (tmp_path / "index.yaml").write_text(INDEX_YAML)
+    index = components.fetch_helm_index_versions.__wrapped__(tmp_path.as_uri())
+    assert index["redis"] == ["15.0.0"]
+
+
+def test_registry_url_is_required():
+    with pytest.raises(ValueError, match="registry-url"):
+        chart("nginx", url=None).fetch_versions_tags()
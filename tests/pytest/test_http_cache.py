@@ -0,0 +1,59 @@
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+import pytest
+
+from updater import cache, http_cache
+
+URL = "https://pypi.org/pypi/Django/json"
+
+
+def parse_releases(r) -> list:
+    return list(r.json()["releases"])
+
+
+@pytest.fixture(autouse=True)
+def cache_store(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(cache, "store", cache.Store(tmp_path / "cache.sqlite"))
+
+
+def test_not_modified_response_returns_stored_data():
+    full = Mock(
+        status_code=200,
+        headers={"ETag": '"abc"'},
+        json=Mock(return_value={"releases": {"2.2.24": [], "2.2.25": []}}),
+    )
+    not_modified = Mock(status_code=304, headers={})
+    with patch("updater.session.get", side_effect=[full, not_modified]) as get:
+        assert http_cache.conditional_get(URL, parse_releases) == ["2.2.24", "2.2.25"]
+        assert http_cache.conditional_get(URL, parse_releases) == ["2.2.24", "2.2.25"]
+    assert "If-None-Match" not in get.call_args_list[0][1]["headers"]
+    assert get.call_args_list[1][1]["headers"]["If-None-Match"] == '"abc"'
+    not_modified.json.assert_not_called()
+
+
+def test_last_modified_validator():
+    full = Mock(
+        status_code=200,
+        headers={"Last-Modified": "Wed, 21 Oct 2015 07:28:00 GMT"},
+        json=Mock(return_value={"releases": {"1.0": []}}),
+    )
+    with patch("updater.session.get", side_effect=[full, full]) as get:
+        http_cache.conditional_get(URL, parse_releases, params={"a": "b"})
+        http_cache.conditional_get(URL, parse_releases, params={"a": "b"})
+    assert get.call_args_list[1][0][0] == URL + "?a=b"
+    assert (
+        get.call_args_list[1][1]["headers"]["If-Modified-Since"]
+        == "Wed, 21 Oct 2015 07:28:00 GMT"
+    )
+
+
+def test_response_without_validators_is_not_stored():
+    full = Mock(
+        status_code=200, headers={}, json=Mock(return_value={"releases": {"1.0": []}})
+    )
+    with patch("updater.session.get", return_value=full) as get:
+        http_cache.conditional_get(URL, parse_releases)
+        http_cache.conditional_get(URL, parse_releases)
+    assert get.call_args_list[1][1]["headers"] == {}
+    assert cache.store.get_response(URL) is None
@@ -0,0 +1,116 @@
+import json
+from unittest.mock import patch
+
+from updater import components, local_mirror
+
+
+def write_json(path, body):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(body))
+
+
+def oci_index(*ref_names):
+    return {
+        "schemaVersion": 2,
+        "manifests": [
+            {
+                "mediaType": "application/vnd.oci.image.manifest.v1+json",
+                "digest": f"sha256:{i}",
+                "annotations": {local_mirror.OCI_REF_NAME: ref_name},
+            }
+            for i, ref_name in enumerate(ref_names)
+        ],
+    }
+
+
+def pypi(name, url, fetch_mode="json"):
+    comp = components.factory.get(
+        component_type="pypi", component_name=name, current_version_tag="1.0"
+    )
+    comp.registry_url = url
+    comp.fetch_mode = fetch_mode
+    return comp
+
+
+def docker(name, url, fetch_mode="tags-list", version="3.8.0"):
+    comp = components.factory.get(
+        component_type="docker-image",
+        repo_name="library",
+        component_name=name,
+        current_version_tag=version,
+    )
+    comp.registry_url = url
+    comp.fetch_mode = fetch_mode
+    return comp
+
+
+def test_is_local():
+    assert local_mirror.is_local("file:///srv/mirror")
+    assert not local_mirror.is_local("https://pypi.org")
+    assert not local_mirror.is_local(None)
+
+
+def test_pypi_simple_tree(tmp_path):
+    url = tmp_path.as_uri()
+    write_json(
+        tmp_path / "simple" / "zope-interface" / "index.v1_json",
+        {"files": [{"filename": "zope.interface-5.0.0.tar.gz"}]},
+    )
+    (tmp_path / "simple" / "django").mkdir(parents=True)
+    (tmp_path / "simple" / "django" / "index.html").write_text(
+        '<a href="../../packages/Django-4.0.tar.gz">Django-4.0.tar.gz</a>'
+    )
+
+    with patch("updater.session.request") as request:
+        assert pypi("Zope.Interface", url, "simple").fetch_versions_tags() == ["5.0.0"]
+        assert pypi("Django", url, "simple").fetch_versions_tags() == ["4.0"]
+        assert pypi("missing", url, "simple").fetch_versions_tags() == []
+    request.assert_not_called()
+
+
+def test_pypi_json_files(tmp_path):
+    write_json(
+        tmp_path / "pypi" / "Django" / "json",
+        {"releases": {"3.2": [], "4.0": []}},
+    )
+    comp = pypi("Django", tmp_path.as_uri())
+    assert comp.check()
+    assert comp.next_version_tag == "4.0"
+
+
+def test_oci_layout_per_image(tmp_path):
+    write_json(
+        tmp_path / "library" / "python" / "index.json",
+        oci_index("3.8.0", "3.9.0", "3.9.0-slim"),
+    )
+    comp = docker("python", tmp_path.as_uri())
+    comp.filter = r"/^\d+\.\d+\.\d+$/"
+    assert comp.check()
+    assert comp.next_version_tag == "3.9.0"
+
+
+def test_oci_layout_with_many_images(tmp_path):
+    write_json(
+        tmp_path / "index.json",
+        oci_index(
+            "docker.io/library/python:3.9.0",
+            "docker.io/library/nginx:1.21.0",
+            "localhost:5000/library/python:3.10.0",
+        ),
+    )
+    assert docker("python", tmp_path.as_uri()).fetch_versions_tags() == [
+        "3.9.0",
+        "3.10.0",
+    ]
+    assert docker("redis", tmp_path.as_uri()).fetch_versions_tags() == []
+
+
+def test_oci_layout_digest(tmp_path):
+    write_json(
+        tmp_path / "library" / "python" / "index.json",
+        oci_index("3.8.0", "latest"),
+    )
+    comp = docker("python", tmp_path.as_uri(), "digest", "latest")
+    comp.digest = "sha256:0"
+    assert comp.check()
+    assert comp.next_digest == "sha256:1"
@@ -0,0 +1,65 @@
+from unittest.mock import Mock, patch
+
+from updater import components, pypi_simple
+
+SIMPLE_HTML = """<!DOCTYPE html>
+<html><body>
+<a href="https://files/zope.interface-5.0.0.tar.gz#sha256=1">zope.interface-5.0.0.tar.gz</a>
+<a href="https://files/zope.interface-5.1.0-cp38-cp38-manylinux1_x86_64.whl">
+zope.interface-5.1.0-cp38-cp38-manylinux1_x86_64.whl</a>
+</body></html>
+"""
+
+
+def test_normalize_name():
+    assert pypi_simple.normalize_name("Zope.Interface") == "zope-interface"
+    assert pypi_simple.normalize_name("python__rex") == "python-rex"
+
+
+def test_version_from_filename():
+    assert (
+        pypi_simple.version_from_filename("Django-2.2.24.tar.gz", "Django") == "2.2.24"
+    )
+    assert (
+        pypi_simple.version_from_filename("Django-4.0-py3-none-any.whl", "Django")
+        == "4.0"
+    )
+    assert (
+        pypi_simple.version_from_filename("python-rex-0.4.zip", "python-rex") == "0.4"
+    )
+    assert pypi_simple.version_from_filename("Django-4.0.exe", "Django") is None
+
+
+def test_versions_from_json():
+    body = {
+        "files": [
+            {"filename": "requests-2.20.0.tar.gz"},
+            {"filename": "requests-2.20.0-py2.py3-none-any.whl"},
+            {"filename": "requests-2.20.1.tar.gz"},
+        ]
+    }
+    assert pypi_simple.versions_from_json(body, "requests") == ["2.20.0", "2.20.1"]
+    body["versions"] = ["2.19.0", "2.20.0", "2.20.1"]
+    assert pypi_simple.versions_from_json(body, "requests") == body["versions"]
+
+
+def test_versions_from_html():
+    assert pypi_simple.versions_from_html(SIMPLE_HTML, "zope.interface") == [
+        "5.0.0",
+        "5.1.0",
+    ]
+
+
+def test_fetch_pypi_simple_versions_from_private_index():
+    response = Mock(
+        status_code=200,
+        headers={"Content-Type": pypi_simple.SIMPLE_JSON_MEDIA_TYPE},
+        json=Mock(return_value={"versions": ["1.0", "1.1"], "files": []}),
+    )
+    with patch("updater.session.get", return_value=response) as get:
+        versions = components.fetch_pypi_simple_versions.__wrapped__(
+            "Zope.Interface", "https://pypi.example.com"
+        )
+    assert versions == ["1.0", "1.1"]
+    assert get.call_args[0][0] == "https://pypi.example.com/simple/zope-interface/"
+    assert pypi_simple.SIMPLE_JSON_MEDIA_TYPE in get.call_args[1]["headers"]["Accept"]
@@ -0,0 +1,56 @@
+import time
+from typing import List
+from unittest.mock import Mock
+
+import pytest
+
+from updater.ratelimit import DeadlineExceeded, Scheduler
+
+
+def response(status_code: int, headers=None) -> Mock:
+    return Mock(status_code=status_code, headers=headers or {})
+
+
+def test_throttled_request_is_retried_after_retry_after():
+    sleeps: List[float] = []
+    scheduler = Scheduler(rate=100, burst=100, sleep=sleeps.append)
+    send = Mock(side_effect=[response(429, {"Retry-After": "0"}), response(200)])
+    assert scheduler.request("pypi.org", send).status_code == 200
+    assert send.call_count == 2
+    assert scheduler.bucket("pypi.org").rate == 51
+
+
+def test_retries_are_limited():
+    scheduler = Scheduler(rate=100, burst=100, max_retries=2, sleep=lambda s: None)
+    send = Mock(return_value=response(429, {"Retry-After": "0"}))
+    assert scheduler.request("pypi.org", send).status_code == 429
+    assert send.call_count == 3
+
+
+def test_retry_after_deadline_is_not_waited_for():
+    sleeps: List[float] = []
+    scheduler = Scheduler(rate=100, burst=100, sleep=sleeps.append)
+    send = Mock(return_value=response(429, {"Retry-After": "30"}))
+    with pytest.raises(DeadlineExceeded):
+        scheduler.request("pypi.org", send, deadline=time.monotonic() + 5)
+    assert send.call_count == 1
+    with pytest.raises(DeadlineExceeded):
+        scheduler.request("pypi.org", send, deadline=time.monotonic() + 5)
+    assert send.call_count == 1 and not sleeps
+
+
+def test_bucket_limits_rate():
+    sleeps: List[float] = []
+    scheduler = Scheduler(rate=50, burst=1, sleep=sleeps.append)
+    send = Mock(return_value=response(200))
+    scheduler.request("index.docker.io", send)
+    scheduler.request("index.docker.io", send)
+    assert sleeps and sleeps[0] > 0
+
+
+def test_low_remaining_limit_slows_down():
+    scheduler = Scheduler(rate=10, burst=10, sleep=lambda s: None)
+    send = Mock(return_value=response(200, {"RateLimit-Remaining": "1;w=21600"}))
+    scheduler.request("index.docker.io", send)
+    assert scheduler.bucket("index.docker.io").rate == 5
+    assert scheduler.bucket("pypi.org").rate == 10
@@ -0,0 +1,126 @@
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+import requests
+
+from updater import components, engine, remote, server
+from updater.breaker import CircuitOpenError
+
+
+@pytest.fixture
+def versions_server():
+    with server.VersionsServer(("127.0.0.1", 0)) as s:
+        thread = threading.Thread(target=s.serve_forever)
+        thread.start()
+        remote.configure(f"http://127.0.0.1:{s.server_port}/")
+        yield s
+        remote.configure()
+        s.shutdown()
+        thread.join()
+
+
+def pypi(name="Django", version="2.2.24"):
+    return components.factory.get(
+        component_type="pypi", component_name=name, current_version_tag=version
+    )
+
+
+def test_concurrent_checks_share_one_fetch(versions_server):
+    calls = []
+
+    def fetch(*args, **kwargs):
+        calls.append(args)
+        time.sleep(0.1)
+        return ["2.2.24", "3.2.9"]
+
+    comps = [pypi() for _ in range(5)]
+    with patch("updater.components.fetch_pypi_versions", side_effect=fetch):
+        threads = [threading.Thread(target=comp.check) for comp in comps]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        # answered from memory
+        assert pypi("Django", "3.2.9").check() is False
+    assert len(calls) == 1
+    assert all(comp.next_version_tag == "3.2.9" for comp in comps)
+
+
+def test_errors_are_passed_to_client(versions_server):
+    with patch(
+        "updater.components.fetch_pypi_versions",
+        side_effect=CircuitOpenError("pypi.org"),
+    ):
+        assert engine.check_component(pypi()) is None
+    with patch(
+        "updater.components.fetch_pypi_versions",
+        side_effect=Exception("Could not get versions"),
+    ):
+        with pytest.raises(Exception, match="Could not get versions"):
+            pypi("Flask", "1.0").check()
+
+
+def test_versions_are_fetched_locally_if_server_is_down():
+    remote.configure("http://127.0.0.1:9")
+    try:
+        with patch(
+            "updater.components.fetch_pypi_versions", return_value=["2.2.24", "3.2.9"]
+        ):
+            assert pypi().check()
+    finally:
+        remote.configure()
+
+
+def test_proxy_error_pages_leave_component_unchecked():
+    r = requests.Response()
+    r.status_code = 502
+    r.headers["Content-Type"] = "text/html"
+    r._content = b"<html><body>Bad Gateway</body></html>"
+    r.url = "http://proxy.example/versions"
+    remote.configure("http://proxy.example")
+    try:
+        with patch("updater.session.get_session") as get_session:
+            get_session.return_value.post.return_value = r
+            with pytest.raises(requests.HTTPError, match="502"):
+                remote.versions("Django", pypi().to_dict())
+            assert engine.check_component(pypi()) is None
+            r.status_code = 200
+            with pytest.raises(requests.HTTPError, match="text/html"):
+                remote.versions("Django", pypi().to_dict())
+    finally:
+        remote.configure()
+
+
+def test_only_configured_local_mirrors_are_served(versions_server, tmp_path):
+    mirror = tmp_path / "mirror"
+    comp = pypi()
+    comp.registry_url = (mirror / "pypi").as_uri()
+    with pytest.raises(Exception, match="Not served"):
+        remote.versions(comp.component_name, comp.to_dict())
+    assert not versions_server.is_served(comp)
+    allowed = server.VersionsServer(("127.0.0.1", 0), local_mirrors=[mirror.as_uri()])
+    with allowed:
+        assert allowed.is_served(comp)
+        comp.registry_url = tmp_path.as_uri()
+        assert not allowed.is_served(comp)
+    # clients read local mirrors themselves
+    comp.registry_url = mirror.as_uri()
+    with patch("updater.local_mirror.pypi_versions", return_value=["3.2.9"]):
+        assert comp.check()
+
+
+def test_batched_requests_are_announced_before_resolving(versions_server):
+    comp = components.factory.get(
+        component_type="github-release",
+        component_name="psf/black",
+        current_version_tag="21.12b0",
+    )
+    with patch(
+        "updater.components.GithubReleaseComponent.prepare_check"
+    ) as prepare, patch(
+        "updater.components.fetch_github_versions", return_value=["22.1.0"]
+    ):
+        assert versions_server.resolve(comp) == ["22.1.0"]
+    prepare.assert_called_once_with([comp])
@@ -0,0 +1,68 @@
+import time
+from unittest.mock import Mock, patch
+
+import pytest
+
+from updater import breaker, ratelimit, session
+
+
+@pytest.fixture(autouse=True)
+def default_settings():
+    yield
+    session.configure(5.0, 30.0, None)
+
+
+def test_default_timeouts_are_set():
+    session.configure(connect_timeout=1.0, read_timeout=2.0)
+    fake = Mock(request=Mock(return_value=Mock(status_code=200, headers={})))
+    with patch("updater.session.get_session", return_value=fake):
+        session.get("https://pypi.org/pypi/Django/json")
+    assert fake.request.call_args[1]["timeout"] == (1.0, 2.0)
+
+
+def test_slow_request_is_hedged():
+    session.configure(hedge_after=0.05)
+    slow = Mock(status_code=200, headers={}, name="slow")
+    fast = Mock(status_code=200, headers={}, name="fast")
+    responses = iter([slow, fast])
+
+    def send(method, url, **kwargs):
+        response = next(responses)
+        if response is slow:
+            time.sleep(0.5)
+        return response
+
+    fake = Mock(request=Mock(side_effect=send))
+    with patch("updater.session.get_session", return_value=fake):
+        assert session.get("https://pypi.org/pypi/Django/json") is fast
+    assert fake.request.call_count == 2
+
+
+def test_fast_request_is_not_hedged():
+    session.configure(hedge_after=1.0)
+    fake = Mock(request=Mock(return_value=Mock(status_code=200, headers={})))
+    with patch("updater.session.get_session", return_value=fake):
+        session.get("https://pypi.org/pypi/Django/json")
+    assert fake.request.call_count == 1
+
+
+def test_timeouts_are_capped_by_deadline():
+    fake = Mock(request=Mock(return_value=Mock(status_code=200, headers={})))
+    with patch("updater.session.get_session", return_value=fake):
+        with session.deadline(0.5):
+            session.get("https://pypi.org/pypi/Django/json")
+            connect, read = fake.request.call_args[1]["timeout"]
+            assert 0 < connect <= 0.5 and 0 < read <= 0.5
+        session.get("https://pypi.org/pypi/Django/json")
+    assert fake.request.call_args[1]["timeout"] == (5.0, 30.0)
+
+
+def test_requests_are_not_sent_after_deadline():
+    fake = Mock(request=Mock(return_value=Mock(status_code=200, headers={})))
+    with patch("updater.session.get_session", return_value=fake):
+        with session.deadline(0.01):
+            time.sleep(0.02)
+            with pytest.raises(ratelimit.DeadlineExceeded):
+                session.get("https://pypi.org/pypi/Django/json")
+    fake.request.assert_not_called()
+    assert breaker.breakers.breaker("pypi.org").failures == 0
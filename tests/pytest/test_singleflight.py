@@ -0,0 +1,92 @@
+import threading
+import time
+from unittest.mock import Mock, patch
+
+from updater import components, config_yaml
+from updater.singleflight import FetchCoordinator
+
+
+def test_concurrent_fetches_of_the_same_key_run_once():
+    coordinator = FetchCoordinator()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        time.sleep(0.05)
+        return ["1.0"]
+
+    results = []
+    with coordinator.run():
+        threads = [
+            threading.Thread(target=lambda: results.append(coordinator.do("k", fetch)))
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    assert len(calls) == 1
+    assert results == [["1.0"]] * 5
+
+
+def test_fetches_outside_of_run_are_not_shared():
+    coordinator = FetchCoordinator()
+    fetch = Mock(return_value=["1.0"])
+    coordinator.do("k", fetch)
+    coordinator.do("k", fetch)
+    assert fetch.call_count == 2
+
+
+def test_errors_are_shared_within_run():
+    coordinator = FetchCoordinator()
+    fetch = Mock(side_effect=ValueError("boom"))
+    with coordinator.run():
+        for _ in range(2):
+            try:
+                coordinator.do("k", fetch)
+            except ValueError:
+                pass
+    assert fetch.call_count == 1
+
+
+def test_config_check_fetches_shared_image_once():
+    fetch = Mock(return_value=[["v3.1.0", "v3.2.0"]])
+    config = config_yaml.Config(components_yaml_file=None)
+    for files in (["Dockerfile"], ["Dockerfile-dev"]):
+        config.add(
+            components.factory.get(
+                component_type="docker-image",
+                repo_name="gliderlabs",
+                component_name="logspout",
+                current_version_tag="v3.1.0",
+            )
+        )
+        config.components[-1].files = files
+    config.jobs = 2
+    with patch("updater.components.fetch_docker_images_tags_pages", new=fetch):
+        assert config.check() == [("logspout", True), ("logspout", True)]
+    fetch.assert_called_once_with(
+        "gliderlabs", "logspout", registry_url="https://index.docker.io"
+    )
+
+
+def test_coalesce_shares_only_running_fetches():
+    coordinator = FetchCoordinator()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        time.sleep(0.05)
+        return ["1.0"]
+
+    threads = [
+        threading.Thread(target=lambda: coordinator.coalesce("k", fetch))
+        for _ in range(5)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+    assert coordinator.coalesce("k", fetch) == ["1.0"]
+    assert len(calls) == 2
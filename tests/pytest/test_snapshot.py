@@ -0,0 +1,100 @@
+import gzip
+import json
+from unittest.mock import patch
+
+import pytest
+from click.testing import CliRunner
+
+from check_version import cli
+from updater import components, snapshot
+
+COMPONENTS_YAML = """Django:
+  component-type: pypi
+  current-version: 2.2.0
+python:
+  component-type: docker-image
+  current-version: 3.8.0
+  docker-repo: library
+"""
+
+
+@pytest.fixture(autouse=True)
+def installed_path(tmp_path, monkeypatch):
+    path = tmp_path / "installed" / "snapshot.json.gz"
+    monkeypatch.setattr(snapshot, "INSTALLED_PATH", path)
+    return path
+
+
+def django(version="2.2.0"):
+    return components.factory.get(
+        component_type="pypi", component_name="Django", current_version_tag=version
+    )
+
+
+def test_save_and_load(tmp_path):
+    versions = snapshot.Snapshot()
+    versions.add(django().upstream_key(), ["2.2.0", "3.0.0"])
+    versions.save(tmp_path / "snap.json.gz")
+
+    loaded = snapshot.Snapshot.load(tmp_path / "snap.json.gz")
+    assert loaded.created == versions.created
+    assert loaded.get(django("1.0").upstream_key()) == ["2.2.0", "3.0.0"]
+
+
+def test_load_rejects_other_files(tmp_path):
+    (tmp_path / "other.gz").write_bytes(gzip.compress(b'{"format": "other"}'))
+    with pytest.raises(ValueError):
+        snapshot.Snapshot.load(tmp_path / "other.gz")
+    body = {"format": snapshot.FORMAT, "version": 999, "versions": {}}
+    (tmp_path / "newer.gz").write_bytes(gzip.compress(json.dumps(body).encode()))
+    with pytest.raises(ValueError, match="not supported"):
+        snapshot.Snapshot.load(tmp_path / "newer.gz")
+
+
+def test_installed_snapshot_is_used_instead_of_registry(tmp_path):
+    versions = snapshot.Snapshot()
+    versions.add(django().upstream_key(), ["2.2.0", "3.0.0"])
+    versions.save(tmp_path / "snap.json.gz")
+    snapshot.install(tmp_path / "snap.json.gz")
+
+    comp = django()
+    with patch("updater.components.fetch_pypi_versions") as fetch:
+        assert comp.check()
+    fetch.assert_not_called()
+    assert comp.next_version_tag == "3.0.0"
+
+    snapshot.clear()
+    with patch(
+        "updater.components.fetch_pypi_versions", return_value=["2.2.0"]
+    ) as fetch:
+        assert not django().check()
+    fetch.assert_called_once()
+
+
+def test_export_and_import_commands(tmp_path):
+    def fake_docker(*args, **kwargs):
+        return [["3.8.0", "3.9.0"]]
+
+    def fake_pypi(*args, **kwargs):
+        return ["2.2.0", "3.0.0"]
+
+    runner = CliRunner()
+    with runner.isolated_filesystem():
+        with open("components.yaml", "w") as f:
+            f.write(COMPONENTS_YAML)
+        with patch(
+            "updater.components.fetch_docker_images_tags_pages", side_effect=fake_docker
+        ), patch("updater.components.fetch_pypi_versions", side_effect=fake_pypi):
+            result = runner.invoke(cli, ["snapshot", "export", "snap.json.gz"])
+        assert result.exit_code == 0
+        assert "2 versions lists exported" in result.output
+
+        result = runner.invoke(cli, ["snapshot", "import", "snap.json.gz"])
+        assert result.exit_code == 0
+        assert "2 versions lists imported" in result.output
+
+        with patch("updater.session.request") as request:
+            result = runner.invoke(cli, ["--jobs", "1", "check"])
+        request.assert_not_called()
+        assert result.exit_code == 0
+        assert "2 components to update" in result.output
@@ -0,0 +1,41 @@
+import random
+
+import pytest
+
+from updater import version_array, version_index
+
+pytest.importorskip("numpy")
+
+SUFFIXES = ["", "", "a1", "b2", "rc1", "rc", "alpha", "beta3", "c1", "pre2"]
+SUFFIXES += ["preview", ".post1", "-1", ".dev3", "dev", ".post2.dev1", "a1.dev2"]
+SUFFIXES += ["-r2", "post", "rev3"]
+LEGACY = ["latest", "3.9-alpine", "master", "1.0-slim", "x"]
+
+
+def random_tag(rnd: random.Random) -> str:
+    if rnd.random() < 0.1:
+        return rnd.choice(LEGACY)
+    release = ".".join(
+        str(rnd.choice([0, 0, 1, 2, 3, 10])) for _ in range(rnd.randint(1, 4))
+    )
+    return rnd.choice(["", "", "v", "1!", " "]) + release + rnd.choice(SUFFIXES)
+
+
+def test_same_order_as_packaging():
+    rnd = random.Random(0)
+    for _ in range(300):
+        tags = [random_tag(rnd) for _ in range(rnd.randint(0, 50))]
+        assert version_array.sort_tags(tags) == version_index.sort_parsed_tags(tags)
+
+
+def test_lists_which_can_not_be_encoded():
+    assert version_array.sort_tags(["1.0", "1.0+local.1"]) is None
+    assert version_array.sort_tags(["1.0", str(2**63)]) is None
+    assert version_index.sort_tags(["1.0+local.1", "1.0"]) == ["1.0", "1.0+local.1"]
+
+
+def test_legacy_tags_without_packaging_key(monkeypatch):
+    monkeypatch.setattr(version_array, "_legacy_cmpkey", None)
+    assert version_array.sort_tags(["latest", "1.0"]) is None
+    assert version_array.sort_tags(["2.0", "1.0"]) == ["1.0", "2.0"]
+    assert version_index.sort_tags(["1.0", "latest"]) == ["latest", "1.0"]
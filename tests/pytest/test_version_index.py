@@ -0,0 +1,53 @@
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from updater import cache, components, version_index
+
+
+@pytest.fixture(autouse=True)
+def cache_store(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(cache, "store", cache.Store(tmp_path / "cache.sqlite"))
+
+
+def test_sort_tags():
+    tags = ["1.10.0", "latest", "1.9.2", "1.10", "2.0.0rc1", "1.2"]
+    expected = ["latest", "1.2", "1.9.2", "1.10", "1.10.0", "2.0.0rc1"]
+    assert version_index.sort_tags(tags) == expected
+    assert version_index.sort_parsed_tags(tags) == expected
+
+
+def test_cached_versions_are_stored_sorted():
+    with patch(
+        "updater.http_cache.conditional_get", return_value=["1.0", "3.0", "2.0"]
+    ):
+        tags = components.fetch_pypi_versions("Django")
+    assert tags == ["1.0", "2.0", "3.0"]
+    with patch("updater.version_index.sort_tags", side_effect=AssertionError):
+        tags = components.fetch_pypi_versions("Django")
+        assert isinstance(tags, version_index.SortedTags)
+        assert version_index.sorted_tags(tags) is tags
+    assert tags == ["1.0", "2.0", "3.0"]
+    cache.store.delete(component="Django")
+    with patch("updater.http_cache.conditional_get", return_value=["4.0", "1.0"]):
+        assert components.fetch_pypi_versions("Django") == ["1.0", "4.0"]
+
+
+def test_changed_filter_uses_the_same_versions_and_index():
+    comp = components.factory.get(
+        component_type="pypi", component_name="Django", current_version_tag="2.2.24"
+    )
+    with patch(
+        "updater.http_cache.conditional_get",
+        return_value=["2.2.24", "3.2.9", "4.0rc1", "3.2.10"],
+    ) as fetch:
+        assert comp.check()
+        assert comp.next_version_tag == "4.0rc1"
+        comp.filter = r"/^\d+\.\d+(\.\d+)?$/"
+        with patch("updater.version_index.sort_tags") as sort_tags:
+            assert comp.check()
+        sort_tags.assert_not_called()
+    fetch.assert_called_once()
+    assert comp.next_version_tag == "3.2.10"
+    assert comp.version_tags == ["2.2.24", "3.2.9", "3.2.10"]
@@ -0,0 +1,138 @@
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+import requests
+from loguru import logger
+from requests.models import Response
+
+from updater.ratelimit import DeadlineExceeded
+
+FAILURE_THRESHOLD: int = 3
+COOLDOWN: float = 30.0
+
+
+class CircuitOpenError(Exception):
+    """Registry host failed too many times in a row, request was not sent"""
+
+    def __init__(self, host: str) -> None:
+        super().__init__(f"Registry {host} is unavailable, request not sent")
+        self.host = host
+
+
+class CircuitBreaker:
+    """After `threshold` consecutive failures requests to the host fail fast
+    for `cooldown` seconds, then one probe request is let through: its
+    success closes the circuit, its failure opens it again."""
+
+    def __init__(
+        self,
+        threshold: int = FAILURE_THRESHOLD,
+        cooldown: float = COOLDOWN,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.clock = clock
+        self.failures: int = 0
+        self.opened_at: Optional[float] = None
+        self.probing: bool = False
+        self.lock = threading.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        return self.opened_at is not None
+
+    def allow(self) -> bool:
+        with self.lock:
+            if self.opened_at is None:
+                return True
+            if self.probing or self.clock() - self.opened_at < self.cooldown:
+                return False
+            self.probing = True
+            return True
+
+    def release(self) -> None:
+        """Request let through was not sent, other one can probe the host"""
+        with self.lock:
+            self.probing = False
+
+    def success(self) -> None:
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.probing = False
+
+    def failure(self) -> bool:
+        """Record failure, returns True when it opened the circuit"""
+        with self.lock:
+            self.failures += 1
+            opened = self.probing or (
+                self.opened_at is None and self.failures >= self.threshold
+            )
+            if opened:
+                self.opened_at = self.clock()
+            self.probing = False
+            return opened
+
+
+class Breakers:
+    """Circuit breaker per registry host"""
+
+    def __init__(
+        self,
+        threshold: int = FAILURE_THRESHOLD,
+        cooldown: float = COOLDOWN,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.clock = clock
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def breaker(self, host: str) -> CircuitBreaker:
+        with self._lock:
+            if host not in self._breakers:
+                self._breakers[host] = CircuitBreaker(
+                    self.threshold, self.cooldown, self.clock
+                )
+            return self._breakers[host]
+
+    def request(self, host: str, send: Callable[[], Response]) -> Response:
+        """Send request unless the host circuit is open. Connection errors,
+        timeouts and 5xx responses count as failures, requests not sent
+        because of the deadline do not."""
+        breaker = self.breaker(host)
+        if not breaker.allow():
+            raise CircuitOpenError(host)
+        try:
+            r = send()
+        except DeadlineExceeded:
+            breaker.release()
+            raise
+        except requests.RequestException:
+            self._failure(host, breaker)
+            raise
+        if r.status_code >= 500:
+            self._failure(host, breaker)
+        else:
+            breaker.success()
+        return r
+
+    def _failure(self, host: str, breaker: CircuitBreaker) -> None:
+        if breaker.failure():
+            logger.warning(
+                f"{host} failed {breaker.failures} times, "
+                f"requests paused for {breaker.cooldown}s"
+            )
+
+    def configure(self, threshold: int, cooldown: float = COOLDOWN) -> None:
+        """Change settings for all hosts, the state of hosts is reset"""
+        with self._lock:
+            self.threshold = max(threshold, 1)
+            self.cooldown = cooldown
+            self._breakers.clear()
+
+
+breakers = Breakers()
@@ -0,0 +1,744 @@
+import contextvars
+import datetime
+import functools
+import inspect
+import json
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import (
+    Any,
+    Callable,
+    Counter,
+    Dict,
+    Generic,
+    Iterator,
+    List,
+    NamedTuple,
+    Sequence,
+    Optional,
+    Set,
+    Tuple,
+    TypeVar,
+    cast,
+)
+from urllib.parse import urlparse
+
+import requests
+from loguru import logger
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+CACHE_DIR: Path = Path.home() / ".cache" / "updater"
+CACHE_FILE: Path = CACHE_DIR / "cache.sqlite"
+DEFAULT_TTL: datetime.timedelta = datetime.timedelta(days=3)
+# how long not found packages are remembered
+NEGATIVE_TTL: datetime.timedelta = datetime.timedelta(minutes=10)
+# expired entries younger than ttl + this are returned and refreshed in background
+STALE_WHILE_REVALIDATE: datetime.timedelta = datetime.timedelta(days=1)
+# seconds to wait for other process holding the write lock
+BUSY_TIMEOUT: float = 30.0
+# cache is dropped when stored with other schema version
+SCHEMA_VERSION: int = 4
+# reads update the last access time of an entry at most once in this many
+# seconds, it is used only to prune least recently used ones
+ACCESS_INTERVAL: float = 300.0
+# how many runs are kept for hit ratio in stats
+RUNS_KEPT: int = 100
+# upper bounds of entries age groups shown in stats
+AGE_BUCKETS: List[Tuple[str, datetime.timedelta]] = [
+    ("1h", datetime.timedelta(hours=1)),
+    ("1d", datetime.timedelta(days=1)),
+    ("3d", datetime.timedelta(days=3)),
+    ("1w", datetime.timedelta(weeks=1)),
+]
+
+# kinds of entries
+FOUND: int = 0
+NOT_FOUND: int = 1
+ERROR: int = 2
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    registry TEXT,
+    component TEXT,
+    data BLOB NOT NULL,
+    fetched_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    size INTEGER NOT NULL,
+    kind INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (namespace, key)
+);
+CREATE INDEX IF NOT EXISTS entries_registry ON entries (registry);
+CREATE INDEX IF NOT EXISTS entries_component ON entries (component);
+CREATE TABLE IF NOT EXISTS responses (
+    url TEXT NOT NULL PRIMARY KEY,
+    etag TEXT,
+    last_modified TEXT,
+    data BLOB NOT NULL,
+    fetched_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS runs (
+    finished_at REAL NOT NULL,
+    hits INTEGER NOT NULL,
+    stale INTEGER NOT NULL,
+    negative INTEGER NOT NULL,
+    misses INTEGER NOT NULL
+);
+"""
+
+
+_DURATION = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*([smhdw]?)\s*$")
+_UNITS: Dict[str, str] = {
+    "": "seconds",
+    "s": "seconds",
+    "m": "minutes",
+    "h": "hours",
+    "d": "days",
+    "w": "weeks",
+}
+
+
+def parse_duration(value: str) -> datetime.timedelta:
+    """Duration like 90, 30s, 15m, 1h, 3d or 2w"""
+    match = _DURATION.match(str(value))
+    if not match:
+        raise ValueError(f"Wrong duration: {value}, expected eg. 30m, 1h or 3d")
+    return datetime.timedelta(**{_UNITS[match.group(2)]: float(match.group(1))})
+
+
+_SIZE = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*([KMG]?)i?B?\s*$", re.IGNORECASE)
+_SIZE_UNITS: Dict[str, int] = {"": 1, "K": 2**10, "M": 2**20, "G": 2**30}
+
+
+def parse_size(value: str) -> int:
+    """Size in bytes from value like 500000, 512K, 50M or 1G"""
+    match = _SIZE.match(str(value))
+    if not match:
+        raise ValueError(f"Wrong size: {value}, expected eg. 512K, 50M or 1G")
+    return int(float(match.group(1)) * _SIZE_UNITS[match.group(2).upper()])
+
+
+def registry_host(registry: Optional[str]) -> str:
+    if not registry:
+        return ""
+    return urlparse(registry).netloc or registry
+
+
+def _pack(value: Any) -> bytes:
+    return zlib.compress(json.dumps(value, separators=(",", ":")).encode())
+
+
+def _unpack(blob: bytes) -> Any:
+    return json.loads(zlib.decompress(blob))
+
+
+class Entry(NamedTuple):
+    data: Any
+    fetched_at: float
+    kind: int = FOUND
+
+    def age(self) -> float:
+        return time.time() - self.fetched_at
+
+
+class Response(NamedTuple):
+    etag: Optional[str]
+    last_modified: Optional[str]
+    data: Any
+
+
+class NamespaceStats(NamedTuple):
+    namespace: str
+    entries: int
+    not_found: int
+    errors: int
+    size: int
+
+
+class Stats(NamedTuple):
+    namespaces: List[NamespaceStats]
+    # number of entries younger than each of AGE_BUCKETS and older than all
+    ages: List[Tuple[str, int]]
+    responses: int
+    responses_size: int
+    runs: int
+    hits: int
+    stale: int
+    negative: int
+    misses: int
+
+    @property
+    def size(self) -> int:
+        return sum(n.size for n in self.namespaces) + self.responses_size
+
+    @property
+    def hit_ratio(self) -> Optional[float]:
+        """Part of lookups answered from cache without waiting for a fetch"""
+        lookups = self.hits + self.stale + self.negative + self.misses
+        return (lookups - self.misses) / lookups if lookups else None
+
+
+class Store:
+    """Versions lists and responses with validators in one SQLite database.
+
+    WAL journal lets many processes read while one writes, each row is one
+    entry so a write never rewrites the other entries. Values are stored
+    as zlib compressed json."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._local = threading.local()
+
+    def _connect(self) -> sqlite3.Connection:
+        # sqlite connections can not be shared between threads
+        conn: Optional[sqlite3.Connection] = getattr(self._local, "conn", None)
+        if conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(
+                str(self.path), timeout=BUSY_TIMEOUT, isolation_level=None
+            )
+            conn.create_function("registry_host", 1, registry_host)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            with conn:
+                # one connection at a time checks the version and creates
+                # tables, so a new database is not dropped by another one
+                conn.execute("BEGIN IMMEDIATE")
+                version = conn.execute("PRAGMA user_version").fetchone()[0]
+                if version != SCHEMA_VERSION:
+                    # cache of an other version is just dropped
+                    for table in ("entries", "responses", "runs"):
+                        conn.execute(f"DROP TABLE IF EXISTS {table}")
+                    conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+                for statement in _SCHEMA.split(";"):
+                    if statement.strip():
+                        conn.execute(statement)
+            self._local.conn = conn
+        return conn
+
+    def get(self, namespace: str, key: str) -> Optional[Entry]:
+        conn = self._connect()
+        row = conn.execute(
+            "SELECT data, fetched_at, kind, accessed_at FROM entries"
+            " WHERE namespace = ? AND key = ?",
+            (namespace, key),
+        ).fetchone()
+        if row is None:
+            return None
+        now = time.time()
+        if now - row[3] >= ACCESS_INTERVAL:
+            conn.execute(
+                "UPDATE entries SET accessed_at = ? WHERE namespace = ? AND key = ?",
+                (now, namespace, key),
+            )
+        return Entry(_unpack(row[0]), row[1], row[2])
+
+    def put(
+        self,
+        namespace: str,
+        key: str,
+        data: Any,
+        registry: Optional[str] = None,
+        component: Optional[str] = None,
+        kind: int = FOUND,
+    ) -> None:
+        blob = _pack(data)
+        now = time.time()
+        self._connect().execute(
+            "INSERT OR REPLACE INTO entries (namespace, key, registry, component,"
+            " data, fetched_at, accessed_at, size, kind)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (namespace, key, registry, component, blob, now, now, len(blob), kind),
+        )
+
+    def delete(
+        self,
+        namespace: Optional[str] = None,
+        component: Optional[str] = None,
+        registry: Optional[str] = None,
+        namespaces: Optional[Sequence[str]] = None,
+    ) -> int:
+        """Delete entries matching all given filters, registry is matched
+        by its host so both pypi.org and https://pypi.org can be given"""
+        where: List[str] = []
+        params: List[Any] = []
+        if namespace is not None:
+            namespaces = [namespace]
+        if namespaces is not None:
+            where.append(f"namespace IN ({', '.join('?' * len(namespaces))})")
+            params.extend(namespaces)
+        if component is not None:
+            where.append("component = ?")
+            params.append(component)
+        if registry is not None:
+            where.append("registry_host(registry) = ?")
+            params.append(registry_host(registry))
+        sql = "DELETE FROM entries"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        return self._connect().execute(sql, params).rowcount
+
+    def get_response(self, url: str) -> Optional[Response]:
+        conn = self._connect()
+        row = conn.execute(
+            "SELECT etag, last_modified, data, accessed_at FROM responses"
+            " WHERE url = ?",
+            (url,),
+        ).fetchone()
+        if row is None:
+            return None
+        now = time.time()
+        if now - row[3] >= ACCESS_INTERVAL:
+            conn.execute(
+                "UPDATE responses SET accessed_at = ? WHERE url = ?", (now, url)
+            )
+        return Response(row[0], row[1], _unpack(row[2]))
+
+    def put_response(
+        self, url: str, etag: Optional[str], last_modified: Optional[str], data: Any
+    ) -> None:
+        blob = _pack(data)
+        now = time.time()
+        self._connect().execute(
+            "INSERT OR REPLACE INTO responses (url, etag, last_modified, data,"
+            " fetched_at, accessed_at, size) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (url, etag, last_modified, blob, now, now, len(blob)),
+        )
+
+    def delete_responses(self, registry: Optional[str] = None) -> int:
+        if registry is None:
+            return self._connect().execute("DELETE FROM responses").rowcount
+        return (
+            self._connect()
+            .execute(
+                "DELETE FROM responses WHERE registry_host(url) = ?",
+                (registry_host(registry),),
+            )
+            .rowcount
+        )
+
+    def prune(self, max_size: int) -> int:
+        """Delete least recently used entries and responses until all of
+        them take at most max_size bytes, return number of deleted rows"""
+        conn = self._connect()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            total = conn.execute(
+                "SELECT (SELECT COALESCE(SUM(size), 0) FROM entries)"
+                " + (SELECT COALESCE(SUM(size), 0) FROM responses)"
+            ).fetchone()[0]
+            excess = total - max_size
+            if excess <= 0:
+                return 0
+            evicted: Dict[str, List[int]] = {"entries": [], "responses": []}
+            for table, rowid, size, _ in conn.execute(
+                "SELECT 'entries', rowid, size, accessed_at FROM entries"
+                " UNION ALL SELECT 'responses', rowid, size, accessed_at FROM responses"
+                " ORDER BY accessed_at"
+            ).fetchall():
+                if excess <= 0:
+                    break
+                evicted[table].append(rowid)
+                excess -= size
+            for table, rowids in evicted.items():
+                conn.executemany(
+                    f"DELETE FROM {table} WHERE rowid = ?", [(r,) for r in rowids]
+                )
+        return sum(len(rowids) for rowids in evicted.values())
+
+    def add_run(self, hits: int, stale: int, negative: int, misses: int) -> None:
+        conn = self._connect()
+        conn.execute(
+            "INSERT INTO runs (finished_at, hits, stale, negative, misses)"
+            " VALUES (?, ?, ?, ?, ?)",
+            (time.time(), hits, stale, negative, misses),
+        )
+        conn.execute(
+            "DELETE FROM runs WHERE rowid NOT IN"
+            " (SELECT rowid FROM runs ORDER BY finished_at DESC LIMIT ?)",
+            (RUNS_KEPT,),
+        )
+
+    def stats(self, runs: int = 10) -> Stats:
+        """Entries by namespace, their ages and lookups in the last runs"""
+        conn = self._connect()
+        namespaces = [
+            NamespaceStats(*row)
+            for row in conn.execute(
+                f"SELECT namespace, COUNT(*), SUM(kind = {NOT_FOUND}),"
+                f" SUM(kind = {ERROR}), SUM(size) FROM entries"
+                " GROUP BY namespace ORDER BY namespace"
+            )
+        ]
+        now = time.time()
+        ages: List[Tuple[str, int]] = []
+        younger = 0
+        previous = ""
+        for label, bound in AGE_BUCKETS:
+            count = conn.execute(
+                "SELECT COUNT(*) FROM entries WHERE fetched_at > ?",
+                (now - bound.total_seconds(),),
+            ).fetchone()[0]
+            ages.append(
+                (f"{previous} - {label}" if previous else f"< {label}", count - younger)
+            )
+            younger, previous = count, label
+        total = sum(n.entries for n in namespaces)
+        ages.append((f">= {AGE_BUCKETS[-1][0]}", total - younger))
+        responses, responses_size = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()
+        run_row = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(hits), 0), COALESCE(SUM(stale), 0),"
+            " COALESCE(SUM(negative), 0), COALESCE(SUM(misses), 0) FROM"
+            " (SELECT * FROM runs ORDER BY finished_at DESC LIMIT ?)",
+            (runs,),
+        ).fetchone()
+        return Stats(namespaces, ages, responses, responses_size, *run_row)
+
+    def close(self) -> None:
+        conn: Optional[sqlite3.Connection] = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+store = Store(CACHE_FILE)
+
+
+class CachePolicy:
+    """How long cached versions are used: TTLs given on the command line for
+    the registry host or for all of them, then cache-ttl of the component
+    and registry-ttl from components.yaml, and the default one"""
+
+    def __init__(
+        self,
+        ttl: Optional[datetime.timedelta] = None,
+        registry_ttls: Optional[Dict[str, datetime.timedelta]] = None,
+        negative_ttl: datetime.timedelta = NEGATIVE_TTL,
+        stale_while_revalidate: datetime.timedelta = STALE_WHILE_REVALIDATE,
+        max_size: Optional[int] = None,
+    ) -> None:
+        # given on the command line, they override components.yaml
+        self.ttl = ttl
+        self.registry_ttls: Dict[str, datetime.timedelta] = registry_ttls or {}
+        # registry-ttl of components from components.yaml, by registry host
+        self.config_registry_ttls: Dict[str, datetime.timedelta] = {}
+        self.negative_ttl = negative_ttl
+        self.stale_while_revalidate = stale_while_revalidate
+        # cache is pruned to this many bytes after each run
+        self.max_size = max_size
+        # entries expiring within this time are fetched again, set when warming
+        self.refresh_ahead: Optional[datetime.timedelta] = None
+        self._local = threading.local()
+
+    def ttl_for(self, registry: Optional[str]) -> datetime.timedelta:
+        host = registry_host(registry)
+        if host in self.registry_ttls:
+            return self.registry_ttls[host]
+        if self.ttl is not None:
+            return self.ttl
+        component_ttl: Optional[datetime.timedelta] = getattr(self._local, "ttl", None)
+        if component_ttl is not None:
+            return component_ttl
+        return self.config_registry_ttls.get(host, DEFAULT_TTL)
+
+    @contextmanager
+    def component_ttl(self, ttl: Optional[datetime.timedelta]) -> Iterator[None]:
+        """TTL used for fetches made in this thread within the context"""
+        previous = getattr(self._local, "ttl", None)
+        self._local.ttl = ttl
+        try:
+            yield
+        finally:
+            self._local.ttl = previous
+
+    @contextmanager
+    def refreshing_ahead(self, window: datetime.timedelta) -> Iterator[None]:
+        """Within the context entries expiring in `window` are fetched again,
+        instead of being returned, in all threads"""
+        previous, self.refresh_ahead = self.refresh_ahead, window
+        try:
+            yield
+        finally:
+            self.refresh_ahead = previous
+
+
+policy = CachePolicy()
+
+
+def configure(
+    ttl: Optional[datetime.timedelta] = None,
+    registry_ttls: Optional[Dict[str, datetime.timedelta]] = None,
+    negative_ttl: Optional[datetime.timedelta] = None,
+    stale_while_revalidate: Optional[datetime.timedelta] = None,
+    max_size: Optional[int] = None,
+) -> None:
+    """Set the policy, not given values are set back to defaults"""
+    policy.ttl = ttl
+    policy.registry_ttls = registry_ttls or {}
+    policy.config_registry_ttls = {}
+    policy.negative_ttl = NEGATIVE_TTL if negative_ttl is None else negative_ttl
+    policy.stale_while_revalidate = (
+        STALE_WHILE_REVALIDATE
+        if stale_while_revalidate is None
+        else stale_while_revalidate
+    )
+    policy.max_size = max_size
+
+
+# lookups of the current run: hits, stale, negative and misses
+_lookups: Counter[str] = Counter()
+_lookups_lock = threading.Lock()
+
+
+def _count(lookup: str) -> None:
+    with _lookups_lock:
+        _lookups[lookup] += 1
+
+
+def finish_run(record_lookups: bool = True) -> None:
+    """Record lookups of the run for stats and prune the cache to max size"""
+    with _lookups_lock:
+        lookups = dict(_lookups)
+        _lookups.clear()
+    if lookups and record_lookups:
+        store.add_run(
+            lookups.get("hits", 0),
+            lookups.get("stale", 0),
+            lookups.get("negative", 0),
+            lookups.get("misses", 0),
+        )
+    if policy.max_size is not None:
+        count = store.prune(policy.max_size)
+        if count:
+            logger.info(f"{count} least recently used cache entries removed")
+
+
+# statuses telling the package does not exist, not that the registry failed
+NOT_FOUND_STATUSES: Tuple[int, ...] = (404, 410)
+
+
+class CachedFetchError(Exception):
+    """Fetch failed recently, it is not repeated until negative TTL passes"""
+
+
+def is_not_found(error: Exception) -> bool:
+    """Error is a definitive answer of the registry, timeouts, refused
+    connections, server errors and open circuits may pass on the next try"""
+    response = getattr(error, "response", None)
+    return (
+        isinstance(error, requests.HTTPError)
+        and response is not None
+        and response.status_code in NOT_FOUND_STATUSES
+    )
+
+
+_refresh_executor: Optional[ThreadPoolExecutor] = None
+_refreshing: Set[Tuple[str, str]] = set()
+_refresh_lock = threading.Lock()
+
+
+def _refresh_in_background(
+    namespace: str, key: str, refresh: Callable[[], Any]
+) -> None:
+    global _refresh_executor
+
+    def run() -> None:
+        try:
+            refresh()
+        except Exception as e:
+            logger.warning(f"Refresh of {namespace} {key} failed: {e}")
+        finally:
+            with _refresh_lock:
+                _refreshing.discard((namespace, key))
+
+    with _refresh_lock:
+        if (namespace, key) in _refreshing:
+            return
+        _refreshing.add((namespace, key))
+        if _refresh_executor is None:
+            _refresh_executor = ThreadPoolExecutor(thread_name_prefix="refresh")
+        # refreshed within the deadline of the run it was found stale in
+        _refresh_executor.submit(contextvars.copy_context().run, run)
+
+
+def wait_for_refresh() -> None:
+    """Wait for background refreshes started so far"""
+    global _refresh_executor
+    with _refresh_lock:
+        executor, _refresh_executor = _refresh_executor, None
+    if executor is not None:
+        executor.shutdown(wait=True)
+
+
+class CachedFunction(Generic[F]):
+    """Type of functions decorated with cached(), called as the decorated
+    function, entries of its namespace are removed with clear_cache(),
+    is_fresh() tells if the entry for the arguments is used without fetching"""
+
+    __call__: F
+
+    def clear_cache(self) -> None:
+        raise NotImplementedError
+
+    def is_fresh(self, *args: Any, **kwargs: Any) -> bool:
+        raise NotImplementedError
+
+
+def cached(
+    namespace: str,
+    registry_arg: Optional[str] = None,
+    component_arg: Optional[str] = "component_name",
+    default_registry: Optional[str] = None,
+    prepare: Optional[Callable[[Any], Any]] = None,
+    restore: Optional[Callable[[Any], Any]] = None,
+) -> Callable[[F], CachedFunction[F]]:
+    """Cache function results in the store for TTL given by the policy.
+
+    Stale results are returned at once and refreshed in background, empty
+    results and not found errors are cached for the negative TTL, other
+    errors are not cached. Arguments named
+    `registry_arg` and `component_arg` are kept in their own columns,
+    so entries can be found by registry and component. Results of generator
+    functions are cached the same way, as lists. Fetched results are
+    passed through `prepare` before they are stored, results read from
+    the store through `restore`."""
+
+    def decorator(fetch: F) -> CachedFunction[F]:
+        signature = inspect.signature(fetch)
+        # generator functions yield pages of a list, the pages are yielded
+        # as they are fetched and stored together after the last one
+        paged = inspect.isgeneratorfunction(fetch)
+
+        def locate(
+            args: Tuple[Any, ...], kwargs: Dict[str, Any]
+        ) -> Tuple[str, Optional[str], Optional[str]]:
+            """Key, registry and component of the entry for the arguments"""
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            key = json.dumps(list(bound.arguments.values()), separators=(",", ":"))
+            registry = (
+                bound.arguments.get(registry_arg) if registry_arg else None
+            ) or default_registry
+            component = bound.arguments.get(component_arg) if component_arg else None
+            return key, registry, component
+
+        @functools.wraps(fetch)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            key, registry, component = locate(args, kwargs)
+            ttl = policy.ttl_for(registry).total_seconds()
+
+            entry = store.get(namespace, key)
+            if entry is not None and entry.kind == FOUND and restore is not None:
+                entry = entry._replace(data=restore(entry.data))
+            previous = entry if entry is not None and entry.kind == FOUND else None
+
+            def failed(e: Exception) -> Any:
+                if previous is not None:
+                    # expired versions are better than none
+                    logger.warning(f"{namespace} {key} - using expired: {e}")
+                    return previous.data
+                if is_not_found(e):
+                    store.put(namespace, key, str(e), registry, component, kind=ERROR)
+                raise e
+
+            def stored(data: Any) -> Any:
+                if prepare is not None:
+                    data = prepare(data)
+                kind = FOUND if data else NOT_FOUND
+                store.put(namespace, key, data, registry, component, kind=kind)
+                return data
+
+            def fetch_and_store_pages() -> Iterator[Any]:
+                data: List[Any] = []
+                pages = 0
+                try:
+                    for page in fetch(*args, **kwargs):
+                        data.extend(page)
+                        pages += 1
+                        yield page
+                except Exception as e:
+                    if pages and previous is not None:
+                        # pages already yielded can not be replaced by expired ones
+                        raise
+                    yield failed(e)
+                    return
+                stored(data)
+
+            def fetch_and_store() -> Any:
+                if paged:
+                    return fetch_and_store_pages()
+                try:
+                    data = fetch(*args, **kwargs)
+                except Exception as e:
+                    return failed(e)
+                return stored(data)
+
+            def found(data: Any) -> Any:
+                # stored result of a generator function is given as one page
+                return iter([data]) if paged else data
+
+            def refresh() -> None:
+                data = fetch_and_store()
+                if paged:
+                    # pages are stored once all of them are fetched
+                    for _ in data:
+                        pass
+
+            if entry is None:
+                _count("misses")
+                return fetch_and_store()
+            age = entry.age()
+            if entry.kind != FOUND:
+                if age >= policy.negative_ttl.total_seconds():
+                    _count("misses")
+                    return fetch_and_store()
+                _count("negative")
+                if entry.kind == ERROR:
+                    raise CachedFetchError(entry.data)
+                return found(entry.data)
+            refresh_ahead = policy.refresh_ahead
+            if refresh_ahead and age >= ttl - refresh_ahead.total_seconds():
+                # when warming, entries close to expiry are fetched again too
+                _count("misses")
+                return fetch_and_store()
+            if age < ttl:
+                _count("hits")
+                return found(entry.data)
+            if age < ttl + policy.stale_while_revalidate.total_seconds():
+                logger.info(f"{namespace} {key} - STALE, refreshing in background")
+                _count("stale")
+                _refresh_in_background(namespace, key, refresh)
+                return found(entry.data)
+            _count("misses")
+            return fetch_and_store()
+
+        def clear_cache() -> None:
+            count = store.delete(namespace)
+            logger.info(f"{count} {namespace} entries removed from cache")
+
+        def is_fresh(*args: Any, **kwargs: Any) -> bool:
+            key, registry, _ = locate(args, kwargs)
+            entry = store.get(namespace, key)
+            if entry is None:
+                return False
+            if entry.kind != FOUND:
+                return entry.age() < policy.negative_ttl.total_seconds()
+            return entry.age() < policy.ttl_for(registry).total_seconds()
+
+        wrapper.clear_cache = clear_cache  # type: ignore[attr-defined]
+        wrapper.is_fresh = is_fresh  # type: ignore[attr-defined]
+        return cast(CachedFunction[F], wrapper)
+
+    return decorator
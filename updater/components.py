@@ -1,16 +1,42 @@
-import datetime
 import typing
 from abc import ABCMeta, abstractmethod
 from enum import Enum
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Union
+from typing import (
+    IO,
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+    cast,
+)
+from urllib.parse import urljoin, urlparse
 
 import requests
-from cachier import cachier  # type: ignore
 from loguru import logger
 from packaging.version import LegacyVersion, Version, parse
 from requests.models import Response
-from rex import rex  # type: ignore
+
+from updater import (
+    cache,
+    docker_auth,
+    filters,
+    github_graphql,
+    go_proxy,
+    helm_index,
+    http_cache,
+    local_mirror,
+    pypi_simple,
+    remote,
+    session,
+    singleflight,
+    snapshot,
+    version_index,
+)
 
 TVer = Union[LegacyVersion, Version]
 TVerList = List[TVer]
@@ -23,9 +49,38 @@ TDictComponent = Dict[
 ]
 
 
+class NoVersionsError(ValueError):
+    """Registry returned no versions matching the filter of a component"""
+
+
 class ComponentType(Enum):
     DOCKER = "docker-image"
     PYPI = "pypi"
+    NPM = "npm"
+    HELM = "helm-chart"
+    GITHUB = "github-release"
+    GO = "go-module"
+
+
+class FetchMode(Enum):
+    DOCKER_TAGS_LIST = "tags-list"
+    DOCKER_HUB_RECENT = "hub-recent"
+    DOCKER_DIGEST = "digest"
+    PYPI_JSON = "json"
+    PYPI_SIMPLE = "simple"
+    NPM_ABBREVIATED = "abbreviated"
+    HELM_INDEX = "index"
+    GITHUB_RELEASES = "releases"
+    GITHUB_TAGS = "tags"
+    GO_LIST = "list"
+
+
+def _join_pages(pages: Iterable[List[str]]) -> List[str]:
+    all_pages = list(pages)
+    # one page is returned as it is, it may be a sorted cached list
+    if len(all_pages) == 1:
+        return all_pages[0]
+    return [tag for page in all_pages for tag in page]
 
 
 class Component(metaclass=ABCMeta):
@@ -34,9 +89,11 @@ class Component(metaclass=ABCMeta):
     DEFAULT_FILES: TFileNameList = []
     DEFAULT_EXLUDE_VERSIONS: List[str] = []
     DEFAULT_REPO: Optional[str] = None
+    DEFAULT_REGISTRY_URL: Optional[str] = None
     LATEST_TAGS: List[str] = ["latest"]
     DEFAULT_VERSION_PATTERN: str = "{version}"
     DEFAULT_FILES_VERSION_PATTERN: TListVersionPattern = None
+    DEFAULT_FETCH_MODE: Optional[str] = None
 
     def __init__(
         self,
@@ -57,35 +114,131 @@ class Component(metaclass=ABCMeta):
         self.exclude_versions: List[str] = self.DEFAULT_EXLUDE_VERSIONS
         self.version_pattern = self.DEFAULT_VERSION_PATTERN
         self.files_version_pattern = self.DEFAULT_FILES_VERSION_PATTERN
+        self.registry_url: Optional[str] = self.DEFAULT_REGISTRY_URL
+        self.fetch_mode: Optional[str] = self.DEFAULT_FETCH_MODE
+        # content digest of the current version, for floating tags like latest
+        self.digest: Optional[str] = None
+        self.next_digest: Optional[str] = None
+        # how long fetched versions are cached eg. 1h, default from registry
+        self.cache_ttl: Optional[str] = None
+        # cache TTL of all components from the registry of this one
+        self.registry_ttl: Optional[str] = None
         super().__init__()
 
     def __repr__(self) -> str:
         return f"{self.component_type.value} {self.component_name} {self.current_version_tag}"  # pragma: no cover
 
+    @property
+    def registry_host(self) -> str:
+        """Host the versions are fetched from, used to limit concurrent requests"""
+        return urlparse(self.registry_url).netloc if self.registry_url else ""
+
     def newer_version_exists(self) -> bool:
         if self.current_version_tag in self.LATEST_TAGS:
             return False
         else:
             return self.next_version > self.current_version
 
+    @classmethod
+    def prepare_check(cls, components: List["Component"]) -> None:
+        """Called once before components of this type are checked,
+        allows to batch requests needed by many of them"""
+        pass
+
+    @classmethod
+    def finish_check(cls, components: List["Component"]) -> None:
+        """Called once after components of this type are checked, drops
+        what prepare_check() has fetched for them and was not used"""
+        pass
+
     @abstractmethod
     def fetch_versions_tags(self) -> List[str]:
         """should return a list of versions eg.: ('1.0.1', '2.0.2')"""
         pass  # pragma: no cover
 
+    def upstream_key(self) -> Tuple[Optional[str], ...]:
+        """Components with the same key share the same upstream versions list"""
+        return (
+            self.component_type.value,
+            self.fetch_mode,
+            self.registry_url,
+            self.component_name,
+        )
+
+    def fetch_versions_tags_pages(self) -> Iterator[List[str]]:
+        """yield lists of versions as they are fetched, by default all of them
+        in one page"""
+        yield self.fetch_versions_tags()
+
+    def resolve_versions_tags(self) -> List[str]:
+        """All versions from iter_versions_tags_pages()"""
+        return _join_pages(self.iter_versions_tags_pages())
+
+    def fetch_cached_versions_tags(self) -> List[str]:
+        """fetch_versions_tags() using cache-ttl of this component if it is set"""
+        return _join_pages(self.fetch_cached_versions_tags_pages())
+
+    def fetch_cached_versions_tags_pages(self) -> Iterator[List[str]]:
+        """fetch_versions_tags_pages() using cache-ttl of this component"""
+        ttl = cache.parse_duration(self.cache_ttl) if self.cache_ttl else None
+        with cache.policy.component_ttl(ttl):
+            yield from self.fetch_versions_tags_pages()
+
+    def iter_versions_tags_pages(self) -> Iterator[List[str]]:
+        """Pages of versions fetched once per run for all components sharing
+        them, taken from imported snapshot without fetching or from the server
+        when one is configured and the registry is not a local mirror"""
+        key = self.upstream_key()
+        tags = snapshot.lookup(key)
+        # local mirrors are read here, the server may not have them
+        if (
+            tags is None
+            and remote.url is not None
+            and not local_mirror.is_local(self.registry_url)
+        ):
+            tags = remote.versions(self.component_name, self.to_dict())
+            if tags is not None:
+                snapshot.record(key, tags)
+        if tags is not None:
+            yield tags
+            return
+        # raw tags are kept only for a snapshot being recorded
+        recording = snapshot.is_recording()
+        fetched: List[str] = []
+        for page in singleflight.coordinator.stream(
+            key, self.fetch_cached_versions_tags_pages
+        ):
+            if recording:
+                fetched.extend(page)
+            yield page
+        snapshot.record(key, fetched)
+
+    def select_next_version(self, pages: Iterable[List[str]]) -> None:
+        """Find max version in pages of tags, keeps only tags matching filter
+        of each page. A cached versions list is stored sorted and selected in
+        its order, candidates from other pages are sorted, so the max version
+        is the last candidate and only it is parsed."""
+        tag_filter = filters.get(self.filter, tuple(self.exclude_versions))
+        candidates: List[str] = []
+        presorted: Optional[bool] = None
+        for page in pages:
+            # true only for a single sorted page
+            presorted = presorted is None and isinstance(page, version_index.SortedTags)
+            candidates.extend(tag_filter.select(page))
+        if not presorted:
+            candidates = version_index.sort_tags(candidates)
+        if not candidates:
+            raise NoVersionsError(
+                f"No versions matching filter {self.filter} for {self.component_name}"
+            )
+        self.version_tags = candidates
+        self.next_version = parse(candidates[-1])
+        self.next_version_tag = f"{(self.prefix or '')}{str(self.next_version)}"
+
     def check(self) -> bool:
         """Check if there is newer version available for this component"""
         if self.current_version_tag not in self.LATEST_TAGS:
-            self.version_tags = self.fetch_versions_tags()
-
-            self.next_version = max(
-                [
-                    parse(tag)
-                    for tag in self.version_tags
-                    if (tag == rex(self.filter)) and tag not in self.exclude_versions
-                ]
-            )
-            self.next_version_tag = f"{(self.prefix or '')}{str(self.next_version)}"
+            self.select_next_version(self.iter_versions_tags_pages())
 
         return self.newer_version_exists()
 
@@ -108,12 +261,21 @@ class Component(metaclass=ABCMeta):
             ret["version-pattern"] = self.version_pattern
         if self.files_version_pattern != self.DEFAULT_FILES_VERSION_PATTERN:
             ret["files-version-pattern"] = self.files_version_pattern
+        if self.fetch_mode != self.DEFAULT_FETCH_MODE:
+            ret["fetch-mode"] = self.fetch_mode
+        if self.registry_url != self.DEFAULT_REGISTRY_URL:
+            ret["registry-url"] = self.registry_url
+        if self.digest is not None:
+            ret["digest"] = self.digest
+        if self.next_digest is not None:
+            ret["next-digest"] = self.next_digest
+        if self.cache_ttl is not None:
+            ret["cache-ttl"] = self.cache_ttl
+        if self.registry_ttl is not None:
+            ret["registry-ttl"] = self.registry_ttl
         return ret
 
-    def name_version_tag(
-        self, version_tag: str, file_name: Optional[str] = None
-    ) -> str:
-        d: Dict[str, str] = {"version": version_tag, "component": self.component_name}
+    def file_version_pattern(self, file_name: Optional[str] = None) -> str:
         file_pattern = (
             next(
                 x["pattern"]
@@ -123,26 +285,54 @@ class Component(metaclass=ABCMeta):
             if self.files_version_pattern and file_name
             else None
         )
-        if not file_pattern:
-            return self.version_pattern.format(**d)
-        else:
-            return file_pattern.format(**d)
+        return file_pattern or self.version_pattern
+
+    def name_version_tag(
+        self,
+        version_tag: str,
+        file_name: Optional[str] = None,
+        digest: Optional[str] = None,
+    ) -> str:
+        d: Dict[str, str] = {
+            "version": version_tag,
+            "component": self.component_name,
+            "digest": digest or "",
+        }
+        return self.file_version_pattern(file_name).format(**d)
 
     def count_occurence(self, string_to_search: str, file_name: str) -> int:
         return string_to_search.count(
-            self.name_version_tag(self.current_version_tag, file_name)
+            self.name_version_tag(self.current_version_tag, file_name, self.digest)
         )
 
     def replace(self, string_to_replace: str, file_name: str) -> str:
-        ver_tag_current = self.name_version_tag(self.current_version_tag, file_name)
-        ver_tag_next = self.name_version_tag(self.next_version_tag, file_name)
+        ver_tag_current = self.name_version_tag(
+            self.current_version_tag, file_name, self.digest
+        )
+        ver_tag_next = self.name_version_tag(
+            self.next_version_tag, file_name, self.next_digest
+        )
         return string_to_replace.replace(ver_tag_current, ver_tag_next)
 
+    def files_to_update(self) -> TFileNameList:
+        """When only digest has changed, files without {digest} in the version
+        pattern have nothing to replace"""
+        if (
+            self.next_version_tag != self.current_version_tag
+            or self.next_digest == self.digest
+        ):
+            return self.files
+        return [
+            file_name
+            for file_name in self.files
+            if "{digest}" in self.file_version_pattern(file_name)
+        ]
+
     def update_files(self, base_dir: Optional[Path], dry_run: bool = False) -> int:
         counter: int = 0
         if base_dir is None:
             raise FileNotFoundError("base_dir is None")
-        for file_name in self.files:
+        for file_name in self.files_to_update():
             file = Path(base_dir / file_name)
             orig_content: str = file.read_text()
             if self.count_occurence(orig_content, file_name) > 1:
@@ -181,49 +371,272 @@ class Component(metaclass=ABCMeta):
         }
 
 
+# cache namespaces with versions of components of each type
+CACHE_NAMESPACES: Dict[ComponentType, List[str]] = {
+    ComponentType.DOCKER: ["docker-tags", "docker-hub-recent"],
+    ComponentType.PYPI: ["pypi-json", "pypi-simple"],
+    ComponentType.NPM: ["npm"],
+    ComponentType.HELM: ["helm-index"],
+    ComponentType.GITHUB: ["github"],
+    ComponentType.GO: ["go-module"],
+}
+
+
+def invalidate_versions_cache(
+    component_type: Optional[str] = None,
+    component: Optional[str] = None,
+    registry: Optional[str] = None,
+) -> int:
+    """Remove cached versions of components matching all given filters.
+    Helm charts share one index per registry, so they are removed only by
+    type or registry. Returns number of removed entries."""
+    namespaces = (
+        CACHE_NAMESPACES[ComponentType(component_type)] if component_type else None
+    )
+    count = cache.store.delete(
+        component=component, registry=registry, namespaces=namespaces
+    )
+    if registry is not None:
+        # otherwise stored responses would be revalidated and used again
+        http_cache.clear(registry)
+    if component_type in (None, ComponentType.GITHUB.value):
+        github_graphql.clear_batches()
+    return count
+
+
 def clear_versions_cache() -> None:
-    fetch_docker_images_versions.clear_cache()
+    fetch_docker_images_tags_pages.clear_cache()
+    fetch_docker_hub_recent_tags.clear_cache()
     fetch_pypi_versions.clear_cache()
+    fetch_pypi_simple_versions.clear_cache()
+    fetch_npm_versions.clear_cache()
+    fetch_helm_index_versions.clear_cache()
+    fetch_github_versions.clear_cache()
+    fetch_go_module_versions.clear_cache()
+    github_graphql.clear_batches()
+    http_cache.clear()
+
+
+def _docker_registry_url(registry_url: Optional[str]) -> str:
+    return (registry_url or str(DockerImageComponent.DEFAULT_REGISTRY_URL)).rstrip("/")
+
+
+def iter_docker_images_tags_pages(
+    repo_name: str,
+    component_name: str,
+    token_url: Optional[str] = None,
+    page_size: Optional[int] = None,
+    registry_url: Optional[str] = None,
+) -> Iterator[List[str]]:
+    """Yield pages of tags from registry tags/list, following the Link header.
+    Tokens are taken from the token service the registry points to."""
+    registry = _docker_registry_url(registry_url)
+    scope = docker_auth.pull_scope(repo_name, component_name)
+    url: Optional[str] = f"{registry}/v2/{repo_name}/{component_name}/tags/list"
+    params: Optional[Dict[str, int]] = {
+        "n": page_size or DockerImageComponent.TAGS_PAGE_SIZE
+    }
+    while url:
+        # token is taken for each page as it may expire on long lists
+        h = docker_auth.auth_headers(registry, scope, token_url)
+        page: Dict[str, Any] = http_cache.conditional_get(
+            url, _parse_docker_tags_page, params=params, headers=h
+        )
+        yield page["tags"]
+        url = urljoin(url, page["next"]) if page["next"] else None
+        # next link has already all the query params
+        params = None
+
+
+def _is_found(r: Response) -> bool:
+    """False if the registry has no such a package, other error statuses
+    are raised, so they are not cached as a not found package"""
+    if r.status_code in cache.NOT_FOUND_STATUSES:
+        return False
+    r.raise_for_status()
+    return True
+
+
+def _parse_docker_tags_page(r: Response) -> Dict[str, Any]:
+    # it returns 404 if there is no such an image
+    if not _is_found(r):
+        return {"tags": [], "next": None}
+    return {
+        "tags": r.json().get("tags") or [],
+        "next": r.links.get("next", {}).get("url"),
+    }
+
+
+@cache.cached(
+    "docker-tags",
+    "registry_url",
+    default_registry="https://index.docker.io",
+    prepare=version_index.sorted_tags,
+    restore=version_index.SortedTags,
+)
+def fetch_docker_images_tags_pages(
+    repo_name: str,
+    component_name: str,
+    token_url: Optional[str] = None,
+    registry_url: Optional[str] = None,
+) -> Iterator[List[str]]:
+    """Pages of tags as they come from the registry, all tags from the cache
+    in one page"""
+    logger.info(f"{repo_name}:{component_name} - NOT CACHED")
+    yield from iter_docker_images_tags_pages(
+        repo_name, component_name, token_url, registry_url=registry_url
+    )
 
 
-@cachier(stale_after=datetime.timedelta(days=3))  # type: ignore[misc]
 def fetch_docker_images_versions(
-    repo_name: str, component_name: str, token_url: Optional[str] = None
+    repo_name: str,
+    component_name: str,
+    token_url: Optional[str] = None,
+    registry_url: Optional[str] = None,
+) -> List[str]:
+    return _join_pages(
+        fetch_docker_images_tags_pages(
+            repo_name, component_name, token_url, registry_url=registry_url
+        )
+    )
+
+
+@cache.cached(
+    "docker-hub-recent",
+    default_registry="https://hub.docker.com",
+    prepare=version_index.sorted_tags,
+    restore=version_index.SortedTags,
+)
+def fetch_docker_hub_recent_tags(
+    repo_name: str, component_name: str, stop_tag: str
 ) -> List[str]:
+    """Return tags from Docker Hub API ordered from the most recently updated.
+    Paging stops after the page with stop_tag as tags older than it
+    are not expected to have newer versions."""
     logger.info(f"{repo_name}:{component_name} - NOT CACHED")
-    payload: Dict[str, str] = {
-        "service": "registry.docker.io",
-        "scope": f"repository:{repo_name}/{component_name}:pull",
+    ret: List[str] = []
+    url: Optional[str] = (
+        f"{DockerImageComponent.HUB_API_URL}/v2/repositories/"
+        f"{repo_name}/{component_name}/tags"
+    )
+    params: Optional[Dict[str, Union[str, int]]] = {
+        "page_size": DockerImageComponent.HUB_PAGE_SIZE,
+        "ordering": "last_updated",
     }
-    r: Response = requests.get(
-        token_url or DockerImageComponent.TOKEN_URL, params=payload
+    while url:
+        r: Response = session.get(url, params=params)
+        # it returns 404 if there is no such an image
+        if not _is_found(r):
+            break
+        body = r.json()
+        page: List[str] = [result["name"] for result in body.get("results", [])]
+        ret.extend(page)
+        if stop_tag in page:
+            break
+        # next url has already all the query params
+        url, params = body.get("next"), None
+    return ret
+
+
+def fetch_docker_image_digest(
+    repo_name: str,
+    component_name: str,
+    version_tag: str,
+    registry_url: Optional[str] = None,
+) -> str:
+    """Return digest of image manifest for the tag, only headers are fetched"""
+    registry = _docker_registry_url(registry_url)
+    h = docker_auth.auth_headers(
+        registry, docker_auth.pull_scope(repo_name, component_name)
     )
-    if not r.status_code == 200:
-        print(f"Error status {r.status_code}")
-        raise Exception("Could not get auth token")
+    h["Accept"] = ", ".join(DockerImageComponent.MANIFEST_MEDIA_TYPES)
+    r: Response = session.head(
+        f"{registry}/v2/{repo_name}/{component_name}/manifests/{version_tag}",
+        headers=h,
+    )
+    digest: Optional[str] = r.headers.get("Docker-Content-Digest")
+    if not r.status_code == 200 or not digest:
+        logger.error(f"Error status {r.status_code} for {repo_name}/{component_name}")
+        raise requests.HTTPError(
+            f"Could not get digest for {repo_name}/{component_name}:{version_tag}",
+            response=r,
+        )
+    return digest
+
 
-    token: str = r.json()["token"]
-    h = {"Authorization": f"Bearer {token}"}
-    r = requests.get(
-        f"https://index.docker.io/v2/{repo_name}/{component_name}/tags/list", headers=h
+@cache.cached(
+    "pypi-json",
+    "registry_url",
+    default_registry="https://pypi.org",
+    prepare=version_index.sorted_tags,
+    restore=version_index.SortedTags,
+)
+def fetch_pypi_versions(
+    component_name: str, registry_url: Optional[str] = None
+) -> List[str]:
+    return http_cache.conditional_get(
+        f"{registry_url or PypiComponent.DEFAULT_REGISTRY_URL}/pypi/{component_name}/json",
+        _parse_pypi_json,
     )
-    ret: List[str] = r.json().get("tags", [])
-    return ret
 
 
-@cachier(stale_after=datetime.timedelta(days=3))  # type: ignore[misc]
-def fetch_pypi_versions(component_name: str) -> List[str]:
-    r: Response = requests.get(f"https://pypi.org/pypi/{component_name}/json")
+def _parse_pypi_json(r: Response) -> List[str]:
     # it returns 404 if there is no such a package
-    if not r.status_code == 200:
+    if not _is_found(r):
         return list()
     else:
         return list(r.json().get("releases", {}).keys())
 
 
+@cache.cached(
+    "pypi-simple",
+    "registry_url",
+    default_registry="https://pypi.org",
+    prepare=version_index.sorted_tags,
+    restore=version_index.SortedTags,
+)
+def fetch_pypi_simple_versions(
+    component_name: str, registry_url: Optional[str] = None
+) -> List[str]:
+    """Versions from Simple repository API, much smaller than the JSON API"""
+    project = pypi_simple.normalize_name(component_name)
+
+    def parse(r: Response) -> List[str]:
+        # it returns 404 if there is no such a package
+        if not _is_found(r):
+            return list()
+        elif r.headers.get("Content-Type", "").startswith(
+            pypi_simple.SIMPLE_JSON_MEDIA_TYPE
+        ):
+            return pypi_simple.versions_from_json(r.json(), component_name)
+        else:
+            return pypi_simple.versions_from_html(r.text, component_name)
+
+    return http_cache.conditional_get(
+        f"{registry_url or PypiComponent.DEFAULT_REGISTRY_URL}/simple/{project}/",
+        parse,
+        headers={"Accept": pypi_simple.SIMPLE_ACCEPT},
+    )
+
+
 class DockerImageComponent(Component):
     DEFAULT_VERSION_PATTERN: str = "{component}:{version}"
-    TOKEN_URL: str = "https://auth.docker.io/token"
+    DEFAULT_REGISTRY_URL: Optional[str] = "https://index.docker.io"
+    TOKEN_URL: str = docker_auth.HUB_TOKEN_URL
+    DEFAULT_FETCH_MODE: Optional[str] = FetchMode.DOCKER_TAGS_LIST.value
+    # number of tags asked for in one tags/list request
+    TAGS_PAGE_SIZE: int = 1000
+    HUB_HOST: str = "index.docker.io"
+    HUB_API_URL: str = "https://hub.docker.com"
+    # max page size allowed by Docker Hub API
+    HUB_PAGE_SIZE: int = 100
+    # manifest lists first, so digest is the same as the one shown for the tag
+    MANIFEST_MEDIA_TYPES: List[str] = [
+        "application/vnd.docker.distribution.manifest.list.v2+json",
+        "application/vnd.oci.image.index.v1+json",
+        "application/vnd.docker.distribution.manifest.v2+json",
+        "application/vnd.oci.image.manifest.v1+json",
+    ]
 
     def __init__(
         self, repo_name: str, component_name: str, current_version_tag: str
@@ -234,9 +647,104 @@ class DockerImageComponent(Component):
         self.repo_name = repo_name
         self.version_pattern = self.DEFAULT_VERSION_PATTERN
 
+    @classmethod
+    def prepare_check(cls, components: List["Component"]) -> None:
+        by_registry: Dict[str, List[str]] = {}
+        for comp in components:
+            if isinstance(comp, DockerImageComponent) and not local_mirror.is_local(
+                comp.registry_url
+            ):
+                by_registry.setdefault(
+                    _docker_registry_url(comp.registry_url), []
+                ).append(docker_auth.pull_scope(comp.repo_name, comp.component_name))
+        for registry, scopes in by_registry.items():
+            docker_auth.want(registry, scopes)
+
+    def upstream_key(self) -> Tuple[Optional[str], ...]:
+        key = super(DockerImageComponent, self).upstream_key() + (self.repo_name,)
+        if self.fetch_mode in (
+            FetchMode.DOCKER_HUB_RECENT.value,
+            FetchMode.DOCKER_DIGEST.value,
+        ):
+            # paging stops at the current version, digest is of the current tag
+            key += (self.current_version_tag,)
+        return key
+
+    def newer_version_exists(self) -> bool:
+        if self.fetch_mode == FetchMode.DOCKER_DIGEST.value:
+            return self.next_digest is not None and self.next_digest != self.digest
+        return super(DockerImageComponent, self).newer_version_exists()
+
+    def check(self) -> bool:
+        """In digest mode check if the image behind current tag has changed"""
+        if not self.fetch_mode == FetchMode.DOCKER_DIGEST.value:
+            return super(DockerImageComponent, self).check()
+
+        # in this mode the versions list has just the digest of current tag
+        self.next_digest = self.resolve_versions_tags()[0]
+        if self.digest is None:
+            # the first check only records the digest
+            self.digest = self.next_digest
+        return self.newer_version_exists()
+
+    @property
+    def lists_registry_tags(self) -> bool:
+        """Tags are read with tags/list, in hub-recent mode on other
+        registries than Docker Hub too"""
+        return not local_mirror.is_local(self.registry_url) and (
+            self.fetch_mode == FetchMode.DOCKER_TAGS_LIST.value
+            or self.fetch_mode == FetchMode.DOCKER_HUB_RECENT.value
+            and self.registry_host != self.HUB_HOST
+        )
+
+    def fetch_versions_tags_pages(self) -> Iterator[List[str]]:
+        """Pages of tags/list are yielded as they come from the registry"""
+        if self.lists_registry_tags:
+            yield from fetch_docker_images_tags_pages(
+                self.repo_name, self.component_name, registry_url=self.registry_url
+            )
+        else:
+            yield self.fetch_versions_tags()
+
     @typing.no_type_check
     def fetch_versions_tags(self) -> List[str]:
-        return fetch_docker_images_versions(self.repo_name, self.component_name)
+        if self.registry_url is not None and local_mirror.is_local(self.registry_url):
+            return self.fetch_local_versions_tags(self.registry_url)
+        if self.fetch_mode == FetchMode.DOCKER_DIGEST.value:
+            return [
+                fetch_docker_image_digest(
+                    self.repo_name,
+                    self.component_name,
+                    self.current_version_tag,
+                    self.registry_url,
+                )
+            ]
+        elif self.fetch_mode == FetchMode.DOCKER_HUB_RECENT.value:
+            # only Docker Hub has the API ordering tags by update time
+            if self.registry_host == self.HUB_HOST:
+                return fetch_docker_hub_recent_tags(
+                    self.repo_name, self.component_name, self.current_version_tag
+                )
+        elif self.fetch_mode != FetchMode.DOCKER_TAGS_LIST.value:
+            raise ValueError(
+                f"Fetch mode: {self.fetch_mode} not implemented for {self.component_type.value}!"
+            )
+        return fetch_docker_images_versions(
+            self.repo_name, self.component_name, registry_url=self.registry_url
+        )
+
+    def fetch_local_versions_tags(self, mirror_url: str) -> List[str]:
+        """Tags from OCI image layout directory, in all modes from its index.json"""
+        if self.fetch_mode == FetchMode.DOCKER_DIGEST.value:
+            return [
+                local_mirror.oci_digest(
+                    mirror_url,
+                    self.repo_name,
+                    self.component_name,
+                    self.current_version_tag,
+                )
+            ]
+        return local_mirror.oci_tags(mirror_url, self.repo_name, self.component_name)
 
     def to_dict(self) -> TDictComponent:
         ret: TDictComponent = super(DockerImageComponent, self).to_dict()
@@ -246,6 +754,8 @@ class DockerImageComponent(Component):
 
 class PypiComponent(Component):
     DEFAULT_VERSION_PATTERN: str = "{component}=={version}"
+    DEFAULT_REGISTRY_URL: Optional[str] = "https://pypi.org"
+    DEFAULT_FETCH_MODE: Optional[str] = FetchMode.PYPI_JSON.value
 
     def __init__(
         self, component_name: str, current_version_tag: str, **_ignored: Any
@@ -256,7 +766,266 @@ class PypiComponent(Component):
         self.version_pattern = self.DEFAULT_VERSION_PATTERN
 
     def fetch_versions_tags(self) -> List[str]:
-        return fetch_pypi_versions(self.component_name)  # type: ignore [no-any-return]
+        if self.registry_url is not None and local_mirror.is_local(self.registry_url):
+            return self.fetch_local_versions_tags(self.registry_url)
+        if self.fetch_mode == FetchMode.PYPI_SIMPLE.value:
+            return fetch_pypi_simple_versions(self.component_name, self.registry_url)
+        elif self.fetch_mode != FetchMode.PYPI_JSON.value:
+            raise ValueError(
+                f"Fetch mode: {self.fetch_mode} not implemented for {self.component_type.value}!"
+            )
+        return fetch_pypi_versions(self.component_name, self.registry_url)
+
+    def fetch_local_versions_tags(self, mirror_url: str) -> List[str]:
+        """Versions from PyPI mirror directory, eg. made by bandersnatch"""
+        if self.fetch_mode == FetchMode.PYPI_SIMPLE.value:
+            return local_mirror.pypi_simple_versions(mirror_url, self.component_name)
+        return local_mirror.pypi_versions(mirror_url, self.component_name)
+
+
+@cache.cached(
+    "npm",
+    "registry_url",
+    default_registry="https://registry.npmjs.org",
+    prepare=version_index.sorted_tags,
+    restore=version_index.SortedTags,
+)
+def fetch_npm_versions(
+    component_name: str, registry_url: Optional[str] = None
+) -> List[str]:
+    """Versions from abbreviated metadata, which has only fields needed
+    to install the package and is much smaller than the full one"""
+    # scoped packages are requested as @scope%2Fname
+    package = component_name.replace("/", "%2F")
+    return http_cache.conditional_get(
+        f"{registry_url or NpmComponent.DEFAULT_REGISTRY_URL}/{package}",
+        _parse_npm_metadata,
+        headers={"Accept": NpmComponent.ABBREVIATED_ACCEPT},
+    )
+
+
+def _parse_npm_metadata(r: Response) -> List[str]:
+    # it returns 404 if there is no such a package
+    if not _is_found(r):
+        return list()
+    else:
+        return list(r.json().get("versions", {}).keys())
+
+
+class NpmComponent(Component):
+    DEFAULT_VERSION_PATTERN: str = '"{component}": "{version}"'
+    DEFAULT_REGISTRY_URL: Optional[str] = "https://registry.npmjs.org"
+    DEFAULT_FETCH_MODE: Optional[str] = FetchMode.NPM_ABBREVIATED.value
+    ABBREVIATED_MEDIA_TYPE: str = "application/vnd.npm.install-v1+json"
+    # full metadata is accepted from registries without abbreviated one
+    ABBREVIATED_ACCEPT: str = (
+        f"{ABBREVIATED_MEDIA_TYPE}; q=1.0, application/json; q=0.8, */*"
+    )
+
+    def __init__(
+        self, component_name: str, current_version_tag: str, **_ignored: Any
+    ) -> None:
+        super(NpmComponent, self).__init__(
+            ComponentType.NPM, component_name, current_version_tag
+        )
+
+    def fetch_versions_tags(self) -> List[str]:
+        if self.fetch_mode != FetchMode.NPM_ABBREVIATED.value:
+            raise ValueError(
+                f"Fetch mode: {self.fetch_mode} not implemented for {self.component_type.value}!"
+            )
+        return fetch_npm_versions(self.component_name, self.registry_url)
+
+
+@cache.cached(
+    "helm-index",
+    "registry_url",
+    component_arg=None,
+    prepare=version_index.sorted_index,
+    restore=version_index.restore_index,
+)
+def fetch_helm_index_versions(registry_url: str) -> Dict[str, List[str]]:
+    """Versions of all charts from the repository index.yaml"""
+    logger.info(f"{registry_url} - NOT CACHED")
+    if local_mirror.is_local(registry_url):
+        with open(
+            local_mirror.root_path(registry_url) / helm_index.INDEX_FILE, "rb"
+        ) as f:
+            return helm_index.versions_from_index(f)
+    return http_cache.conditional_get(
+        f"{registry_url.rstrip('/')}/{helm_index.INDEX_FILE}",
+        _parse_helm_index,
+        stream=True,
+    )
+
+
+def _parse_helm_index(r: Response) -> Dict[str, List[str]]:
+    if not r.status_code == 200:
+        logger.error(f"Error status {r.status_code} for {r.url}")
+        raise requests.HTTPError(
+            f"Could not get chart repository index {r.url}", response=r
+        )
+    # index is parsed while it is downloaded, without keeping all of it
+    r.raw.decode_content = True
+    return helm_index.versions_from_index(cast(IO[bytes], r.raw))
+
+
+class HelmChartComponent(Component):
+    DEFAULT_FETCH_MODE: Optional[str] = FetchMode.HELM_INDEX.value
+
+    def __init__(
+        self, component_name: str, current_version_tag: str, **_ignored: Any
+    ) -> None:
+        super(HelmChartComponent, self).__init__(
+            ComponentType.HELM, component_name, current_version_tag
+        )
+
+    @typing.no_type_check
+    def fetch_versions_tags(self) -> List[str]:
+        if not self.registry_url:
+            raise ValueError(
+                f"registry-url with chart repository is required for {self.component_name}!"
+            )
+        if self.fetch_mode != FetchMode.HELM_INDEX.value:
+            raise ValueError(
+                f"Fetch mode: {self.fetch_mode} not implemented for {self.component_type.value}!"
+            )
+        # all charts from the repository share one index fetched once per run
+        index: Dict[str, List[str]] = singleflight.coordinator.do(
+            (self.component_type.value, self.registry_url),
+            lambda: fetch_helm_index_versions(self.registry_url),
+        )
+        return index.get(self.component_name, [])
+
+
+@cache.cached(
+    "github",
+    "registry_url",
+    "repo",
+    default_registry=github_graphql.API_URL,
+    prepare=version_index.sorted_tags,
+    restore=version_index.SortedTags,
+)
+def fetch_github_versions(
+    repo: str, kind: str, registry_url: Optional[str] = None
+) -> List[str]:
+    """Release or tag names of GitHub repository, repositories not cached
+    are fetched together in one GraphQL query"""
+    logger.info(f"{repo} - NOT CACHED")
+    return github_graphql.get_batch(registry_url, kind).versions(repo)
+
+
+class GithubReleaseComponent(Component):
+    DEFAULT_REGISTRY_URL: Optional[str] = github_graphql.API_URL
+    DEFAULT_FETCH_MODE: Optional[str] = FetchMode.GITHUB_RELEASES.value
+
+    def __init__(
+        self, component_name: str, current_version_tag: str, **_ignored: Any
+    ) -> None:
+        super(GithubReleaseComponent, self).__init__(
+            ComponentType.GITHUB, component_name, current_version_tag
+        )
+
+    @classmethod
+    def prepare_check(cls, components: List["Component"]) -> None:
+        """Repositories without fresh cache entry are announced to be queried
+        together, cached ones would be queried only to be dropped"""
+        for comp in components:
+            if isinstance(comp, GithubReleaseComponent) and not comp.is_cached():
+                github_graphql.get_batch(comp.registry_url, comp.fetch_kind).want(
+                    [comp.component_name]
+                )
+
+    @classmethod
+    def finish_check(cls, components: List["Component"]) -> None:
+        """Versions of these components not asked for are dropped, batches
+        keep those of concurrent checks, eg. of other server requests"""
+        for comp in components:
+            if isinstance(comp, GithubReleaseComponent):
+                github_graphql.get_batch(comp.registry_url, comp.fetch_kind).forget(
+                    [comp.component_name]
+                )
+
+    def is_cached(self) -> bool:
+        """Versions are in the cache, fresh for cache-ttl of this component"""
+        ttl = cache.parse_duration(self.cache_ttl) if self.cache_ttl else None
+        with cache.policy.component_ttl(ttl):
+            return fetch_github_versions.is_fresh(
+                self.component_name, self.fetch_kind, self.registry_url
+            )
+
+    @property
+    def fetch_kind(self) -> str:
+        if self.fetch_mode == FetchMode.GITHUB_TAGS.value:
+            return github_graphql.TAGS
+        elif self.fetch_mode == FetchMode.GITHUB_RELEASES.value:
+            return github_graphql.RELEASES
+        raise ValueError(
+            f"Fetch mode: {self.fetch_mode} not implemented for {self.component_type.value}!"
+        )
+
+    def fetch_versions_tags(self) -> List[str]:
+        return fetch_github_versions(
+            self.component_name, self.fetch_kind, self.registry_url
+        )
+
+
+@cache.cached(
+    "go-module",
+    "proxy_url",
+    "module",
+    prepare=version_index.sorted_tags,
+    restore=version_index.SortedTags,
+)
+def fetch_go_module_versions(module: str, proxy_url: str) -> List[str]:
+    """Versions from module proxy @v/list, a short plain text list"""
+    if local_mirror.is_local(proxy_url):
+        versions = go_proxy.local_versions(proxy_url, module)
+        if versions is None:
+            logger.info(f"{module} - not found in {proxy_url}")
+        return versions or list()
+    return http_cache.conditional_get(
+        go_proxy.list_url(proxy_url, module), _parse_go_list
+    )
+
+
+def _parse_go_list(r: Response) -> List[str]:
+    # it returns 404 or 410 if there is no such a module
+    if not _is_found(r):
+        return list()
+    else:
+        return go_proxy.versions_from_list(r.text)
+
+
+class GoModuleComponent(Component):
+    DEFAULT_PREFIX: Optional[str] = "v"
+    DEFAULT_FETCH_MODE: Optional[str] = FetchMode.GO_LIST.value
+
+    def __init__(
+        self, component_name: str, current_version_tag: str, **_ignored: Any
+    ) -> None:
+        super(GoModuleComponent, self).__init__(
+            ComponentType.GO, component_name, current_version_tag
+        )
+
+    @property
+    def proxy_url(self) -> str:
+        """registry-url if given, otherwise the proxy from GOPROXY"""
+        return self.registry_url or go_proxy.proxy_from_env()
+
+    @property
+    def registry_host(self) -> str:
+        return urlparse(self.proxy_url).netloc
+
+    def upstream_key(self) -> Tuple[Optional[str], ...]:
+        return super(GoModuleComponent, self).upstream_key() + (self.proxy_url,)
+
+    def fetch_versions_tags(self) -> List[str]:
+        if self.fetch_mode != FetchMode.GO_LIST.value:
+            raise ValueError(
+                f"Fetch mode: {self.fetch_mode} not implemented for {self.component_type.value}!"
+            )
+        return fetch_go_module_versions(self.component_name, self.proxy_url)
 
 
 class ComponentFactory:
@@ -265,6 +1034,14 @@ class ComponentFactory:
             return DockerImageComponent(**args)
         elif component_type == ComponentType.PYPI.value:
             return PypiComponent(**args)
+        elif component_type == ComponentType.NPM.value:
+            return NpmComponent(**args)
+        elif component_type == ComponentType.HELM.value:
+            return HelmChartComponent(**args)
+        elif component_type == ComponentType.GITHUB.value:
+            return GithubReleaseComponent(**args)
+        elif component_type == ComponentType.GO.value:
+            return GoModuleComponent(**args)
         else:
             raise ValueError(f"Componet type: {component_type} not implemented!")
 
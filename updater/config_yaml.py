@@ -4,7 +4,7 @@ from enum import Enum
 from pathlib import Path
 import pprint
 from subprocess import run
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple, Type
 import pkg_resources
 
 import click
@@ -12,7 +12,16 @@ import yaml
 from loguru import logger
 from plumbum import local  # type: ignore
 
-from updater import TPlumbumRunReturn, git_check, plumbum_msg, components
+from updater import (
+    TPlumbumRunReturn,
+    git_check,
+    plumbum_msg,
+    cache,
+    components,
+    engine,
+    session,
+    singleflight,
+)
 from updater.components import ComponentType, Component
 
 
@@ -22,6 +31,30 @@ class ImportType(Enum):
     POETRY = "poetry"
 
 
+def component_from_dict(component_name: str, compd: Dict[str, Any]) -> Component:
+    """Component from its entry in components.yaml"""
+    params: components.TDictComponent = {
+        "component_name": component_name,
+        "current_version_tag": compd["current-version"],
+        "repo_name": compd.get("docker-repo", Component.DEFAULT_REPO),
+    }
+    comp = components.factory.get(str(compd["component-type"]), **params)
+    comp.prefix = compd.get("prefix", comp.DEFAULT_PREFIX)
+    comp.filter = compd.get("filter", comp.DEFAULT_FILTER)
+    comp.files = compd.get("files", comp.DEFAULT_FILES)
+    comp.exclude_versions = compd.get("exclude-versions", comp.DEFAULT_EXLUDE_VERSIONS)
+    comp.version_pattern = compd.get("version-pattern", comp.DEFAULT_VERSION_PATTERN)
+    comp.files_version_pattern = compd.get(
+        "files-version-pattern", comp.DEFAULT_FILES_VERSION_PATTERN
+    )
+    comp.fetch_mode = compd.get("fetch-mode", comp.DEFAULT_FETCH_MODE)
+    comp.digest = compd.get("digest")
+    comp.registry_url = compd.get("registry-url", comp.DEFAULT_REGISTRY_URL)
+    comp.cache_ttl = compd.get("cache-ttl")
+    comp.registry_ttl = compd.get("registry-ttl")
+    return comp
+
+
 class Config:
 
     STATE_FILES_UPDATED = "FILES_UPDATED"
@@ -31,6 +64,7 @@ class Config:
     STATE_UPDATE_STARTED = "UPDATE_STARTED"
     STATE_UPDATE_SKIPPED = "UPDATE_SKIPPED"
     STATE_UPDATE_DONE = "UPDATE_DONE"
+    STATE_CHECK_UNKNOWN = "CHECK_UNKNOWN"
 
     def __init__(self, components_yaml_file: Optional[Path] = None) -> None:
         self.components: List[Component] = []
@@ -42,6 +76,12 @@ class Config:
         self.test_dir: Optional[Path] = None
         self.git_commit: bool = True
         self.status: Dict[str, Dict[str, str]] = {}
+        # 1 means components are checked one by one
+        self.jobs: int = 1
+        self.per_host_jobs: int = engine.DEFAULT_PER_HOST
+        # seconds for the whole check, components not checked in time are unknown
+        self.deadline: Optional[float] = None
+        self.unchecked: List[Component] = []
 
     def update_status(self, component: Component, step: str) -> None:
         if component.component_name not in self.status:
@@ -105,27 +145,8 @@ class Config:
         ) or {}
 
         for component_name in components_dict:
-            compd = components_dict[component_name]
-            params: components.TDictComponent = {
-                "component_name": component_name,
-                "current_version_tag": compd["current-version"],
-                "repo_name": compd.get("docker-repo", Component.DEFAULT_REPO),
-            }
-            last_index = self.add(
-                components.factory.get(str(compd["component-type"]), **params)
-            )
-            comp = self.components[last_index]
-            comp.prefix = compd.get("prefix", comp.DEFAULT_PREFIX)
-            comp.filter = compd.get("filter", comp.DEFAULT_FILTER)
-            comp.files = compd.get("files", comp.DEFAULT_FILES)
-            comp.exclude_versions = compd.get(
-                "exclude-versions", comp.DEFAULT_EXLUDE_VERSIONS
-            )
-            comp.version_pattern = compd.get(
-                "version-pattern", comp.DEFAULT_VERSION_PATTERN
-            )
-            comp.files_version_pattern = compd.get(
-                "files-version-pattern", comp.DEFAULT_FILES_VERSION_PATTERN
+            self.add(
+                component_from_dict(component_name, components_dict[component_name])
             )
 
     def add_from_requirements(self, req_file: str, req_source: str) -> None:
@@ -171,11 +192,84 @@ class Config:
     def count_components_to_update(self) -> int:
         self.check()
         return sum(
-            [1 for component in self.components if component.newer_version_exists()]
+            [1 for component in self.components if self.has_newer_version(component)]
         )
 
-    def check(self) -> List[Tuple[str, bool]]:
-        return [(comp.component_name, comp.check()) for comp in self.components]
+    def prepare_check(self) -> None:
+        # registry-ttl of a component applies to all components of its registry
+        cache.policy.config_registry_ttls = {
+            component.registry_host: cache.parse_duration(component.registry_ttl)
+            for component in self.components
+            if component.registry_ttl
+        }
+        for component_class, same_type_components in self.components_by_type():
+            component_class.prepare_check(same_type_components)
+
+    def finish_check(self) -> None:
+        for component_class, same_type_components in self.components_by_type():
+            component_class.finish_check(same_type_components)
+
+    def components_by_type(self) -> List[Tuple[Type[Component], List[Component]]]:
+        by_type: Dict[Type[Component], List[Component]] = {}
+        for component in self.components:
+            by_type.setdefault(type(component), []).append(component)
+        return list(by_type.items())
+
+    def has_newer_version(self, component: Component) -> bool:
+        return component not in self.unchecked and component.newer_version_exists()
+
+    def check_sequentially(self) -> List[Tuple[str, Optional[bool]]]:
+        """Check components one by one, with deadline given to session.deadline()
+        requests of the component checked when it passes are cut short too"""
+        ret: List[Tuple[str, Optional[bool]]] = []
+        for comp in self.components:
+            remaining = session.remaining()
+            if remaining is not None and remaining <= 0:
+                ret.append((comp.component_name, None))
+            else:
+                ret.append((comp.component_name, engine.check_component(comp)))
+        return ret
+
+    def check(self) -> List[Tuple[str, Optional[bool]]]:
+        """Check all components, None as result means the component was not
+        checked before the deadline or its registry was unavailable"""
+        self.prepare_check()
+        try:
+            with singleflight.coordinator.run(), session.deadline(self.deadline):
+                if self.jobs > 1 and len(self.components) > 1:
+                    ret = engine.check_concurrently(
+                        self.components, self.jobs, self.per_host_jobs, self.deadline
+                    )
+                else:
+                    ret = self.check_sequentially()
+        finally:
+            self.finish_check()
+        self.unchecked = [
+            comp for comp, (_, result) in zip(self.components, ret) if result is None
+        ]
+        for comp in self.unchecked:
+            self.update_status(comp, self.STATE_CHECK_UNKNOWN)
+        return ret
+
+    def warm(self) -> List[Tuple[str, Optional[bool]]]:
+        """Fetch versions of all components through the cache without checking
+        them, None as result means versions could not be fetched in time"""
+        self.prepare_check()
+        try:
+            with singleflight.coordinator.run(), session.deadline(self.deadline):
+                ret = engine.check_concurrently(
+                    self.components,
+                    self.jobs,
+                    self.per_host_jobs,
+                    self.deadline,
+                    engine.warm_component,
+                )
+        finally:
+            self.finish_check()
+        self.unchecked = [
+            comp for comp, (_, result) in zip(self.components, ret) if result is None
+        ]
+        return ret
 
     def run_tests(self, processed_component: Component) -> None:
         assert self.test_command, "No test command provided."
@@ -186,8 +280,14 @@ class Config:
             )
 
     def commit_changes(
-        self, component: Component, from_version: str, to_version: str, dry_run: bool
+        self,
+        component: Component,
+        from_version: str,
+        to_version: str,
+        dry_run: bool,
+        files: Optional[List[str]] = None,
     ) -> None:
+        files_to_commit: List[str] = component.files if files is None else files
         git = local["git"]
         assert self.config_file, "No config file found."
         # TODO shouldn't it be self.project_dir param rather?
@@ -196,12 +296,12 @@ class Config:
                 git["diff", "--name-only"].run(retcode=None)
             )
             changed_files: List[str] = ret[1].splitlines()
-            assert set(component.files).issubset(
+            assert set(files_to_commit).issubset(
                 set(changed_files)
             ), f"Not all SRC files are in git changed files.\n{plumbum_msg(ret)}"
             if not dry_run:
                 git_check(git["add", self.config_file.name].run(retcode=None))
-                for file_name in component.files:
+                for file_name in files_to_commit:
                     git_check(git["add", file_name].run(retcode=None))
                 commit_message = (
                     f"{component.component_name} "
@@ -216,9 +316,10 @@ class Config:
         file_counter = 0
         components_counter = 0
         for component in self.components:
-            if component.newer_version_exists():
+            if self.has_newer_version(component):
                 orig_current_tag = component.current_version_tag
                 orig_next_tag = component.next_version_tag
+                files_to_update = component.files_to_update()
                 self.update_status(component, self.STATE_UPDATE_STARTED)
                 prev_file_counter = file_counter
                 file_counter += component.update_files(self.project_dir, dry_run)
@@ -233,12 +334,17 @@ class Config:
                     component.current_version_tag = copy.deepcopy(
                         component.next_version_tag
                     )
+                    component.digest = component.next_digest or component.digest
                 self.save_config(dry_run=dry_run)
                 self.update_status(component, self.STATE_CONFIG_SAVED)
 
                 if self.git_commit:
                     self.commit_changes(
-                        component, orig_current_tag, orig_next_tag, dry_run
+                        component,
+                        orig_current_tag,
+                        orig_next_tag,
+                        dry_run,
+                        files_to_update,
                     )
                     self.update_status(component, self.STATE_COMMITED_CHANGES)
                 self.update_status(component, self.STATE_UPDATE_DONE)
@@ -254,7 +360,7 @@ class Config:
                 f"next: {click.style(c.next_version_tag, fg='green')}"
             )
             for c in self.components
-            if c.newer_version_exists()
+            if self.has_newer_version(c)
         ]
         new.sort()
         return new
@@ -0,0 +1,178 @@
+import re
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import requests
+from loguru import logger
+from requests.models import Response
+
+from updater import session
+
+# default token lifetime from the Docker token authentication specification
+DEFAULT_EXPIRES_IN: int = 60
+# tokens are refreshed this many seconds before they expire
+EXPIRY_MARGIN: int = 10
+# scopes asked for in one token request, keeps the url at a reasonable length
+MAX_SCOPES_PER_REQUEST: int = 20
+HUB_TOKEN_URL: str = "https://auth.docker.io/token"
+HUB_SERVICE: str = "registry.docker.io"
+# Docker Hub token service is known, other registries are asked for it
+KNOWN_REALMS: Dict[str, Tuple[str, str]] = {
+    "index.docker.io": (HUB_TOKEN_URL, HUB_SERVICE),
+    "registry-1.docker.io": (HUB_TOKEN_URL, HUB_SERVICE),
+}
+
+_CHALLENGE_PARAM = re.compile(r'(\w+)="([^"]*)"')
+
+
+def pull_scope(repo_name: str, component_name: str) -> str:
+    return f"repository:{repo_name}/{component_name}:pull"
+
+
+class TokenCache:
+    """Bearer tokens for registry scopes, reused until they expire.
+
+    Scopes announced with want() are requested together with the first scope
+    that is missing, as the token service accepts many scope parameters
+    in one request and returns a token valid for all of them."""
+
+    def __init__(self, token_url: str, service: str = HUB_SERVICE) -> None:
+        self.token_url = token_url
+        self.service = service
+        self.requests_count: int = 0
+        self._tokens: Dict[str, Tuple[str, float]] = {}
+        self._wanted: Dict[str, None] = {}
+        self._lock = threading.Lock()
+
+    def want(self, scopes: Iterable[str]) -> None:
+        with self._lock:
+            for scope in scopes:
+                self._wanted[scope] = None
+
+    def _is_valid(self, scope: str) -> bool:
+        return scope in self._tokens and self._tokens[scope][1] > time.monotonic()
+
+    def token(self, scope: str) -> str:
+        with self._lock:
+            if not self._is_valid(scope):
+                batch: List[str] = [scope] + [
+                    wanted
+                    for wanted in self._wanted
+                    if wanted != scope and not self._is_valid(wanted)
+                ][: MAX_SCOPES_PER_REQUEST - 1]
+                self._request(batch)
+            return self._tokens[scope][0]
+
+    def _request(self, scopes: List[str]) -> None:
+        params = [("service", self.service)] if self.service else []
+        params += [("scope", s) for s in scopes]
+        r: Response = session.get(self.token_url, params=params)
+        self.requests_count += 1
+        if not r.status_code == 200:
+            logger.error(f"Error status {r.status_code} for {self.token_url}")
+            raise requests.HTTPError("Could not get auth token", response=r)
+
+        body = r.json()
+        token: str = body.get("token") or body["access_token"]
+        expires_in: int = int(body.get("expires_in", DEFAULT_EXPIRES_IN))
+        expires_at = time.monotonic() + max(expires_in - EXPIRY_MARGIN, 0)
+        for scope in scopes:
+            self._tokens[scope] = (token, expires_at)
+            self._wanted.pop(scope, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._tokens.clear()
+            self._wanted.clear()
+
+
+_caches: Dict[str, TokenCache] = {}
+_caches_lock = threading.Lock()
+# token service of each registry, None for registries without token auth
+_realms: Dict[str, Optional[Tuple[str, str]]] = {}
+# scopes wanted for registries not asked for their token service yet
+_wanted: Dict[str, List[str]] = {}
+
+
+def get_token_cache(token_url: str, service: str = HUB_SERVICE) -> TokenCache:
+    with _caches_lock:
+        if token_url not in _caches:
+            _caches[token_url] = TokenCache(token_url, service)
+        return _caches[token_url]
+
+
+def get_token(token_url: str, scope: str, service: str = HUB_SERVICE) -> str:
+    return get_token_cache(token_url, service).token(scope)
+
+
+def parse_challenge(header: str) -> Optional[Tuple[str, str]]:
+    """Token url and service from WWW-Authenticate header of bearer auth,
+    eg. Bearer realm="https://ghcr.io/token",service="ghcr.io" from GitHub"""
+    scheme, _, params = header.partition(" ")
+    if scheme.lower() != "bearer":
+        return None
+    values = dict(_CHALLENGE_PARAM.findall(params))
+    if "realm" not in values:
+        return None
+    return values["realm"], values.get("service", "")
+
+
+def registry_host(registry_url: str) -> str:
+    return session.host_of(registry_url) or registry_url
+
+
+def get_realm(registry_url: str) -> Optional[Tuple[str, str]]:
+    """Token url and service of the registry, taken from the challenge
+    it answers /v2/ with. None if it does not ask for a bearer token."""
+    host = registry_host(registry_url)
+    with _caches_lock:
+        if host in KNOWN_REALMS:
+            return KNOWN_REALMS[host]
+        if host in _realms:
+            return _realms[host]
+    r: Response = session.get(f"{registry_url.rstrip('/')}/v2/")
+    realm = (
+        parse_challenge(r.headers.get("WWW-Authenticate", ""))
+        if r.status_code == 401
+        else None
+    )
+    with _caches_lock:
+        _realms[host] = realm
+        wanted = _wanted.pop(host, [])
+    if realm is not None and wanted:
+        get_token_cache(*realm).want(wanted)
+    return realm
+
+
+def want(registry_url: str, scopes: Iterable[str]) -> None:
+    """Announce scopes which will be needed for the registry, so tokens
+    for them are requested together. Registries are not asked for their
+    token service here, scopes are kept until it is known."""
+    host = registry_host(registry_url)
+    with _caches_lock:
+        realm = KNOWN_REALMS.get(host) or _realms.get(host)
+        if realm is None:
+            if host not in _realms:
+                _wanted.setdefault(host, []).extend(scopes)
+            return
+    get_token_cache(*realm).want(scopes)
+
+
+def auth_headers(
+    registry_url: str, scope: str, token_url: Optional[str] = None
+) -> Dict[str, str]:
+    """Authorization header with token for the scope, empty for registries
+    without token auth. token_url is used instead of the registry realm."""
+    realm = (token_url, HUB_SERVICE) if token_url else get_realm(registry_url)
+    if realm is None:
+        return {}
+    return {"Authorization": f"Bearer {get_token(realm[0], scope, realm[1])}"}
+
+
+def clear_tokens() -> None:
+    with _caches_lock:
+        for cache in _caches.values():
+            cache.clear()
+        _realms.clear()
+        _wanted.clear()
@@ -0,0 +1,108 @@
+import asyncio
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+import requests
+from loguru import logger
+
+from updater.breaker import CircuitOpenError
+from updater.cache import CachedFetchError
+from updater.components import Component, NoVersionsError
+
+DEFAULT_JOBS: int = 8
+DEFAULT_PER_HOST: int = 4
+
+
+def check_component(component: Component) -> Optional[bool]:
+    """Component.check() with None as result when its registry is unavailable,
+    the versions could not be fetched or none were returned, so other
+    components are still checked"""
+    try:
+        return component.check()
+    except (
+        CircuitOpenError,
+        CachedFetchError,
+        NoVersionsError,
+        requests.RequestException,
+    ) as e:
+        logger.warning(f"{component.component_name} not checked: {e}")
+        return None
+
+
+def warm_component(component: Component) -> Optional[bool]:
+    """Fetch versions of the component through the cache without checking it,
+    None as result when they could not be fetched"""
+    try:
+        component.resolve_versions_tags()
+        return True
+    except Exception as e:
+        logger.warning(f"{component.component_name} not warmed: {e}")
+        return None
+
+
+async def _check_all(
+    components: List[Component],
+    jobs: int,
+    per_host: int,
+    deadline: Optional[float],
+    check: Callable[[Component], Optional[bool]],
+) -> List[Tuple[str, Optional[bool]]]:
+    loop = asyncio.get_event_loop()
+    host_limits: Dict[str, asyncio.Semaphore] = {}
+
+    async def check_one(
+        executor: ThreadPoolExecutor, component: Component
+    ) -> Optional[bool]:
+        limit = host_limits.setdefault(
+            component.registry_host, asyncio.Semaphore(per_host)
+        )
+        async with limit:
+            # with the deadline of the run, also after it has returned
+            return await loop.run_in_executor(
+                executor, contextvars.copy_context().run, check, component
+            )
+
+    executor = ThreadPoolExecutor(max_workers=jobs)
+    try:
+        tasks = [loop.create_task(check_one(executor, comp)) for comp in components]
+        done, pending = await asyncio.wait(tasks, timeout=deadline)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        ret: List[Tuple[str, Optional[bool]]] = []
+        errors: List[BaseException] = []
+        for comp, task in zip(components, tasks):
+            error = task.exception() if task in done else None
+            if error is not None:
+                errors.append(error)
+            elif task in done:
+                ret.append((comp.component_name, task.result()))
+            else:
+                ret.append((comp.component_name, None))
+        if errors:
+            # the first one, as it would be raised by checking one by one
+            raise errors[0]
+        return ret
+    finally:
+        # checks still running after deadline are not waited for, they end
+        # soon as their requests are cut short by session.deadline(), which
+        # stays set in their context
+        executor.shutdown(wait=False)
+
+
+def check_concurrently(
+    components: List[Component],
+    jobs: int = DEFAULT_JOBS,
+    per_host: int = DEFAULT_PER_HOST,
+    deadline: Optional[float] = None,
+    check: Callable[[Component], Optional[bool]] = check_component,
+) -> List[Tuple[str, Optional[bool]]]:
+    """Run Component.check() for all components, at most `jobs` at once
+    and at most `per_host` at once against the same registry host.
+    Results are returned in the order of components, components not checked
+    within `deadline` seconds or with registry unavailable have None as result.
+    Other function can be given as `check`, eg. warm_component."""
+    return asyncio.run(
+        _check_all(components, max(jobs, 1), max(per_host, 1), deadline, check)
+    )
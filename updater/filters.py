@@ -0,0 +1,54 @@
+import functools
+import re
+from typing import Dict, FrozenSet, Iterable, List, Pattern, Tuple
+
+# flags given after the closing delimiter eg. /^v\d+$/i
+FLAGS: Dict[str, int] = {
+    "i": re.IGNORECASE,
+    "m": re.MULTILINE,
+    "s": re.DOTALL,
+    "u": re.UNICODE,
+    "x": re.VERBOSE,
+}
+
+
+def compile_filter(expression: str) -> Pattern[str]:
+    """Compile filter written as /pattern/flags, any character can be used
+    as delimiter and it can be preceded with m, eg. m#^release-\\d+#i"""
+    start = 1 if expression[:1] == "m" else 0
+    if expression[:1] == "s":
+        raise ValueError(f"Substitution can not be used as filter: {expression}")
+    delimiter = expression[start : start + 1]
+    end = expression.rfind(delimiter)
+    if not delimiter or end == start:
+        raise ValueError(f"Wrong filter: {expression}, expected eg. /^\\d+\\.\\d+$/")
+    flags = 0
+    for flag in expression[end + 1 :]:
+        if flag not in FLAGS:
+            raise ValueError(f"Wrong flag {flag} in filter: {expression}")
+        flags |= FLAGS[flag]
+    return re.compile(expression[start + 1 : end], flags)
+
+
+class TagFilter:
+    """Filter and excluded versions of a component, compiled once"""
+
+    def __init__(self, expression: str, exclude_versions: Iterable[str]) -> None:
+        self.expression = expression
+        self.pattern = compile_filter(expression)
+        self.excluded: FrozenSet[str] = frozenset(exclude_versions)
+
+    def matches(self, tag: str) -> bool:
+        return tag not in self.excluded and self.pattern.search(tag) is not None
+
+    def select(self, tags: Iterable[str]) -> List[str]:
+        """Tags matching the filter and not excluded, in their order"""
+        search = self.pattern.search
+        excluded = self.excluded
+        return [tag for tag in tags if tag not in excluded and search(tag)]
+
+
+@functools.lru_cache(maxsize=1024)
+def get(expression: str, exclude_versions: Tuple[str, ...] = ()) -> TagFilter:
+    """TagFilter shared by all components with the same filter and exclusions"""
+    return TagFilter(expression, exclude_versions)
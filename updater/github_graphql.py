@@ -0,0 +1,166 @@
+import os
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import requests
+from loguru import logger
+from requests.models import Response
+
+from updater import session
+
+API_URL: str = "https://api.github.com"
+TOKEN_ENV: str = "GITHUB_TOKEN"
+# repositories asked for in one query, keeps query cost well below the limits
+MAX_REPOS_PER_QUERY: int = 50
+# newest releases or tags read for each repository
+PAGE_SIZE: int = 100
+
+RELEASES = "releases"
+TAGS = "tags"
+
+_FIELDS: Dict[str, str] = {
+    RELEASES: (
+        f"releases(first: {PAGE_SIZE}, orderBy: {{field: CREATED_AT, direction: DESC}})"
+        " { nodes { tagName isDraft } }"
+    ),
+    TAGS: (
+        f'refs(refPrefix: "refs/tags/", first: {PAGE_SIZE}, '
+        "orderBy: {field: TAG_COMMIT_DATE, direction: DESC}) { nodes { name } }"
+    ),
+}
+
+
+def split_repo(repo: str) -> Tuple[str, str]:
+    owner, _, name = repo.partition("/")
+    if not owner or not name:
+        raise ValueError(f"GitHub repository {repo} should be given as owner/name!")
+    return owner, name
+
+
+def build_query(repos: List[str], kind: str) -> Tuple[str, Dict[str, str]]:
+    """Query with one aliased repository field for each repo"""
+    params: List[str] = []
+    fields: List[str] = []
+    variables: Dict[str, str] = {}
+    for i, repo in enumerate(repos):
+        variables[f"o{i}"], variables[f"n{i}"] = split_repo(repo)
+        params.append(f"$o{i}: String!, $n{i}: String!")
+        fields.append(
+            f"r{i}: repository(owner: $o{i}, name: $n{i}) {{ {_FIELDS[kind]} }}"
+        )
+    query = f"query({', '.join(params)}) {{ {' '.join(fields)} }}"
+    return query, variables
+
+
+def versions_from_repository(node: Optional[Dict[str, Any]], kind: str) -> List[str]:
+    if node is None:
+        # no such a repository
+        return list()
+    if kind == RELEASES:
+        return [
+            release["tagName"]
+            for release in node["releases"]["nodes"]
+            if not release.get("isDraft")
+        ]
+    return [tag["name"] for tag in node["refs"]["nodes"]]
+
+
+class ReleasesBatch:
+    """Versions of GitHub repositories fetched with GraphQL.
+
+    Repositories announced with want() are queried together with the first
+    one that is missing, many repositories aliased in one query."""
+
+    def __init__(self, api_url: str, kind: str = RELEASES) -> None:
+        self.api_url = api_url
+        self.kind = kind
+        self.requests_count: int = 0
+        self._versions: Dict[str, List[str]] = {}
+        self._wanted: Dict[str, None] = {}
+        self._lock = threading.Lock()
+
+    def want(self, repos: Iterable[str]) -> None:
+        with self._lock:
+            for repo in repos:
+                try:
+                    split_repo(repo)
+                except ValueError:
+                    # wrong name fails only the check of its own component
+                    continue
+                self._wanted[repo] = None
+
+    def versions(self, repo: str) -> List[str]:
+        """Versions are returned once, later calls query the repository again"""
+        split_repo(repo)
+        with self._lock:
+            if repo not in self._versions:
+                batch: List[str] = [repo] + [
+                    wanted
+                    for wanted in self._wanted
+                    if wanted != repo and wanted not in self._versions
+                ][: MAX_REPOS_PER_QUERY - 1]
+                self._request(batch)
+            return self._versions.pop(repo)
+
+    def _request(self, repos: List[str]) -> None:
+        query, variables = build_query(repos, self.kind)
+        headers: Dict[str, str] = {}
+        if os.environ.get(TOKEN_ENV):
+            headers["Authorization"] = f"bearer {os.environ[TOKEN_ENV]}"
+        r: Response = session.post(
+            f"{self.api_url}/graphql",
+            json={"query": query, "variables": variables},
+            headers=headers,
+        )
+        self.requests_count += 1
+        if not r.status_code == 200:
+            logger.error(f"Error status {r.status_code} for {self.api_url}/graphql")
+            raise requests.HTTPError(
+                f"Could not get versions of {', '.join(repos)}", response=r
+            )
+
+        body = r.json()
+        data: Dict[str, Any] = body.get("data") or {}
+        for error in body.get("errors", []):
+            # missing repositories are reported as errors with null data
+            logger.warning(f"GitHub GraphQL: {error.get('message')}")
+        if not data and body.get("errors"):
+            raise requests.HTTPError(
+                f"Could not get versions of {', '.join(repos)}", response=r
+            )
+        for i, repo in enumerate(repos):
+            self._versions[repo] = versions_from_repository(
+                data.get(f"r{i}"), self.kind
+            )
+            self._wanted.pop(repo, None)
+
+    def forget(self, repos: Iterable[str]) -> None:
+        """Drop announced repositories and their versions not asked for,
+        others may be still wanted by concurrent checks"""
+        with self._lock:
+            for repo in repos:
+                self._versions.pop(repo, None)
+                self._wanted.pop(repo, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._versions.clear()
+            self._wanted.clear()
+
+
+_batches: Dict[Tuple[str, str], ReleasesBatch] = {}
+_batches_lock = threading.Lock()
+
+
+def get_batch(api_url: Optional[str], kind: str = RELEASES) -> ReleasesBatch:
+    key = (api_url or API_URL, kind)
+    with _batches_lock:
+        if key not in _batches:
+            _batches[key] = ReleasesBatch(*key)
+        return _batches[key]
+
+
+def clear_batches() -> None:
+    with _batches_lock:
+        for batch in _batches.values():
+            batch.clear()
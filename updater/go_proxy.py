@@ -0,0 +1,40 @@
+import os
+from typing import List, Optional
+
+from updater import local_mirror
+
+DEFAULT_PROXY: str = "https://proxy.golang.org"
+PROXY_ENV: str = "GOPROXY"
+
+
+def escape_path(module: str) -> str:
+    """Module path as used in proxy urls, upper case letters are
+    replaced with ! and the lower case letter"""
+    return "".join(f"!{c.lower()}" if c.isupper() else c for c in module)
+
+
+def proxy_from_env() -> str:
+    """The first proxy from GOPROXY list which can be asked for versions,
+    direct and off entries are skipped"""
+    for entry in os.environ.get(PROXY_ENV, "").replace("|", ",").split(","):
+        entry = entry.strip()
+        if entry.startswith(("https://", "http://", "file://")):
+            return entry.rstrip("/")
+    return DEFAULT_PROXY
+
+
+def list_url(proxy_url: str, module: str) -> str:
+    return f"{proxy_url.rstrip('/')}/{escape_path(module)}/@v/list"
+
+
+def versions_from_list(text: str) -> List[str]:
+    return [line.strip() for line in text.splitlines() if line.strip()]
+
+
+def local_versions(proxy_url: str, module: str) -> Optional[List[str]]:
+    """Versions from file:// proxy directory, None if module is not there"""
+    path = local_mirror.root_path(proxy_url) / escape_path(module) / "@v" / "list"
+    try:
+        return versions_from_list(path.read_text())
+    except FileNotFoundError:
+        return None
@@ -0,0 +1,97 @@
+from typing import IO, Dict, Iterator, List, Union
+
+import yaml
+from yaml.events import (
+    CollectionEndEvent,
+    CollectionStartEvent,
+    Event,
+    MappingEndEvent,
+    MappingStartEvent,
+    ScalarEvent,
+    SequenceEndEvent,
+    SequenceStartEvent,
+)
+
+# libyaml parser is many times faster on big indexes, when it is available
+Loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+INDEX_FILE: str = "index.yaml"
+
+
+def _skip(events: Iterator[Event], event: Event) -> None:
+    """Consume the node which starts with the event"""
+    depth = 1 if isinstance(event, CollectionStartEvent) else 0
+    while depth:
+        event = next(events)
+        if isinstance(event, CollectionStartEvent):
+            depth += 1
+        elif isinstance(event, CollectionEndEvent):
+            depth -= 1
+
+
+def _chart_versions(events: Iterator[Event]) -> List[str]:
+    """Versions from a sequence of chart entries"""
+    versions: List[str] = []
+    event = next(events)
+    if not isinstance(event, SequenceStartEvent):
+        _skip(events, event)
+        return versions
+    while True:
+        event = next(events)
+        if isinstance(event, SequenceEndEvent):
+            return versions
+        if not isinstance(event, MappingStartEvent):
+            _skip(events, event)
+            continue
+        while True:
+            key = next(events)
+            if isinstance(key, MappingEndEvent):
+                break
+            value = next(events)
+            if (
+                isinstance(key, ScalarEvent)
+                and key.value == "version"
+                and isinstance(value, ScalarEvent)
+            ):
+                versions.append(value.value)
+            else:
+                _skip(events, value)
+
+
+def _entries(events: Iterator[Event]) -> Dict[str, List[str]]:
+    charts: Dict[str, List[str]] = {}
+    event = next(events)
+    if not isinstance(event, MappingStartEvent):
+        _skip(events, event)
+        return charts
+    while True:
+        key = next(events)
+        if isinstance(key, MappingEndEvent):
+            return charts
+        if isinstance(key, ScalarEvent):
+            charts[key.value] = _chart_versions(events)
+        else:
+            _skip(events, key)
+            _skip(events, next(events))
+
+
+def versions_from_index(stream: Union[str, bytes, IO[bytes]]) -> Dict[str, List[str]]:
+    """Chart name -> versions from Helm repository index.yaml. Parsed as
+    a stream of events, so nodes of the big index are never built and
+    only versions are kept."""
+    events = iter(yaml.parse(stream, Loader=Loader))
+    for event in events:
+        if isinstance(event, MappingStartEvent):
+            break
+    else:
+        return {}
+    charts: Dict[str, List[str]] = {}
+    while True:
+        key = next(events)
+        if isinstance(key, MappingEndEvent):
+            return charts
+        if isinstance(key, ScalarEvent) and key.value == "entries":
+            charts = _entries(events)
+        else:
+            _skip(events, key)
+            _skip(events, next(events))
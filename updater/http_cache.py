@@ -0,0 +1,59 @@
+from typing import Any, Callable, Dict, Optional, TypeVar
+
+from loguru import logger
+from requests.models import PreparedRequest, Response
+
+from updater import breaker, cache, session
+
+T = TypeVar("T")
+
+
+def conditional_get(
+    url: str,
+    parse: Callable[[Response], T],
+    params: Optional[Dict[str, Any]] = None,
+    headers: Optional[Dict[str, str]] = None,
+    stream: bool = False,
+) -> T:
+    """GET url revalidating the response parsed before with ETag/Last-Modified.
+    Returns the stored parsed value on 304, otherwise parse(response) which
+    is stored when the response has validators. Parsed value must be
+    serializable to json. With stream parse can read body from response.raw."""
+    prepared = PreparedRequest()
+    prepared.prepare_url(url, params)
+    full_url: str = str(prepared.url)
+    entry = cache.store.get_response(full_url)
+
+    request_headers: Dict[str, str] = dict(headers or {})
+    if entry and entry.etag:
+        request_headers["If-None-Match"] = entry.etag
+    if entry and entry.last_modified:
+        request_headers["If-Modified-Since"] = entry.last_modified
+
+    try:
+        r: Response = session.get(full_url, headers=request_headers, stream=stream)
+    except breaker.CircuitOpenError:
+        if not entry:
+            raise
+        # stale data is better than nothing while registry is down
+        logger.warning(f"{full_url} - registry unavailable, using stored response")
+        return entry.data  # type: ignore[no-any-return]
+    if r.status_code == 304 and entry:
+        logger.info(f"{full_url} - NOT MODIFIED")
+        return entry.data  # type: ignore[no-any-return]
+
+    try:
+        data: T = parse(r)
+    finally:
+        if stream:
+            # connection is back in the pool even if body was not read to the end
+            r.close()
+    etag: Optional[str] = r.headers.get("ETag")
+    last_modified: Optional[str] = r.headers.get("Last-Modified")
+    if r.status_code == 200 and (etag or last_modified):
+        cache.store.put_response(full_url, etag, last_modified, data)
+    return data
+
+
+def clear(registry: Optional[str] = None) -> None:
+    cache.store.delete_responses(registry)
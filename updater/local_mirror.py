@@ -0,0 +1,108 @@
+import json
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlparse
+from urllib.request import url2pathname
+
+from loguru import logger
+
+from updater import pypi_simple
+
+SCHEME: str = "file"
+OCI_INDEX: str = "index.json"
+OCI_REF_NAME: str = "org.opencontainers.image.ref.name"
+# file names used by bandersnatch for project pages
+SIMPLE_JSON_INDEX: str = "index.v1_json"
+SIMPLE_HTML_INDEX: str = "index.html"
+
+
+def is_local(url: Optional[str]) -> bool:
+    return url is not None and urlparse(url).scheme == SCHEME
+
+
+def root_path(url: str) -> Path:
+    return Path(url2pathname(urlparse(url).path))
+
+
+def _read_json(path: Path) -> Optional[Any]:
+    try:
+        return json.loads(path.read_text())
+    except FileNotFoundError:
+        return None
+
+
+def pypi_versions(url: str, component_name: str) -> List[str]:
+    """Versions from JSON API files of a mirror, as written by bandersnatch
+    in {root}/pypi/{project}/json"""
+    body = _read_json(root_path(url) / "pypi" / component_name / "json")
+    if body is None:
+        logger.info(f"{component_name} - not found in {url}")
+        return list()
+    return list(body.get("releases", {}).keys())
+
+
+def pypi_simple_versions(url: str, component_name: str) -> List[str]:
+    """Versions from a simple index tree {root}/simple/{project}/"""
+    project_dir = root_path(url) / "simple" / pypi_simple.normalize_name(component_name)
+    body = _read_json(project_dir / SIMPLE_JSON_INDEX)
+    if body is not None:
+        return pypi_simple.versions_from_json(body, component_name)
+    try:
+        text = (project_dir / SIMPLE_HTML_INDEX).read_text()
+    except FileNotFoundError:
+        logger.info(f"{component_name} - not found in {url}")
+        return list()
+    return pypi_simple.versions_from_html(text, component_name)
+
+
+def _split_ref_name(ref_name: str) -> Tuple[Optional[str], str]:
+    """Image name and tag from ref name annotation, which is just a tag
+    or a full reference like docker.io/library/python:3.9"""
+    name, sep, tag = ref_name.rpartition(":")
+    if not sep or "/" in tag:
+        return None, ref_name
+    return name, tag
+
+
+def _is_same_image(name: Optional[str], repo_name: str, component_name: str) -> bool:
+    if name is None:
+        return True
+    return name == component_name or name.endswith(f"/{repo_name}/{component_name}")
+
+
+def _oci_manifests(
+    url: str, repo_name: str, component_name: str
+) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """Tags and descriptors of the image from OCI layout index.json, first
+    from {root}/{repo}/{name}/ layout and then from a layout with many images
+    in {root}/"""
+    root = root_path(url)
+    for layout in (root / repo_name / component_name, root):
+        index = _read_json(layout / OCI_INDEX)
+        if index is None:
+            continue
+        for manifest in index.get("manifests", []):
+            ref_name = manifest.get("annotations", {}).get(OCI_REF_NAME)
+            if not ref_name:
+                continue
+            name, tag = _split_ref_name(ref_name)
+            if layout != root or _is_same_image(name, repo_name, component_name):
+                yield tag, manifest
+        return
+    logger.info(f"{repo_name}/{component_name} - not found in {url}")
+
+
+def oci_tags(url: str, repo_name: str, component_name: str) -> List[str]:
+    tags: Dict[str, None] = {}
+    for tag, _ in _oci_manifests(url, repo_name, component_name):
+        tags[tag] = None
+    return list(tags)
+
+
+def oci_digest(url: str, repo_name: str, component_name: str, version_tag: str) -> str:
+    for tag, manifest in _oci_manifests(url, repo_name, component_name):
+        if tag == version_tag and manifest.get("digest"):
+            return str(manifest["digest"])
+    raise Exception(
+        f"Could not get digest for {repo_name}/{component_name}:{version_tag}"
+    )
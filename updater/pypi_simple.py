@@ -0,0 +1,81 @@
+import re
+from html.parser import HTMLParser
+from typing import Any, Dict, List, Optional
+
+SIMPLE_JSON_MEDIA_TYPE: str = "application/vnd.pypi.simple.v1+json"
+# html is accepted for indexes which do not serve json yet
+SIMPLE_ACCEPT: str = f"{SIMPLE_JSON_MEDIA_TYPE}, text/html;q=0.01"
+
+SDIST_EXTENSIONS = (".tar.gz", ".tar.bz2", ".tar.xz", ".tgz", ".tar", ".zip")
+
+
+def normalize_name(name: str) -> str:
+    """Project name normalized as in PEP 503"""
+    return re.sub(r"[-_.]+", "-", name).lower()
+
+
+def version_from_filename(filename: str, project_name: str) -> Optional[str]:
+    """Return version from wheel, egg or sdist file name, None if unknown format"""
+    if filename.endswith(".whl") or filename.endswith(".egg"):
+        parts = filename.split("-")
+        return parts[1] if len(parts) > 2 else None
+    for ext in SDIST_EXTENSIONS:
+        if filename.endswith(ext):
+            base = filename[: -len(ext)]
+            # legacy sdists can have dashes in project name
+            name_len = len(project_name)
+            if (
+                normalize_name(base[:name_len]) == normalize_name(project_name)
+                and base[name_len : name_len + 1] == "-"
+            ):
+                return base[name_len + 1 :] or None
+            return base.rpartition("-")[2] or None
+    return None
+
+
+def versions_from_filenames(filenames: List[str], project_name: str) -> List[str]:
+    versions: Dict[str, None] = {}
+    for filename in filenames:
+        version = version_from_filename(filename, project_name)
+        if version:
+            versions[version] = None
+    return list(versions)
+
+
+def versions_from_json(body: Dict[str, Any], project_name: str) -> List[str]:
+    """Versions from a project page of the Simple JSON API (PEP 691).
+    The versions key (PEP 700) has also versions without files."""
+    if "versions" in body:
+        return list(body["versions"])
+    return versions_from_filenames(
+        [file["filename"] for file in body.get("files", [])], project_name
+    )
+
+
+class _AnchorsParser(HTMLParser):
+    def __init__(self) -> None:
+        super().__init__()
+        self.texts: List[str] = []
+        self._in_anchor = False
+
+    def handle_starttag(self, tag: str, attrs: Any) -> None:
+        if tag == "a":
+            self._in_anchor = True
+            self.texts.append("")
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag == "a":
+            self._in_anchor = False
+
+    def handle_data(self, data: str) -> None:
+        if self._in_anchor:
+            self.texts[-1] += data
+
+
+def versions_from_html(text: str, project_name: str) -> List[str]:
+    """Versions from a project page of the Simple HTML API (PEP 503)"""
+    parser = _AnchorsParser()
+    parser.feed(text)
+    return versions_from_filenames(
+        [anchor.strip() for anchor in parser.texts], project_name
+    )
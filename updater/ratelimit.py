@@ -0,0 +1,179 @@
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Callable, Dict, Optional
+
+import requests
+from loguru import logger
+from requests.models import Response
+
+DEFAULT_RATE: float = 10.0
+DEFAULT_BURST: int = 10
+MIN_RATE: float = 0.5
+MAX_RETRIES: int = 4
+# no single wait is longer than that, even if registry asks for it
+MAX_PAUSE: float = 60.0
+# responses which mean "slow down", 503 is used by some CDNs for that
+THROTTLED_STATUSES = (429, 503)
+
+
+class DeadlineExceeded(requests.Timeout):
+    """Request not sent, as it could not be done before the deadline"""
+
+
+def _seconds(value: Optional[str]) -> Optional[float]:
+    """Seconds from Retry-After like header: a number or an http date"""
+    if not value:
+        return None
+    value = value.split(";")[0].strip()
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+def _remaining(r: Response) -> Optional[int]:
+    # eg. "76;w=21600" from Docker Hub
+    value = r.headers.get("RateLimit-Remaining") or r.headers.get(
+        "X-RateLimit-Remaining"
+    )
+    try:
+        return int(value.split(";")[0]) if value else None
+    except ValueError:
+        return None
+
+
+def _reset_after(r: Response) -> Optional[float]:
+    seconds = _seconds(r.headers.get("RateLimit-Reset"))
+    if seconds is None and r.headers.get("X-RateLimit-Reset"):
+        # epoch seconds eg. GitHub
+        epoch = _seconds(r.headers.get("X-RateLimit-Reset"))
+        seconds = max(epoch - time.time(), 0.0) if epoch is not None else None
+    return seconds
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: int) -> None:
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = burst
+        self.tokens: float = burst
+        self.updated = time.monotonic()
+        self.blocked_until: float = 0.0
+        self.lock = threading.Lock()
+
+    def _wait_time(self) -> float:
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def acquire(
+        self, sleep: Callable[[float], None], deadline: Optional[float] = None
+    ) -> None:
+        """Wait for a token, fails at once when it would be after deadline"""
+        while True:
+            with self.lock:
+                wait = self._wait_time()
+            if wait <= 0:
+                return
+            if deadline is not None and time.monotonic() + wait > deadline:
+                raise DeadlineExceeded("Rate limit wait would pass the deadline")
+            sleep(wait)
+
+    def pause(self, seconds: float) -> None:
+        with self.lock:
+            self.blocked_until = max(
+                self.blocked_until, time.monotonic() + min(seconds, MAX_PAUSE)
+            )
+
+    def slow_down(self) -> None:
+        with self.lock:
+            self.rate = max(self.rate / 2, MIN_RATE)
+
+    def speed_up(self) -> None:
+        with self.lock:
+            self.rate = min(self.rate + 1, self.max_rate)
+
+
+class Scheduler:
+    """Requests to each registry host go through its token bucket.
+    Rate is halved when registry throttles and slowly restored after
+    successful responses, Retry-After and RateLimit-* headers pause
+    all requests to the host."""
+
+    def __init__(
+        self,
+        rate: float = DEFAULT_RATE,
+        burst: int = DEFAULT_BURST,
+        max_retries: int = MAX_RETRIES,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.max_retries = max_retries
+        self.sleep = sleep
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, host: str) -> TokenBucket:
+        with self._lock:
+            if host not in self._buckets:
+                self._buckets[host] = TokenBucket(self.rate, self.burst)
+            return self._buckets[host]
+
+    def request(
+        self, host: str, send: Callable[[], Response], deadline: Optional[float] = None
+    ) -> Response:
+        """Send request when the host bucket allows it, throttled requests
+        are retried. Waits and retries are not started if they would end
+        after `deadline`, given as time.monotonic() value."""
+        bucket = self.bucket(host)
+        attempt = 0
+        while True:
+            bucket.acquire(self.sleep, deadline)
+            r = send()
+            if r.status_code in THROTTLED_STATUSES and attempt < self.max_retries:
+                delay = _seconds(r.headers.get("Retry-After"))
+                delay = delay if delay is not None else float(2**attempt)
+                bucket.slow_down()
+                bucket.pause(delay)
+                if deadline is not None and time.monotonic() + delay > deadline:
+                    raise DeadlineExceeded(
+                        f"{host} throttled with {r.status_code},"
+                        " retry would pass the deadline"
+                    )
+                logger.warning(
+                    f"{host} throttled with {r.status_code}, retry in {delay}s"
+                )
+                attempt += 1
+                continue
+
+            remaining = _remaining(r)
+            if remaining is not None and remaining <= 1:
+                reset = _reset_after(r)
+                if reset:
+                    bucket.pause(reset)
+                bucket.slow_down()
+            elif r.status_code < 400:
+                bucket.speed_up()
+            return r
+
+    def configure(self, rate: float, burst: Optional[int] = None) -> None:
+        """Change rate for all hosts"""
+        with self._lock:
+            self.rate = rate
+            self.burst = burst or max(int(rate), 1)
+            self._buckets.clear()
+
+
+scheduler = Scheduler()
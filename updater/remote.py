@@ -0,0 +1,53 @@
+from typing import Any, Dict, List, Optional
+
+import requests
+from loguru import logger
+
+from updater import session
+from updater.breaker import CircuitOpenError
+
+VERSIONS_PATH: str = "/versions"
+ENV: str = "UPDATER_SERVER"
+# the server may fetch a long versions list before it answers
+READ_TIMEOUT: float = 300.0
+
+# url of the server versions are resolved through, None to fetch them here
+url: Optional[str] = None
+
+
+def configure(server_url: Optional[str] = None) -> None:
+    global url
+    url = server_url.rstrip("/") if server_url else None
+
+
+def versions(component_name: str, component: Dict[str, Any]) -> Optional[List[str]]:
+    """Versions of the component as resolved by the server, component is
+    given as its entry in components.yaml. None if the server is not reachable,
+    then versions should be fetched without it."""
+    assert url is not None
+    try:
+        r = session.get_session(session.host_of(url)).post(
+            f"{url}{VERSIONS_PATH}",
+            json={"name": component_name, "component": component},
+            timeout=session.timeout(READ_TIMEOUT),
+        )
+    except requests.ConnectionError as e:
+        logger.warning(f"Server {url} not reachable, fetching without it: {e}")
+        return None
+    if not r.headers.get("Content-Type", "").startswith("application/json"):
+        # error page of a proxy in front of the server
+        r.raise_for_status()
+        raise requests.HTTPError(
+            f"Not a versions answer from {url}: {r.headers.get('Content-Type')}",
+            response=r,
+        )
+    body: Dict[str, Any] = r.json()
+    if r.status_code == 503 and "host" in body:
+        raise CircuitOpenError(body["host"])
+    if not r.status_code == 200:
+        raise requests.HTTPError(
+            body.get("error") or f"Error status {r.status_code} from {url}",
+            response=r,
+        )
+    ret: List[str] = body["versions"]
+    return ret
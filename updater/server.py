@@ -0,0 +1,141 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from loguru import logger
+
+from updater import cache, config_yaml, local_mirror, remote, singleflight, snapshot
+from updater.breaker import CircuitOpenError
+from updater.components import Component
+
+DEFAULT_HOST: str = "127.0.0.1"
+DEFAULT_PORT: int = 8337
+# seconds versions are answered from memory before the cache is asked again
+MEMORY_TTL: float = 60.0
+
+
+class MemoryCache:
+    """Versions lists by upstream key, kept in memory for a short time
+    so the most often asked ones are not read from the cache file"""
+
+    def __init__(self, ttl: float = MEMORY_TTL) -> None:
+        self.ttl = ttl
+        self._entries: Dict[str, Tuple[float, List[str]]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[List[str]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if time.monotonic() - entry[0] >= self.ttl:
+                del self._entries[key]
+                return None
+            return entry[1]
+
+    def put(self, key: str, tags: List[str]) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic(), tags)
+
+
+class VersionsServer(ThreadingHTTPServer):
+    """Resolves versions for many check processes, concurrent requests for
+    the same upstream list share one fetch, fetched lists are kept in memory
+    and in the cache, which refreshes stale entries in background"""
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address: Tuple[str, int],
+        memory_ttl: float = MEMORY_TTL,
+        local_mirrors: Sequence[str] = (),
+    ) -> None:
+        super().__init__(address, RequestHandler)
+        self.memory = MemoryCache(memory_ttl)
+        # file:// registries clients may ask for, others are not read
+        self.local_mirrors: List[Path] = [
+            local_mirror.root_path(url).resolve() for url in local_mirrors
+        ]
+
+    def is_served(self, component: Component) -> bool:
+        """Local mirror of the component is one of those given to the server
+        or a directory in them, remote registries are always served"""
+        if not local_mirror.is_local(component.registry_url):
+            return True
+        path = local_mirror.root_path(str(component.registry_url)).resolve()
+        return any(root == path or root in path.parents for root in self.local_mirrors)
+
+    def resolve(self, component: Component) -> List[str]:
+        key = snapshot.key_to_str(component.upstream_key())
+        tags = self.memory.get(key)
+        if tags is None:
+            # batched requests like GitHub GraphQL queries are announced first
+            component_class = type(component)
+            component_class.prepare_check([component])
+            try:
+                tags = singleflight.coordinator.coalesce(
+                    key, component.fetch_cached_versions_tags
+                )
+            finally:
+                component_class.finish_check([component])
+            self.memory.put(key, tags)
+        return tags
+
+
+class RequestHandler(BaseHTTPRequestHandler):
+    server: VersionsServer
+
+    def do_POST(self) -> None:
+        if self.path != remote.VERSIONS_PATH:
+            self.reply(404, {"error": f"Not found: {self.path}"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            body: Dict[str, Any] = json.loads(self.rfile.read(length))
+            component = config_yaml.component_from_dict(body["name"], body["component"])
+        except Exception as e:
+            self.reply(400, {"error": f"Wrong component: {e!r}"})
+            return
+        if not self.server.is_served(component):
+            self.reply(403, {"error": f"Not served: {component.registry_url}"})
+            return
+        try:
+            self.reply(200, {"versions": self.server.resolve(component)})
+        except CircuitOpenError as e:
+            self.reply(503, {"error": str(e), "host": e.host})
+        except Exception as e:
+            logger.warning(f"{component.component_name} not resolved: {e}")
+            self.reply(502, {"error": str(e)})
+
+    def reply(self, status: int, body: Dict[str, Any]) -> None:
+        data = json.dumps(body, separators=(",", ":")).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        logger.debug(f"{self.address_string()} {format % args}")
+
+
+def serve(
+    host: str = DEFAULT_HOST,
+    port: int = DEFAULT_PORT,
+    memory_ttl: float = MEMORY_TTL,
+    local_mirrors: Sequence[str] = (),
+) -> None:
+    """Serve versions until interrupted"""
+    with VersionsServer((host, port), memory_ttl, local_mirrors) as server:
+        logger.info(f"Serving versions on http://{host}:{server.server_port}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            cache.wait_for_refresh()
+            cache.finish_run()
@@ -0,0 +1,150 @@
+import contextvars
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.models import Response
+
+from updater import breaker, ratelimit
+
+# connections kept alive per registry host, should be >= per host concurrency
+POOL_SIZE: int = 16
+CONNECT_TIMEOUT: float = 5.0
+READ_TIMEOUT: float = 30.0
+# when set, request not answered in that many seconds is sent once more
+# and the first response is used
+HEDGE_AFTER: Optional[float] = None
+
+# time.monotonic() value all requests of a run should be done by, None for
+# no deadline. Threads checking components run in a copy of the context of
+# their run, so the deadline stays with them after the run has returned
+# and it is not seen by other runs, eg. of concurrent server requests.
+_deadline: "contextvars.ContextVar[Optional[float]]" = contextvars.ContextVar(
+    "deadline", default=None
+)
+
+_sessions: Dict[str, requests.Session] = {}
+_sessions_lock = threading.Lock()
+_hedge_executor: Optional[ThreadPoolExecutor] = None
+
+
+def configure(
+    connect_timeout: float = CONNECT_TIMEOUT,
+    read_timeout: float = READ_TIMEOUT,
+    hedge_after: Optional[float] = HEDGE_AFTER,
+) -> None:
+    global CONNECT_TIMEOUT, READ_TIMEOUT, HEDGE_AFTER
+    CONNECT_TIMEOUT = connect_timeout
+    READ_TIMEOUT = read_timeout
+    HEDGE_AFTER = hedge_after
+
+
+@contextmanager
+def deadline(seconds: Optional[float]) -> Iterator[None]:
+    """Within the context timeouts and rate limit waits of all requests are
+    capped by the time left, requests are not sent after `seconds`"""
+    if seconds is None:
+        yield
+        return
+    token = _deadline.set(time.monotonic() + seconds)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining() -> Optional[float]:
+    """Seconds left to the deadline, None if there is no deadline"""
+    at = _deadline.get()
+    return None if at is None else at - time.monotonic()
+
+
+def timeout(read_timeout: Optional[float] = None) -> Tuple[float, float]:
+    """Connect and read timeouts, capped by the time left to the deadline"""
+    connect = CONNECT_TIMEOUT
+    read = READ_TIMEOUT if read_timeout is None else read_timeout
+    left = remaining()
+    if left is None:
+        return connect, read
+    if left <= 0:
+        raise ratelimit.DeadlineExceeded("Deadline has passed, request not sent")
+    return min(connect, left), min(read, left)
+
+
+def host_of(url: str) -> str:
+    return urlparse(url).netloc
+
+
+def get_session(host: str) -> requests.Session:
+    """Return keep-alive session shared by all requests to the given host"""
+    with _sessions_lock:
+        session = _sessions.get(host)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_SIZE)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _sessions[host] = session
+        return session
+
+
+def _hedged(send: Callable[[], Response]) -> Response:
+    """Send request again if it is slow, return the first response"""
+    global _hedge_executor
+    if HEDGE_AFTER is None:
+        return send()
+    with _sessions_lock:
+        if _hedge_executor is None:
+            _hedge_executor = ThreadPoolExecutor(thread_name_prefix="hedge")
+    # sent in the context of the caller, with its deadline
+    first = _hedge_executor.submit(contextvars.copy_context().run, send)
+    done, _ = wait([first], timeout=HEDGE_AFTER)
+    if done:
+        return first.result()
+    second = _hedge_executor.submit(contextvars.copy_context().run, send)
+    done, pending = wait([first, second], return_when=FIRST_COMPLETED)
+    winner = done.pop()
+    if winner.exception() is not None and pending:
+        return pending.pop().result()
+    return winner.result()
+
+
+def request(method: str, url: str, **kwargs: Any) -> Response:
+    host = host_of(url)
+
+    def send() -> Response:
+        # timeout is taken when the request is sent, after rate limit waits
+        return get_session(host).request(
+            method, url, **{"timeout": timeout(), **kwargs}
+        )
+
+    return breaker.breakers.request(
+        host,
+        lambda: ratelimit.scheduler.request(
+            host, lambda: _hedged(send), _deadline.get()
+        ),
+    )
+
+
+def get(url: str, **kwargs: Any) -> Response:
+    return request("GET", url, **kwargs)
+
+
+def head(url: str, **kwargs: Any) -> Response:
+    return request("HEAD", url, **kwargs)
+
+
+def post(url: str, **kwargs: Any) -> Response:
+    return request("POST", url, **kwargs)
+
+
+def close_sessions() -> None:
+    with _sessions_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
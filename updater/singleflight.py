@@ -0,0 +1,104 @@
+import threading
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Hashable, Iterator, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class FetchCoordinator:
+    """Within a run each upstream list is fetched once: the first caller of
+    a key fetches it, concurrent and later callers share its result.
+    Outside of a run fetches are not deduplicated."""
+
+    def __init__(self) -> None:
+        self._results: Dict[Hashable, "Future[Any]"] = {}
+        # fetches running now, for coalesce() outside of runs
+        self._inflight: Dict[Hashable, "Future[Any]"] = {}
+        self._runs: int = 0
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def run(self) -> Iterator["FetchCoordinator"]:
+        with self._lock:
+            self._runs += 1
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._runs -= 1
+                if not self._runs:
+                    self._results.clear()
+
+    def do(self, key: Hashable, fetch: Callable[[], T]) -> T:
+        future: "Optional[Future[Any]]" = None
+        owner = False
+        with self._lock:
+            if self._runs and key in self._results:
+                future = self._results[key]
+            elif self._runs:
+                future = self._results[key] = Future()
+                owner = True
+        if future is None:
+            return fetch()
+        if owner:
+            try:
+                future.set_result(fetch())
+            except BaseException as e:
+                future.set_exception(e)
+        return future.result()  # type: ignore[no-any-return]
+
+    def stream(
+        self, key: Hashable, fetch: Callable[[], Iterator[List[T]]]
+    ) -> Iterator[List[T]]:
+        """do() for fetches yielding pages: the first caller of a key gets
+        the pages as they are fetched, the other ones get all of them as one
+        page once the last one is fetched"""
+        future: "Optional[Future[Any]]" = None
+        owner = False
+        with self._lock:
+            if self._runs and key in self._results:
+                future = self._results[key]
+            elif self._runs:
+                future = self._results[key] = Future()
+                owner = True
+        if future is None:
+            yield from fetch()
+            return
+        if not owner:
+            yield future.result()
+            return
+        pages: List[List[T]] = []
+        try:
+            for page in fetch():
+                pages.append(page)
+                yield page
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        # one page is shared as it is, so cached sorted lists stay marked
+        future.set_result(
+            pages[0] if len(pages) == 1 else [tag for page in pages for tag in page]
+        )
+
+    def coalesce(self, key: Hashable, fetch: Callable[[], T]) -> T:
+        """Concurrent callers of a key share one fetch, callers coming after
+        it has finished fetch again, for long running processes"""
+        with self._lock:
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self._inflight[key] = Future()
+        assert future is not None
+        if owner:
+            try:
+                future.set_result(fetch())
+            except BaseException as e:
+                future.set_exception(e)
+            finally:
+                with self._lock:
+                    del self._inflight[key]
+        return future.result()  # type: ignore[no-any-return]
+
+
+coordinator = FetchCoordinator()
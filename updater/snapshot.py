@@ -0,0 +1,139 @@
+import datetime
+import gzip
+import json
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Hashable, Iterator, List, Optional, Sequence
+
+from updater import cache
+
+FORMAT: str = "updater-snapshot"
+FORMAT_VERSION: int = 1
+# imported snapshot, used by check and update instead of registries
+INSTALLED_PATH: Path = cache.CACHE_DIR / "snapshot.json.gz"
+
+
+def key_to_str(key: Sequence[Hashable]) -> str:
+    return json.dumps(list(key), separators=(",", ":"))
+
+
+class Snapshot:
+    """Versions lists keyed by Component.upstream_key()"""
+
+    def __init__(
+        self,
+        versions: Optional[Dict[str, List[str]]] = None,
+        created: Optional[str] = None,
+    ) -> None:
+        self.versions: Dict[str, List[str]] = versions or {}
+        self.created: str = created or datetime.datetime.now(
+            datetime.timezone.utc
+        ).isoformat(timespec="seconds")
+
+    def __len__(self) -> int:
+        return len(self.versions)
+
+    def get(self, key: Sequence[Hashable]) -> Optional[List[str]]:
+        return self.versions.get(key_to_str(key))
+
+    def add(self, key: Sequence[Hashable], tags: List[str]) -> None:
+        self.versions[key_to_str(key)] = tags
+
+    def save(self, path: Path) -> None:
+        body = {
+            "format": FORMAT,
+            "version": FORMAT_VERSION,
+            "created": self.created,
+            "versions": self.versions,
+        }
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # written to a temp file first, so readers never see partial snapshot
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        with os.fdopen(fd, "wb") as tmp:
+            tmp.write(gzip.compress(json.dumps(body, separators=(",", ":")).encode()))
+        os.replace(tmp_name, path)
+
+    @classmethod
+    def load(cls, path: Path) -> "Snapshot":
+        try:
+            body: Dict[str, Any] = json.loads(gzip.decompress(path.read_bytes()))
+        except (OSError, ValueError) as e:
+            raise ValueError(f"{path} is not a versions snapshot: {e}")
+        if body.get("format") != FORMAT:
+            raise ValueError(f"{path} is not a versions snapshot")
+        if body.get("version") != FORMAT_VERSION:
+            raise ValueError(
+                f"Snapshot version {body.get('version')} not supported, "
+                f"expected {FORMAT_VERSION}"
+            )
+        return cls(body["versions"], body.get("created"))
+
+
+_installed: Optional[Snapshot] = None
+_installed_mtime: Optional[float] = None
+_recording: Optional[Snapshot] = None
+_lock = threading.Lock()
+
+
+def installed() -> Optional[Snapshot]:
+    """Imported snapshot, read once and again only when the file changes"""
+    global _installed, _installed_mtime
+    with _lock:
+        try:
+            mtime: Optional[float] = INSTALLED_PATH.stat().st_mtime
+        except OSError:
+            mtime = None
+        if mtime != _installed_mtime:
+            _installed = Snapshot.load(INSTALLED_PATH) if mtime is not None else None
+            _installed_mtime = mtime
+        return _installed
+
+
+def lookup(key: Sequence[Hashable]) -> Optional[List[str]]:
+    """Versions list from imported snapshot, never while recording a new one"""
+    if _recording is not None:
+        return None
+    snapshot = installed()
+    return snapshot.get(key) if snapshot is not None else None
+
+
+def is_recording() -> bool:
+    return _recording is not None
+
+
+def record(key: Sequence[Hashable], tags: List[str]) -> None:
+    snapshot = _recording
+    if snapshot is not None:
+        with _lock:
+            snapshot.add(key, tags)
+
+
+@contextmanager
+def recording() -> Iterator[Snapshot]:
+    """Versions lists fetched from registries within the context are added
+    to the yielded snapshot"""
+    global _recording
+    with _lock:
+        _recording = Snapshot()
+    try:
+        yield _recording
+    finally:
+        with _lock:
+            _recording = None
+
+
+def install(path: Path) -> Snapshot:
+    """Validate snapshot file and use it for the following checks"""
+    snapshot = Snapshot.load(path)
+    snapshot.save(INSTALLED_PATH)
+    return snapshot
+
+
+def clear() -> None:
+    try:
+        INSTALLED_PATH.unlink()
+    except FileNotFoundError:
+        pass
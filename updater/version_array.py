@@ -0,0 +1,123 @@
+import re
+from types import ModuleType
+from typing import Any, Callable, List, Optional
+
+import packaging.version
+from packaging.version import VERSION_PATTERN
+
+numpy: Optional[ModuleType]
+try:
+    import numpy as _numpy
+
+    numpy = _numpy
+except ImportError:  # pragma: no cover
+    numpy = None
+
+# private key of LegacyVersion, packaging versions without it can not order
+# tags which are not PEP 440 versions and leave them to version_index
+_legacy_cmpkey: Optional[Callable[[str], Any]] = getattr(
+    packaging.version, "_legacy_cmpkey", None
+)
+
+_VERSION = re.compile(r"^\s*" + VERSION_PATTERN + r"\s*$", re.VERBOSE | re.IGNORECASE)
+# most tags are just releases and are encoded without other parts
+_RELEASE = re.compile(r"v?(\d+(?:\.\d+)*)")
+# pre-release phases in packaging order, -1 is for dev releases without
+# pre and post parts and 3 for versions without pre-release
+_PRE_PHASES = {
+    "a": 0,
+    "alpha": 0,
+    "b": 1,
+    "beta": 1,
+    "c": 2,
+    "rc": 2,
+    "pre": 2,
+    "preview": 2,
+}
+NO_PRE: int = 3
+DEV_ONLY: int = -1
+NO_POST: int = -1
+# larger numbers do not fit into int64 columns
+MAX_NUMBER: int = 2**62
+NO_DEV: int = MAX_NUMBER + 1
+
+
+def available() -> bool:
+    return numpy is not None
+
+
+def sort_tags(tags: List[str]) -> Optional[List[str]]:
+    """Tags ordered like version_index.sort_tags does with packaging.
+
+    PEP 440 versions are encoded into int64 columns: epoch, release padded
+    with zeros, pre-release phase and number, post and dev numbers, and all
+    of them are ordered with one lexsort. Other tags are LegacyVersions,
+    lower than all PEP 440 ones, and they are ordered with packaging.
+    None is returned for lists with local versions or too large numbers,
+    and for lists with LegacyVersions when packaging has no key for them."""
+    assert numpy is not None
+    legacy: List[int] = []
+    indexes: List[int] = []
+    rows: List[List[int]] = []
+    for i, tag in enumerate(tags):
+        release_match = _RELEASE.fullmatch(tag)
+        if release_match is not None:
+            release = [int(n) for n in release_match.group(1).split(".")]
+            if max(release) > MAX_NUMBER:
+                return None
+            indexes.append(i)
+            rows.append([0, NO_PRE, 0, NO_POST, NO_DEV] + release)
+            continue
+        match = _VERSION.search(tag)
+        if match is None:
+            legacy.append(i)
+            continue
+        if match.group("local") is not None:
+            return None
+        release = [int(n) for n in match.group("release").split(".")]
+        epoch = int(match.group("epoch") or 0)
+        pre_l, pre_n = match.group("pre_l"), int(match.group("pre_n") or 0)
+        post_n = match.group("post_n1") or match.group("post_n2")
+        post = int(post_n or 0) if match.group("post_l") or post_n else None
+        dev = int(match.group("dev_n") or 0) if match.group("dev_l") else None
+        if max(epoch, pre_n, post or 0, dev or 0, *release) > MAX_NUMBER:
+            return None
+        if pre_l:
+            pre = _PRE_PHASES[pre_l.lower()]
+        elif post is None and dev is not None:
+            pre = DEV_ONLY
+        else:
+            pre = NO_PRE
+        indexes.append(i)
+        rows.append(
+            [
+                epoch,
+                pre,
+                pre_n,
+                NO_POST if post is None else post,
+                NO_DEV if dev is None else dev,
+            ]
+            + release
+        )
+
+    ret: List[str] = []
+    if legacy:
+        legacy_key = _legacy_cmpkey
+        if legacy_key is None:
+            return None
+        # parse() returns LegacyVersion for them, ordered by this key, which
+        # is compared as a plain tuple much faster than LegacyVersion objects
+        ret = [tags[i] for i in sorted(legacy, key=lambda i: (legacy_key(tags[i]), -i))]
+    if rows:
+        width = max(len(row) for row in rows)
+        array = numpy.array(
+            [row + [0] * (width - len(row)) for row in rows], dtype=numpy.int64
+        )
+        order = numpy.array(indexes, dtype=numpy.int64)
+        # lexsort orders by the last key first: epoch, release, pre, post, dev
+        # and for equal versions the first tag from the list is the last one
+        keys = [-order, array[:, 4], array[:, 3], array[:, 2], array[:, 1]]
+        keys.extend(array[:, c] for c in range(width - 1, 4, -1))
+        keys.append(array[:, 0])
+        ret.extend(tags[i] for i in order[numpy.lexsort(keys)])
+    return ret
@@ -0,0 +1,48 @@
+from typing import Dict, List
+
+from packaging.version import parse
+
+from updater import version_array
+
+
+class SortedTags(List[str]):
+    """Tags already ordered by sort_tags(), versions lists are cached in
+    this order, so checks select from them without parsing versions"""
+
+
+def sort_tags(tags: List[str]) -> List[str]:
+    """Tags ordered from the lowest version, tags with equal versions are
+    ordered so the first one from the list is the last one. Vectorised with
+    NumPy when it is installed, with packaging for lists it can not encode."""
+    if version_array.available():
+        ret = version_array.sort_tags(tags)
+        if ret is not None:
+            return ret
+    return sort_parsed_tags(tags)
+
+
+def sort_parsed_tags(tags: List[str]) -> List[str]:
+    """sort_tags() parsing each tag with packaging"""
+    return [
+        tag
+        for _, tag in sorted(
+            enumerate(tags), key=lambda item: (parse(item[1]), -item[0])
+        )
+    ]
+
+
+def sorted_tags(tags: List[str]) -> SortedTags:
+    """Tags sorted by version, already sorted ones are returned as they are"""
+    if isinstance(tags, SortedTags):
+        return tags
+    return SortedTags(sort_tags(tags))
+
+
+def sorted_index(index: Dict[str, List[str]]) -> Dict[str, SortedTags]:
+    """sorted_tags() of each list in the index of a repository"""
+    return {name: sorted_tags(tags) for name, tags in index.items()}
+
+
+def restore_index(index: Dict[str, List[str]]) -> Dict[str, SortedTags]:
+    """Index of a repository with lists read from the cache, already sorted"""
+    return {name: SortedTags(tags) for name, tags in index.items()}